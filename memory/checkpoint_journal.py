@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal for Nova's memory
+Append-only deltas on top of a snapshot, so saving stays cheap as history grows
+"""
+
+import json
+import os
+import threading
+
+JOURNAL_SUFFIX = ".journal"
+
+
+def checkpoint_delta(old, new):
+    """Record turning checkpoint ``old`` into ``new``; None if nothing changed.
+
+    Lists that only grew are stored as the appended items, everything else
+    that changed as its new value.
+    """
+    record = {}
+    for key, value in new.items():
+        if key in old and old[key] == value:
+            continue
+        previous = old.get(key)
+        if isinstance(value, list) and isinstance(previous, list) and value[:len(previous)] == previous:
+            record.setdefault("append", {})[key] = value[len(previous):]
+        else:
+            record.setdefault("set", {})[key] = value
+    removed = [key for key in old if key not in new]
+    if removed:
+        record["unset"] = removed
+    return record or None
+
+
+def apply_delta(state, record):
+    for key, value in record.get("set", {}).items():
+        state[key] = value
+    for key, items in record.get("append", {}).items():
+        state[key] = list(state.get(key, [])) + items
+    for key in record.get("unset", []):
+        state.pop(key, None)
+
+
+def read_checkpoint(snapshot_file):
+    """Snapshot plus the journal records written after it, or None if neither exists.
+
+    Also returns how many journal records were replayed.
+    """
+    state, replayed, _, _ = _replay(snapshot_file)
+    return state, replayed
+
+
+def write_checkpoint(snapshot_file, state):
+    """Replace the snapshot with ``state`` outright, as a save without the journal does.
+
+    The snapshot takes the journal's last seq and the journal is then emptied,
+    so records written by an earlier journal-mode run are not replayed on top
+    of it, even if we crash in between.
+    """
+    _, _, seq, _ = _replay(snapshot_file)
+    snapshot = dict(state, journal_seq=seq)
+    tmp_file = snapshot_file + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(snapshot, f, indent=2)
+    os.replace(tmp_file, snapshot_file)
+    if os.path.exists(snapshot_file + JOURNAL_SUFFIX):
+        open(snapshot_file + JOURNAL_SUFFIX, 'w').close()
+
+
+def _replay(snapshot_file):
+    try:
+        with open(snapshot_file, 'r') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = None
+    snapshot_seq = state.pop("journal_seq", 0) if state else 0
+
+    replayed = 0
+    seq = snapshot_seq
+    torn = False
+    try:
+        with open(snapshot_file + JOURNAL_SUFFIX, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    torn = True  # write cut short at the end of the journal
+                    break
+                # Records already folded into the snapshot survive a crash
+                # between the snapshot rename and the journal truncation
+                if record["seq"] <= snapshot_seq:
+                    continue
+                if state is None:
+                    state = {}
+                apply_delta(state, record)
+                replayed += 1
+                seq = record["seq"]
+    except FileNotFoundError:
+        pass
+    return state, replayed, seq, torn
+
+
+class CheckpointJournal:
+    """Saves checkpoints as deltas appended to ``<snapshot>.journal``.
+
+    ``save`` only records the latest state. A background timer writes one
+    delta for everything saved in the last ``debounce`` seconds. After
+    ``compact_every`` records the full state is written to a temporary file
+    and renamed over the snapshot, and the journal starts over, so loading
+    never replays more than ``compact_every`` records.
+    """
+
+    def __init__(self, snapshot_file, debounce=0.5, compact_every=100):
+        self.snapshot_file = snapshot_file
+        self.journal_file = snapshot_file + JOURNAL_SUFFIX
+        self.debounce = debounce
+        self.compact_every = compact_every
+        self.lock = threading.Lock()
+        self.timer = None
+
+        state, replayed, seq, torn = _replay(snapshot_file)
+        self.persisted = state or {}
+        self.pending = None
+        self.records = replayed
+        self.seq = seq
+        if torn:
+            # New records must not be appended to the partial line
+            self._compact()
+
+    def load(self):
+        with self.lock:
+            state = self.pending if self.pending is not None else self.persisted
+            return json.loads(json.dumps(state)) if state else None
+
+    def save(self, checkpoint):
+        with self.lock:
+            self.pending = json.loads(json.dumps(checkpoint))
+            if self.timer is None:
+                self.timer = threading.Timer(self.debounce, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        """Write what has been saved since the last flush."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.pending is None:
+                return
+            record = checkpoint_delta(self.persisted, self.pending)
+            if record is not None:
+                self.seq += 1
+                record["seq"] = self.seq
+                with open(self.journal_file, 'a') as f:
+                    f.write(json.dumps(record) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.records += 1
+            self.persisted, self.pending = self.pending, None
+            if self.records >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        self.flush()
+        with self.lock:
+            self._compact()
+
+    def _compact(self):
+        snapshot = dict(self.persisted, journal_seq=self.seq)
+        tmp_file = self.snapshot_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(snapshot, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+        open(self.journal_file, 'w').close()
+        self.records = 0
@@ -4,15 +4,26 @@ Nova Memory Auto-Save System
 Prevents context loss when hitting chat limits
 """
 
-import json
+import atexit
 from datetime import datetime
 
+from checkpoint_journal import CheckpointJournal, read_checkpoint, write_checkpoint
+
 class NovaMemoryManager:
-    """Manages contextual permanence across chat sessions"""
+    """Manages contextual permanence across chat sessions
+    
+    With ``journal=True`` checkpoints are appended as deltas to
+    nova_checkpoint.json.journal instead of rewriting the whole file, and
+    folded back into nova_checkpoint.json every ``compact_every`` records.
+    """
     
-    def __init__(self):
+    def __init__(self, journal=False, debounce=0.5, compact_every=100):
         self.checkpoint_file = "nova_checkpoint.json"
         self.active_context = "nova_active_context.md"
+        self.journal = None
+        if journal:
+            self.journal = CheckpointJournal(self.checkpoint_file, debounce, compact_every)
+            atexit.register(self.journal.flush)
         
     def save_checkpoint(self, context):
         """Save current state for seamless continuation"""
@@ -30,16 +41,24 @@ class NovaMemoryManager:
             }
         }
         
-        with open(self.checkpoint_file, 'w') as f:
-            json.dump(checkpoint, f, indent=2)
+        if self.journal:
+            # Coalesced and written in the background
+            self.journal.save(checkpoint)
+            return
+        # Also retires the journal of an earlier journal-mode run
+        write_checkpoint(self.checkpoint_file, checkpoint)
             
     def load_checkpoint(self):
         """Load previous session state"""
-        try:
-            with open(self.checkpoint_file, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return None
+        if self.journal:
+            return self.journal.load()
+        state, _ = read_checkpoint(self.checkpoint_file)
+        return state
+            
+    def flush(self):
+        """Write pending checkpoints now (journal mode)"""
+        if self.journal:
+            self.journal.flush()
             
     def update_active_context(self, updates):
         """Quick update to active context"""
@@ -48,6 +67,6 @@ class NovaMemoryManager:
         pass
 
 # Usage in Nova:
-# memory = NovaMemoryManager()
+# memory = NovaMemoryManager()  # or NovaMemoryManager(journal=True)
 # memory.save_checkpoint(current_context)
 # When returning: previous = memory.load_checkpoint()
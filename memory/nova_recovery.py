@@ -27,17 +27,16 @@ This solves the context window problem!
 """)
 
 # Quick status check
-import os
-import json
+from checkpoint_journal import read_checkpoint
 
-if os.path.exists('nova_checkpoint.json'):
-    with open('nova_checkpoint.json', 'r') as f:
-        checkpoint = json.load(f)
-    
+checkpoint, replayed = read_checkpoint('nova_checkpoint.json')
+if checkpoint:
     print("\n📊 Last Checkpoint:")
     print(f"Time: {checkpoint['timestamp']}")
     print(f"Task: {checkpoint['current_task']}")
     print(f"\nCompleted: {len(checkpoint['completed'])} items")
     print(f"Next Steps: {len(checkpoint['next_steps'])} items")
+    if replayed:
+        print(f"Journal: {replayed} saves since the last snapshot")
 else:
     print("\n⚠️  No checkpoint found - start fresh")
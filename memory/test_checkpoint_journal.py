@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Tests for checkpoint_journal.py and the checkpoint saves of nova_memory_manager.py"""
+
+import os
+import tempfile
+import unittest
+
+from checkpoint_journal import JOURNAL_SUFFIX, read_checkpoint
+from nova_memory_manager import NovaMemoryManager
+
+
+class PlainSaveAfterJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)  # the manager writes to the working directory
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_plain_save_is_not_overridden_by_old_journal(self):
+        journaled = NovaMemoryManager(journal=True, debounce=60)
+        journaled.save_checkpoint({"current_task": "old task", "completed": ["a"]})
+        journaled.flush()
+        journaled.save_checkpoint({"current_task": "older task", "completed": ["a", "b"]})
+        journaled.flush()
+        self.assertTrue(os.path.getsize("nova_checkpoint.json" + JOURNAL_SUFFIX))
+
+        NovaMemoryManager().save_checkpoint({"current_task": "new task", "completed": []})
+
+        state, replayed = read_checkpoint("nova_checkpoint.json")
+        self.assertEqual(replayed, 0)
+        self.assertEqual(state["current_task"], "new task")
+        self.assertEqual(state["completed"], [])
+        self.assertNotIn("journal_seq", state)
+        self.assertEqual(NovaMemoryManager().load_checkpoint()["current_task"], "new task")
+
+    def test_journal_continues_after_plain_save(self):
+        journaled = NovaMemoryManager(journal=True, debounce=60)
+        journaled.save_checkpoint({"current_task": "first"})
+        journaled.flush()
+        NovaMemoryManager().save_checkpoint({"current_task": "second"})
+
+        resumed = NovaMemoryManager(journal=True, debounce=60)
+        self.assertEqual(resumed.load_checkpoint()["current_task"], "second")
+        resumed.save_checkpoint({"current_task": "third"})
+        resumed.flush()
+
+        state, replayed = read_checkpoint("nova_checkpoint.json")
+        self.assertEqual(replayed, 1)
+        self.assertEqual(state["current_task"], "third")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,222 @@
+"""Content-addressed cache for synthesized audio.
+
+The same text spoken with the same voice, model and VoiceSettings always
+produces interchangeable audio, so it only needs to be synthesized once.
+Entries are keyed on a SHA-256 of those inputs (``audio_key``) and kept in
+two tiers:
+
+- memory: an LRU of recently synthesized clips, bounded by ``max_memory_bytes``
+- disk: one file per clip under ``directory/<key[:2]>/<key>.mp3``, bounded by
+  ``max_disk_bytes``, least recently used evicted first. Files are written
+  to a temporary name and renamed into place. Reads are served from a
+  memory-mapped view of the file, so a hit costs no copy and no syscalls
+  once the pages are cached. Mapping a file does block, so the event loop
+  first asks with ``disk=False`` and leaves the rest to a worker thread.
+
+Several processes can share the directory: a clip another one wrote is
+picked up on the first miss for it. Each process enforces ``max_disk_bytes``
+on the files it knows of.
+
+The disk tier survives restarts, which lets the stock phrases (timeouts,
+error messages, canned monitor replies) be synthesized once and then played
+instantly. See ``TTSEngine.prewarm``.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+AudioBuffer = Union[bytes, memoryview]
+
+
+def _settings_dict(voice_settings) -> dict:
+    if voice_settings is None:
+        return {}
+    for method in ("model_dump", "dict"):
+        dump = getattr(voice_settings, method, None)
+        if callable(dump):
+            return dump()
+    if isinstance(voice_settings, dict):
+        return voice_settings
+    return vars(voice_settings)
+
+
+def audio_key(text: str, voice_id: str, model_id: str, voice_settings=None, **extra) -> str:
+    """Stable key for the audio of ``text`` with the given synthesis parameters."""
+    material = {
+        "text": text,
+        "voice_id": voice_id,
+        "model_id": model_id,
+        "voice_settings": _settings_dict(voice_settings),
+        "extra": extra
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    def __init__(self, directory="audio_cache", max_memory_bytes: int = 16 * 1024 * 1024,
+                 max_disk_bytes: int = 256 * 1024 * 1024, max_mapped: int = 64):
+        self.directory = Path(directory) if directory else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_mapped = max_mapped
+        self.lock = threading.Lock()
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_size = 0
+        self.disk: "OrderedDict[str, int]" = OrderedDict()  # key -> size, least recent first
+        self.disk_size = 0
+        self.mapped: "OrderedDict[str, mmap.mmap]" = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._load_index()
+
+    def _load_index(self):
+        entries = []
+        for path in self.directory.glob("*/*.mp3"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, path.stem, st.st_size))
+        for _, key, size in sorted(entries):
+            self.disk[key] = size
+            self.disk_size += size
+        if entries:
+            logger.info(f"Audio cache: {len(entries)} clips ({self.disk_size // 1024} KB) on disk")
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.mp3"
+
+    def get(self, key: str, disk: bool = True) -> Optional[AudioBuffer]:
+        """The clip for ``key``, if cached. With ``disk`` false only clips in
+        memory or already mapped are returned, without touching the disk, so
+        it can be called from the event loop; the full lookup blocks."""
+        with self.lock:
+            audio = self.memory.get(key)
+            if audio is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+            mapped = self.mapped.get(key)
+            if mapped is not None:
+                self.mapped.move_to_end(key)
+                self.disk.move_to_end(key)
+                self.disk_hits += 1
+                return memoryview(mapped)
+            if not self.directory:
+                self.misses += 1
+                return None
+            if not disk:
+                return None
+
+        # Outside the lock: other lookups don't wait for the disk. The file may
+        # not be in self.disk yet if another process sharing the directory
+        # (WORKERS > 1) wrote it
+        opened = self._open(key)
+        with self.lock:
+            if opened is None:
+                self.disk_size -= self.disk.pop(key, 0)  # removed behind our back
+                self.misses += 1
+                return None
+            mapped, size = opened
+            if key in self.mapped:
+                # Mapped by a concurrent lookup meanwhile
+                mapped.close()
+                mapped = self.mapped[key]
+            else:
+                self.mapped[key] = mapped
+                if key not in self.disk:
+                    self.disk[key] = size
+                    self.disk_size += size
+            self.mapped.move_to_end(key)
+            self.disk.move_to_end(key)
+            while len(self.mapped) > self.max_mapped:
+                self._unmap(next(iter(self.mapped)))
+            self.disk_hits += 1
+            return memoryview(mapped)
+
+    def _open(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(path)  # recency survives restarts
+        except (OSError, ValueError):
+            # Not there, or empty
+            return None
+        return mapped, size
+
+    def _unmap(self, key: str):
+        mapped = self.mapped.pop(key, None)
+        if mapped is not None:
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # still being sent; unmapped once the last view is released
+
+    def put(self, key: str, audio: bytes):
+        if not audio:
+            return
+        with self.lock:
+            if len(audio) <= self.max_memory_bytes:
+                if key in self.memory:
+                    self.memory_size -= len(self.memory.pop(key))
+                self.memory[key] = audio
+                self.memory_size += len(audio)
+                while self.memory_size > self.max_memory_bytes:
+                    _, evicted = self.memory.popitem(last=False)
+                    self.memory_size -= len(evicted)
+
+            if self.directory and key not in self.disk and len(audio) <= self.max_disk_bytes:
+                try:
+                    self._write(key, audio)
+                except OSError as e:
+                    logger.warning(f"Could not write audio cache entry {key[:12]}: {e}")
+                    return
+                self.disk[key] = len(audio)
+                self.disk_size += len(audio)
+                while self.disk_size > self.max_disk_bytes:
+                    self._evict_disk(next(iter(self.disk)))
+
+    def _write(self, key: str, audio: bytes):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.parent / f".{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+    def _evict_disk(self, key: str):
+        self.disk_size -= self.disk.pop(key)
+        self._unmap(key)
+        self._path(key).unlink(missing_ok=True)
+
+    def __contains__(self, key: str) -> bool:
+        with self.lock:
+            return key in self.memory or key in self.disk
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "memory_entries": len(self.memory),
+                "memory_bytes": self.memory_size,
+                "disk_entries": len(self.disk),
+                "disk_bytes": self.disk_size,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses
+            }
@@ -0,0 +1,45 @@
+"""Binary WebSocket framing for audio.
+
+Once a client negotiates binary audio (a ``hello`` control message with
+``"binary": true``), audio travels as binary WebSocket messages instead of
+base64 inside JSON. Every frame starts with a 5-byte header:
+
+    type  uint8   FRAME_PCM or FRAME_OPUS (uplink), FRAME_MP3 (downlink)
+    seq   uint32  per-direction sequence number, big-endian
+
+followed by the raw payload. JSON text messages remain in use for control,
+transcripts and responses.
+"""
+
+import struct
+from typing import Iterator, Tuple, Union
+
+FRAME_HEADER = struct.Struct("!BI")
+
+FRAME_PCM = 0x01  # 16-bit little-endian linear PCM from the microphone
+FRAME_MP3 = 0x02  # MP3 audio synthesized for playback
+FRAME_OPUS = 0x03  # Opus in a WebM or Ogg stream from MediaRecorder (uplink)
+
+SEQ_MODULUS = 1 << 32
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def encode_frame(frame_type: int, seq: int, payload: BytesLike) -> bytes:
+    """Build a frame. The payload is copied once, into the outgoing message."""
+    return b''.join((FRAME_HEADER.pack(frame_type, seq % SEQ_MODULUS), payload))
+
+
+def decode_frame(data: BytesLike) -> Tuple[int, int, memoryview]:
+    """Split a frame into (type, seq, payload) without copying the payload."""
+    if len(data) < FRAME_HEADER.size:
+        raise ValueError(f"Audio frame too short: {len(data)} bytes")
+    frame_type, seq = FRAME_HEADER.unpack_from(data)
+    return frame_type, seq, memoryview(data)[FRAME_HEADER.size:]
+
+
+def iter_slices(data: BytesLike, size: int) -> Iterator[memoryview]:
+    """Yield zero-copy views of consecutive ``size``-byte slices of ``data``."""
+    view = memoryview(data)
+    for i in range(0, len(view), size):
+        yield view[i:i + size]
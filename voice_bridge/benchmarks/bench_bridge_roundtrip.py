@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Measure MCP bridge round-trip latency and throughput.
+
+Runs MCPBridgeHandler against the loopback FakeMonitor (a NovaMCPMonitor in
+a background thread) in a temporary directory. "poll" reproduces the original
+behaviour (handler polls every 100 ms, monitor every 500 ms); "watch" uses
+FileWatcher on both sides; "spool" and "socket" use the spool-directory and
+Unix-socket transports, also with --sessions concurrent handlers, which the
+single-file modes cannot support. --delay simulates a slow MCP tool call
+and --workers sets the monitor's worker pool size.
+
+Usage (from voice_bridge/):
+    python benchmarks/bench_bridge_roundtrip.py [--requests 50] [--sessions 8]
+        [--delay 0.1] [--workers 4] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fakes import FakeMonitor  # noqa: E402
+from bridge_transport import UnixSocketTransport  # noqa: E402
+from mcp_bridge_handler import MCPBridgeHandler, create_transport  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def round_trips(handler: MCPBridgeHandler, requests: int, latencies: list):
+    for i in range(requests):
+        start = time.perf_counter()
+        reply = await handler.send_to_claude(f"benchmark request {i}")
+        if reply != f"Echo: benchmark request {i}":
+            raise RuntimeError(f"Unexpected reply: {reply}")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_sessions(make_handler, sessions: int, requests: int, shared_transport=None):
+    handlers = [make_handler() for _ in range(sessions)]
+    latencies = []
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(round_trips(h, requests // sessions, latencies) for h in handlers))
+    finally:
+        for handler in handlers:
+            handler.close()
+        if shared_transport is not None:
+            await shared_transport.aclose()
+    return latencies, time.perf_counter() - start
+
+
+def run_mode(mode: str, requests: int, sessions: int = 1, delay: float = 0.0, workers: int = 4):
+    use_watcher = mode != "poll"
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {
+            "input_file": Path(tmp) / "nova_input.txt",
+            "output_file": Path(tmp) / "nova_output.txt",
+        }
+        spool_dir = Path(tmp) / "spool" if mode == "spool" else None
+        socket_path = Path(tmp) / "nova.sock" if mode == "socket" else None
+        monitor = FakeMonitor(**paths, use_watcher=use_watcher, spool_dir=spool_dir, socket_path=socket_path,
+                              delay=delay, workers=workers)
+
+        socket_transport = None
+        if mode == "socket":
+            socket_transport = UnixSocketTransport(socket_path)
+            make_handler = lambda: MCPBridgeHandler(transport=socket_transport)  # noqa: E731
+            backend = "unix"
+        else:
+            transport_mode = "spool" if spool_dir else "file"
+            make_handler = lambda: MCPBridgeHandler(transport=create_transport(  # noqa: E731
+                transport_mode, spool_dir=spool_dir, use_watcher=use_watcher, **paths
+            ))
+            backend = "poll"
+            if use_watcher:
+                probe = create_transport(transport_mode, spool_dir=spool_dir, **paths)
+                backend = probe.watcher.backend
+                probe.close()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            monitor.start()
+            try:
+                latencies, elapsed = asyncio.run(run_sessions(make_handler, sessions, requests, socket_transport))
+            finally:
+                monitor.stop()
+
+    return {
+        "mode": mode,
+        "backend": backend,
+        "sessions": sessions,
+        "workers": workers,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "max_ms": max(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent handlers in spool mode")
+    parser.add_argument("--delay", type=float, default=0.0, help="simulated tool latency per request (s)")
+    parser.add_argument("--workers", type=int, default=4, help="monitor worker threads")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    options = {"delay": args.delay, "workers": args.workers}
+    results = [
+        run_mode("poll", args.requests, **options),
+        run_mode("watch", args.requests, **options),
+        run_mode("spool", args.requests, 1, **options),
+        run_mode("spool", args.requests * args.sessions, args.sessions, **options),
+        run_mode("socket", args.requests, 1, **options),
+        run_mode("socket", args.requests * args.sessions, args.sessions, **options),
+    ]
+
+    print(f"{'mode':<6} {'backend':<8} {'sessions':>8} {'req/s':>8} {'mean (ms)':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9}")
+    for r in results:
+        print(f"{r['mode']:<6} {r['backend']:<8} {r['sessions']:>8} {r['throughput_rps']:>8.1f} "
+              f"{r['mean_ms']:>10.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['max_ms']:>9.1f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Microbenchmarks of the voice bridge's components, without network.
+
+Each case times one component in isolation:
+
+- ``bridge_file``, ``bridge_spool``, ``bridge_socket``: MCPBridgeHandler
+  round trips against the loopback FakeMonitor, one per transport
+- ``context_add``, ``context_add_budget``: ContextManager.add_message, with
+  the default message cap and with a token budget (folding into a summary)
+- ``context_get``, ``context_get_snippets``: get_context after each change,
+  as every turn does, without and with memory snippets
+- ``frame_encode``, ``frame_decode``: binary audio frames of one 4096-sample
+  PCM block, as websocket_endpoint receives them, and ``json_encode``,
+  ``json_decode`` for the base64 JSON messages they replace
+- ``stream_audio_binary``, ``stream_audio_json``: VoiceBridgeSession.stream_audio
+  splitting a 64 KB MP3 reply into websocket messages (to a websocket that
+  only serializes them)
+- ``log_chunk_sync``, ``log_chunk_background``, ``log_chunk_sampled``,
+  ``log_chunk_disabled``: the cost to the event loop of the debug line logged
+  for every audio chunk: an f-string written synchronously (as with
+  ``logging.basicConfig``), queued to the background thread, sampled once a
+  second with SampledLog, and with debug logging off (see log_setup.py).
+  Output goes to /dev/null.
+
+Every case reports ``ops_per_s`` (the best of ``--repeat`` runs) plus its own
+figures. Results are written with the commit, Python version and platform,
+and ``--compare`` prints the change in ``ops_per_s`` against an earlier
+result file, so commits can be compared on the same machine.
+
+Usage (from voice_bridge/):
+    python benchmarks/bench_components.py [--only frame] [--repeat 5]
+        [--json after.json] [--compare before.json]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# voice_bridge.py checks for API keys on import; none of them is used here
+os.environ.setdefault("DEEPGRAM_API_KEY", "benchmark")
+os.environ.setdefault("ELEVENLABS_API_KEY", "benchmark")
+
+from audio_framing import FRAME_PCM, decode_frame, encode_frame  # noqa: E402
+from benchmarks.bench_bridge_roundtrip import run_mode  # noqa: E402
+from benchmarks.fakes import make_text  # noqa: E402
+from context_manager import ContextManager  # noqa: E402
+from log_setup import SampledLog, configure_logging  # noqa: E402
+
+PCM_BLOCK = os.urandom(4096 * 2)
+MP3_REPLY = os.urandom(64 * 1024)
+SNIPPETS = [{"source": f"../memory/notes_{i}.md", "text": make_text(40)} for i in range(3)]
+
+
+def timed(fn, number: int, repeat: int) -> dict:
+    """Call ``fn`` ``number`` times per run; the best run gives ops_per_s."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - start) / number)
+    return {
+        "ops_per_s": 1 / min(runs),
+        "best_us": min(runs) * 1e6,
+        "median_us": statistics.median(runs) * 1e6,
+    }
+
+
+def bridge_case(mode: str):
+    def case(repeat: int) -> dict:
+        result = run_mode(mode, 200)
+        return {
+            "ops_per_s": result["throughput_rps"],
+            "p50_ms": result["p50_ms"],
+            "p95_ms": result["p95_ms"],
+            "backend": result["backend"],
+        }
+    return case
+
+
+def context_add(repeat: int, token_budget=None) -> dict:
+    context = ContextManager(token_budget=token_budget)
+    messages = [make_text(30 + i % 50) for i in range(64)]
+    turn = iter(range(1 << 62))
+
+    def add():
+        i = next(turn)
+        context.add_message("user" if i % 2 else "assistant", messages[i % 64])
+
+    return timed(add, 20000, repeat)
+
+
+def context_get(repeat: int, snippets=None) -> dict:
+    context = ContextManager()
+    messages = [make_text(30 + i % 50) for i in range(64)]
+    for i in range(20):
+        context.add_message("user", messages[i])
+    turn = iter(range(1 << 62))
+
+    def add_and_get():
+        i = next(turn)
+        context.add_message("user" if i % 2 else "assistant", messages[i % 64])
+        context.get_context(snippets)
+
+    return timed(add_and_get, 20000, repeat)
+
+
+def frame_case(encode: bool, binary: bool):
+    frame = encode_frame(FRAME_PCM, 1, PCM_BLOCK)
+    message = json.dumps({"type": "audio", "data": base64.b64encode(PCM_BLOCK).decode()})
+
+    if binary:
+        fn = (lambda: encode_frame(FRAME_PCM, 1, PCM_BLOCK)) if encode else (lambda: decode_frame(frame))
+    elif encode:
+        def fn():
+            json.dumps({"type": "audio", "data": base64.b64encode(PCM_BLOCK).decode()})
+    else:
+        def fn():
+            base64.b64decode(json.loads(message)["data"])
+
+    def case(repeat: int) -> dict:
+        result = timed(fn, 20000, repeat)
+        result["mb_per_s"] = result["ops_per_s"] * len(PCM_BLOCK) / 1e6
+        return result
+    return case
+
+
+class SerializingWebSocket:
+    """Does what Starlette does to a message before it is sent, then drops it."""
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+
+    async def send_bytes(self, data: bytes):
+        self.messages += 1
+        self.bytes += len(data)
+
+    async def send_json(self, data):
+        text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        self.messages += 1
+        self.bytes += len(text.encode("utf-8"))
+
+
+def stream_audio_case(binary: bool):
+    def case(repeat: int) -> dict:
+        from voice_bridge import VoiceBridgeSession
+
+        # stream_audio only needs the websocket and the downlink state
+        session = VoiceBridgeSession.__new__(VoiceBridgeSession)
+        session.websocket = SerializingWebSocket()
+        session.binary_audio = binary
+        session.downlink_seq = 0
+
+        async def stream():
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for _ in range(200):
+                    await session.stream_audio(MP3_REPLY)
+                runs.append((time.perf_counter() - start) / 200)
+            return runs
+
+        runs = asyncio.run(stream())
+        messages = session.websocket.messages / (200 * repeat)
+        return {
+            "ops_per_s": 1 / min(runs),
+            "best_us": min(runs) * 1e6,
+            "median_us": statistics.median(runs) * 1e6,
+            "mb_per_s": len(MP3_REPLY) / min(runs) / 1e6,
+            "messages": messages,
+            "wire_bytes": session.websocket.bytes / (200 * repeat),
+        }
+    return case
+
+
+def log_case(mode: str):
+    def case(repeat: int) -> dict:
+        root = logging.getLogger()
+        saved = root.handlers[:], root.level
+        root.handlers = []
+        logging.disable(logging.NOTSET)
+        with open(os.devnull, "w") as devnull:
+            if mode == "sync":
+                root.setLevel(logging.DEBUG)
+                handler = logging.StreamHandler(devnull)
+                handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+                root.addHandler(handler)
+                listener = None
+            else:
+                listener = configure_logging("INFO" if mode == "disabled" else "DEBUG", stream=devnull)
+            logger = logging.getLogger("voice_bridge")
+            audio_log = SampledLog(logger, 1.0 if mode in ("sampled", "disabled") else 0)
+            chunk = PCM_BLOCK
+
+            if mode == "sync":
+                def fn():
+                    logger.debug(f"Received audio chunk from client: {len(chunk)} bytes")
+            else:
+                def fn():
+                    audio_log.log("Received audio chunk from client: %d bytes", len(chunk))
+
+            try:
+                return timed(fn, 20000, repeat)
+            finally:
+                if listener:
+                    listener.stop()
+                root.handlers, level = saved
+                root.setLevel(level)
+                logging.disable(logging.WARNING)
+    return case
+
+
+CASES = {
+    "bridge_file": bridge_case("watch"),
+    "bridge_spool": bridge_case("spool"),
+    "bridge_socket": bridge_case("socket"),
+    "context_add": context_add,
+    "context_add_budget": lambda repeat: context_add(repeat, token_budget=1500),
+    "context_get": context_get,
+    "context_get_snippets": lambda repeat: context_get(repeat, SNIPPETS),
+    "frame_encode": frame_case(encode=True, binary=True),
+    "frame_decode": frame_case(encode=False, binary=True),
+    "json_encode": frame_case(encode=True, binary=False),
+    "json_decode": frame_case(encode=False, binary=False),
+    "stream_audio_binary": stream_audio_case(binary=True),
+    "stream_audio_json": stream_audio_case(binary=False),
+    "log_chunk_sync": log_case("sync"),
+    "log_chunk_background": log_case("background"),
+    "log_chunk_sampled": log_case("sampled"),
+    "log_chunk_disabled": log_case("disabled"),
+}
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", action="append", help="run the cases whose name contains this (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case; the best one counts")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="an earlier --json file to compare ops_per_s against")
+    args = parser.parse_args()
+
+    # Measure the components, not their log output
+    logging.disable(logging.WARNING)
+    names = [name for name in CASES if not args.only or any(part in name for part in args.only)]
+    baseline = json.loads(Path(args.compare).read_text())["cases"] if args.compare else {}
+
+    results = {}
+    print(f"{'case':<22} {'ops/s':>12} {'change':>8}")
+    for name in names:
+        results[name] = CASES[name](args.repeat)
+        ops = results[name]["ops_per_s"]
+        change = ""
+        if name in baseline:
+            change = f"{(ops / baseline[name]['ops_per_s'] - 1) * 100:+.1f}%"
+        print(f"{name:<22} {ops:>12,.1f} {change:>8}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"environment": environment(), "cases": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
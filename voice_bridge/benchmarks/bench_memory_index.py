@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Benchmark MemoryIndex on a synthetic corpus.
+
+Builds an index of ``--docs`` chunks of ``--words`` words each, drawn from a
+Zipf-distributed vocabulary of ``--vocabulary`` words (so a few terms are in
+most chunks and most terms in few, as in real text). Then reports:
+
+- the build time and database size,
+- top-k search latency for ``--queries`` queries of 4-8 words, each sampled
+  from a random chunk and mixed with stopwords like a spoken request,
+- the cost of incremental updates: adding a turn and replacing a file of
+  20 chunks in an index of that size.
+
+Usage (from voice_bridge/):
+    python benchmarks/bench_memory_index.py [--docs 100000] [--k 3] [--json out.json]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from memory_index import MemoryIndex  # noqa: E402
+
+FILLER = "what did we decide about the please tell me again is there".split()
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def corpus(docs: int, words: int, vocabulary: int, rng: random.Random):
+    terms = [f"w{i}" for i in range(vocabulary)]
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary)))
+    for _ in range(docs):
+        yield " ".join(rng.choices(terms, cum_weights=cumulative, k=words))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = list(corpus(args.docs, args.words, args.vocabulary, rng))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "index.db")
+        index = MemoryIndex(db_path)
+        start = time.perf_counter()
+        batch = 1000
+        for i in range(0, len(texts), batch):
+            index.add(f"doc:{i // batch}", texts[i:i + batch])
+        build_s = time.perf_counter() - start
+        index.close()
+
+        # Reopened, as the bridge does at startup
+        start = time.perf_counter()
+        index = MemoryIndex(db_path)
+        open_ms = (time.perf_counter() - start) * 1000
+
+        latencies = []
+        for _ in range(args.queries):
+            words = rng.choice(texts).split()
+            query = rng.sample(words, rng.randint(2, 5)) + rng.sample(FILLER, 3)
+            rng.shuffle(query)
+            start = time.perf_counter()
+            hits = index.search(" ".join(query), args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert hits
+
+        start = time.perf_counter()
+        for i in range(100):
+            index.add(f"turn:bench:{i}", [" ".join(rng.sample(texts[i].split(), 20))])
+        add_turn_ms = (time.perf_counter() - start) * 1000 / 100
+
+        index.add("file:bench", texts[:20])
+        start = time.perf_counter()
+        for i in range(1, 11):
+            index.add("file:bench", texts[i * 20:(i + 1) * 20])
+        replace_file_ms = (time.perf_counter() - start) * 1000 / 10
+
+        results = {
+            "docs": args.docs,
+            "build_s": round(build_s, 1),
+            "db_mb": round(sum(f.stat().st_size for f in Path(tmp).iterdir()) / 1e6, 1),
+            "open_ms": round(open_ms, 1),
+            "k": args.k,
+            "search_p50_ms": round(percentile(latencies, 50), 2),
+            "search_p95_ms": round(percentile(latencies, 95), 2),
+            "search_p99_ms": round(percentile(latencies, 99), 2),
+            "add_turn_ms": round(add_turn_ms, 2),
+            "replace_file_ms": round(replace_file_ms, 2),
+        }
+        index.close()
+
+    for key, value in results.items():
+        print(f"{key:<16} {value}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
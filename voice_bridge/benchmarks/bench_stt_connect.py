@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark connect-to-first-transcript with and without the STT pool.
+
+Starts FakeSTTServer (a local stand-in for Deepgram's live endpoint with a
+simulated handshake latency) and opens ``--sessions`` sessions one after
+another through STTConnectionPool, using the Deepgram SDK exactly as the
+voice bridge does. Each session sends 100 ms of audio as soon as it has a
+connection and waits for the transcript. With ``--pool-size 0`` every
+session opens its own connection, as before the pool existed.
+
+Usage (from voice_bridge/):
+    python benchmarks/bench_stt_connect.py [--sessions 20] [--latency 0.3] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from deepgram import DeepgramClient, DeepgramClientOptions, LiveOptions, LiveTranscriptionEvents  # noqa: E402
+
+from benchmarks.fakes import FakeSTTServer  # noqa: E402
+from stt_pool import STTConnectionPool, deepgram_connector  # noqa: E402
+
+AUDIO = bytes(3200)  # 100 ms of 16 kHz 16-bit mono
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+async def session(pool: STTConnectionPool):
+    start = time.perf_counter()
+    transcript = asyncio.get_running_loop().create_future()
+
+    async def on_transcript(result, **kwargs):
+        if not transcript.done():
+            transcript.set_result(result.channel.alternatives[0].transcript)
+
+    pooled = await pool.acquire()
+    pooled.attach({LiveTranscriptionEvents.Transcript: on_transcript})
+    connected = time.perf_counter() - start
+    await pooled.connection.send(AUDIO)
+    await asyncio.wait_for(transcript, 10)
+    first_transcript = time.perf_counter() - start
+    await pooled.close()
+    return connected, first_transcript
+
+
+async def run(pool_size: int, sessions: int, interval: float, latency: float):
+    server = await FakeSTTServer(connect_latency=latency, final_after_bytes=len(AUDIO)).start()
+    client = DeepgramClient("fake-key", DeepgramClientOptions(url=server.url))
+    options = LiveOptions(model="nova-2", encoding="linear16", channels=1, sample_rate=16000)
+    pool = STTConnectionPool(deepgram_connector(client, options), size=pool_size)
+    pool.start()
+    if pool_size:
+        await pool.fill_task  # the server has been up for a while
+
+    samples = []
+    for _ in range(sessions):
+        samples.append(await session(pool))
+        await asyncio.sleep(interval)
+
+    stats = pool.stats()
+    await pool.close()
+    await server.stop()
+    connect = [s[0] * 1000 for s in samples]
+    first = [s[1] * 1000 for s in samples]
+    return {
+        "pool_size": pool_size,
+        "sessions": sessions,
+        "handshake_latency_ms": latency * 1000,
+        "connect_p50_ms": statistics.median(connect),
+        "connect_p95_ms": percentile(connect, 95),
+        "first_transcript_p50_ms": statistics.median(first),
+        "first_transcript_p95_ms": percentile(first, 95),
+        "prewarmed_hits": stats["prewarmed_hits"],
+        "cold_starts": stats["cold_starts"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between sessions")
+    parser.add_argument("--latency", type=float, default=0.3, help="simulated handshake latency")
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = [asyncio.run(run(size, args.sessions, args.interval, args.latency))
+               for size in (0, args.pool_size)]
+
+    print(f"{'pool':>5} {'connect p50/p95 (ms)':>21} {'first transcript p50/p95 (ms)':>30} {'prewarmed':>10}")
+    for r in results:
+        print(f"{r['pool_size']:>5} {r['connect_p50_ms']:>10.1f} /{r['connect_p95_ms']:>8.1f} "
+              f"{r['first_transcript_p50_ms']:>19.1f} /{r['first_transcript_p95_ms']:>8.1f} "
+              f"{r['prewarmed_hits']:>10}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
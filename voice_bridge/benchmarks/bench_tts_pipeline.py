@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Benchmark single-shot TTS against the sentence-chunked parallel pipeline.
+
+Runs TTSEngine.stream (one synthesis request per response) and
+TTSEngine.stream_sentences against FakeElevenLabs for 50-500 word responses
+and reports time to first audio byte and time to the last byte.
+
+Usage (from voice_bridge/):
+    python benchmarks/bench_tts_pipeline.py [--workers 3] [--runs 3] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fakes import FakeElevenLabs, make_text  # noqa: E402
+from tts_engine import TTSEngine  # noqa: E402
+
+WORD_COUNTS = [50, 100, 200, 350, 500]
+
+
+async def measure(audio_chunks):
+    start = time.perf_counter()
+    first_byte = None
+    async for _ in audio_chunks:
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+    return first_byte, time.perf_counter() - start
+
+
+async def run(workers: int, runs: int):
+    engine = TTSEngine(FakeElevenLabs())
+    results = []
+    for words in WORD_COUNTS:
+        text = make_text(words)
+        for mode in ("single_shot", "sentence_pipeline"):
+            samples = []
+            for _ in range(runs):
+                if mode == "single_shot":
+                    samples.append(await measure(engine.stream(text)))
+                else:
+                    samples.append(await measure(engine.stream_sentences(text, workers)))
+            results.append({
+                "words": words,
+                "mode": mode,
+                "workers": workers if mode == "sentence_pipeline" else 1,
+                "first_byte_ms": statistics.median(s[0] for s in samples) * 1000,
+                "total_ms": statistics.median(s[1] for s in samples) * 1000,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.workers, args.runs))
+
+    print(f"{'words':>6} {'mode':<18} {'first byte (ms)':>16} {'total (ms)':>11}")
+    for r in results:
+        print(f"{r['words']:>6} {r['mode']:<18} {r['first_byte_ms']:>16.0f} {r['total_ms']:>11.0f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Compare the PCM and Opus microphone uplinks.
+
+Bandwidth: a 16 kHz mono WAV is framed the way static/app.js sends it,
+as 4096-sample PCM blocks (base64 JSON or binary frames) or as 100 ms
+MediaRecorder slices of a WebM/Opus recording. Bytes per second on the
+websocket are reported for each. The Opus recording is made with ffmpeg
+(``--bitrate``, like the client's OPUS_BITRATE) unless one recorded in the
+browser is passed with ``--webm``.
+
+Latency (``--live``): both recordings are streamed in real time to the
+Deepgram endpoint with the options the voice bridge uses (DEEPGRAM_API_KEY,
+and DEEPGRAM_URL if set). The time to the first transcript and the time
+from the end of the audio to the last final transcript are reported.
+
+Usage (from voice_bridge/):
+    python benchmarks/bench_uplink.py --wav speech.wav [--webm speech.webm] [--live] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from audio_framing import FRAME_OPUS, FRAME_PCM, encode_frame, iter_slices  # noqa: E402
+
+PCM_BLOCK_BYTES = 4096 * 2
+OPUS_SLICE_SECONDS = 0.1
+
+
+def read_pcm(path: str) -> bytes:
+    with wave.open(path, "rb") as wav:
+        if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) != (16000, 1, 2):
+            raise SystemExit("expected a 16 kHz mono 16-bit WAV")
+        return wav.readframes(wav.getnframes())
+
+
+def encode_opus(wav_path: str, bitrate: int) -> bytes:
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "uplink.webm")
+        subprocess.run(["ffmpeg", "-loglevel", "error", "-i", wav_path, "-c:a", "libopus",
+                        "-b:a", str(bitrate), "-application", "voip", "-f", "webm", out], check=True)
+        return Path(out).read_bytes()
+
+
+def pcm_messages(pcm: bytes, binary: bool):
+    for seq, block in enumerate(iter_slices(pcm, PCM_BLOCK_BYTES)):
+        if binary:
+            yield encode_frame(FRAME_PCM, seq, block)
+        else:
+            yield json.dumps({"type": "audio", "data": base64.b64encode(block).decode()}).encode()
+
+
+def opus_messages(webm: bytes, duration: float):
+    slices = max(1, round(duration / OPUS_SLICE_SECONDS))
+    size = -(-len(webm) // slices)
+    for seq, piece in enumerate(iter_slices(webm, size)):
+        yield encode_frame(FRAME_OPUS, seq, piece)
+
+
+def bandwidth(pcm: bytes, webm: bytes):
+    duration = len(pcm) / 32000
+    results = []
+    for uplink, messages in (("pcm_json", pcm_messages(pcm, binary=False)),
+                             ("pcm_binary", pcm_messages(pcm, binary=True)),
+                             ("opus_binary", opus_messages(webm, duration))):
+        messages = list(messages)
+        total = sum(len(m) for m in messages)
+        results.append({
+            "uplink": uplink,
+            "messages": len(messages),
+            "bytes": total,
+            "kbps": total * 8 / duration / 1000,
+        })
+    return results
+
+
+async def stream_live(uplink: str, payload: bytes, duration: float):
+    from deepgram import DeepgramClient, DeepgramClientOptions, LiveTranscriptionEvents
+    from stt_pool import STTConnectionPool, deepgram_connector, live_options
+
+    url = os.getenv("DEEPGRAM_URL")
+    client = DeepgramClient(os.getenv("DEEPGRAM_API_KEY"), DeepgramClientOptions(url=url) if url else None)
+
+    loop = asyncio.get_running_loop()
+    finals = []
+    first = []
+
+    async def on_transcript(result, **kwargs):
+        if not result.channel.alternatives[0].transcript:
+            return
+        now = loop.time()
+        if not first:
+            first.append(now)
+        if result.is_final:
+            finals.append(now)
+
+    pool = STTConnectionPool(deepgram_connector(client, live_options(uplink)), size=0)
+    pooled = await pool.acquire()
+    pooled.attach({LiveTranscriptionEvents.Transcript: on_transcript})
+
+    slices = max(1, round(duration / OPUS_SLICE_SECONDS))
+    size = -(-len(payload) // slices)
+    start = loop.time()
+    for i, piece in enumerate(iter_slices(payload, size)):
+        # Real time: slice i is available once its audio has been spoken
+        await asyncio.sleep(max(0.0, start + (i + 1) * duration / slices - loop.time()))
+        await pooled.connection.send(bytes(piece))
+    end = loop.time()
+    await pooled.connection.finalize()
+    await asyncio.sleep(3)
+    await pooled.close()
+    return {
+        "uplink": uplink,
+        "first_transcript_ms": (first[0] - start) * 1000 if first else None,
+        "final_after_end_ms": (finals[-1] - end) * 1000 if finals else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wav", required=True, help="16 kHz mono 16-bit speech recording")
+    parser.add_argument("--webm", help="WebM/Opus recording of the same audio (default: encode with ffmpeg)")
+    parser.add_argument("--bitrate", type=int, default=24000)
+    parser.add_argument("--live", action="store_true", help="also measure transcript latency against Deepgram")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    pcm = read_pcm(args.wav)
+    webm = Path(args.webm).read_bytes() if args.webm else encode_opus(args.wav, args.bitrate)
+    duration = len(pcm) / 32000
+
+    results = {"duration_s": duration, "bandwidth": bandwidth(pcm, webm)}
+    print(f"{'uplink':<12} {'messages':>9} {'bytes':>10} {'kbps':>8}")
+    for r in results["bandwidth"]:
+        print(f"{r['uplink']:<12} {r['messages']:>9} {r['bytes']:>10} {r['kbps']:>8.1f}")
+
+    if args.live:
+        async def live():
+            return [await stream_live("pcm", pcm, duration), await stream_live("opus", webm, duration)]
+        results["latency"] = asyncio.run(live())
+        print(f"\n{'uplink':<12} {'first transcript (ms)':>22} {'final after end (ms)':>21}")
+        for r in results["latency"]:
+            print(f"{r['uplink']:<12} {r['first_transcript_ms'] or float('nan'):>22.0f} "
+                  f"{r['final_after_end_ms'] or float('nan'):>21.0f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
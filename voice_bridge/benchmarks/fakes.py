@@ -0,0 +1,218 @@
+"""Local stand-ins for the external services used by the voice bridge.
+
+Benchmarks use these so they run without network access or API keys and give
+comparable numbers on the same machine.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from typing import List, Union
+
+import websockets
+
+from nova_mcp_monitor import NovaMCPMonitor
+
+
+class FakeTextToSpeech:
+    """Mimics ``ElevenLabs().text_to_speech`` with a simple latency model.
+
+    Like the non-streaming convert endpoint, no audio is available until the
+    whole text has been synthesized, which takes ``base_latency`` plus
+    ``per_word`` seconds for every word. The MP3 payload is sized at roughly
+    128 kbps speech (``bytes_per_word``) and yielded in ``chunk_size`` pieces.
+    """
+
+    def __init__(self, base_latency: float = 0.2, per_word: float = 0.015,
+                 bytes_per_word: int = 6400, chunk_size: int = 1024):
+        self.base_latency = base_latency
+        self.per_word = per_word
+        self.bytes_per_word = bytes_per_word
+        self.chunk_size = chunk_size
+        self.requests = 0
+
+    def convert(self, voice_id: str, text: str, **kwargs):
+        self.requests += 1
+        words = len(text.split())
+        time.sleep(self.base_latency + self.per_word * words)
+        audio = bytes(self.bytes_per_word * words)
+        for i in range(0, len(audio), self.chunk_size):
+            yield audio[i:i + self.chunk_size]
+
+
+class FakeElevenLabs:
+    """Drop-in replacement for ``elevenlabs.client.ElevenLabs``."""
+
+    def __init__(self, **kwargs):
+        self.text_to_speech = FakeTextToSpeech(**kwargs)
+
+
+def make_text(words: int, sentence_words: int = 12) -> str:
+    """Build a response of ``words`` words split into sentences."""
+    sentences = []
+    remaining = words
+    while remaining > 0:
+        n = min(sentence_words, remaining)
+        sentences.append(" ".join(["word"] * n).capitalize() + ".")
+        remaining -= n
+    return " ".join(sentences)
+
+
+class FakeMonitor(NovaMCPMonitor):
+    """Loopback stand-in for the Claude side of the MCP bridge.
+
+    Answers every request with ``reply_template`` after ``delay`` seconds,
+    over whichever bridge transport it is configured for (file, spool or
+    socket), from a background thread. With ``chunk_delay`` set the reply is
+    streamed word by word as partial responses, one word every
+    ``chunk_delay`` seconds.
+    """
+
+    def __init__(self, *args, delay: float = 0.0, reply_template: str = "Echo: {message}",
+                 chunk_delay: float = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delay = delay
+        self.reply_template = reply_template
+        self.chunk_delay = chunk_delay
+        self.thread = None
+
+    def process_request(self, request):
+        if self.delay:
+            time.sleep(self.delay)
+        reply = self.reply_template.format(message=request.get("message", ""))
+        if self.chunk_delay is None:
+            return reply
+        return self._stream_words(reply)
+
+    def _stream_words(self, reply):
+        for word in reply.split(" "):
+            time.sleep(self.chunk_delay)
+            yield word + " "
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        # Don't return before the socket is accepting connections
+        deadline = time.monotonic() + 5
+        while self.socket_path and self.server is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        super().stop()
+        # Wake a loop that is waiting on the bridge files so it can exit
+        if self.spool:
+            (self.spool.requests_dir / "stop").write_text("")
+        elif not self.socket_path:
+            self.input_file.write_text("")
+        if self.thread:
+            self.thread.join(timeout=2)
+
+
+class FakeSTTServer:
+    """Local stand-in for Deepgram's live transcription websocket.
+
+    Accepts connections on ``ws://host:port/v1/listen`` after
+    ``connect_latency`` seconds (standing in for the TLS and upgrade round
+    trips to the real service) and answers every ``final_after_bytes`` of
+    audio with a final ``Results`` message carrying ``transcript``, as does
+    Finalize (sent by the voice bridge's VAD at the end of speech) if audio
+    has arrived since the last one. ``transcript`` may also be a list,
+    whose entries each connection answers with in turn. KeepAlive messages
+    are ignored, CloseStream is answered with Metadata, and a
+    connection that receives nothing for ``idle_timeout`` seconds is closed,
+    as Deepgram does after about ten seconds.
+
+    Point the voice bridge at it with ``DEEPGRAM_URL=http://host:port``.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, connect_latency: float = 0.3,
+                 final_after_bytes: int = 16000, transcript: Union[str, List[str]] = "hello nova",
+                 idle_timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.connect_latency = connect_latency
+        self.final_after_bytes = final_after_bytes
+        self.transcripts = [transcript] if isinstance(transcript, str) else list(transcript)
+        self.idle_timeout = idle_timeout
+        self.server = None
+        self.connections = 0
+        self.open_connections = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self.server = await websockets.serve(self._handle, self.host, self.port,
+                                             process_request=self._delay_handshake)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _delay_handshake(self, connection, request):
+        if self.connect_latency:
+            await asyncio.sleep(self.connect_latency)
+        return None
+
+    def _result(self, request_id: str, start: float, duration: float, transcript: str) -> str:
+        return json.dumps({
+            "type": "Results",
+            "channel_index": [0, 1],
+            "duration": duration,
+            "start": start,
+            "is_final": True,
+            "speech_final": True,
+            "channel": {"alternatives": [{"transcript": transcript, "confidence": 0.99, "words": []}]},
+            "metadata": {"request_id": request_id, "model_uuid": "fake",
+                         "model_info": {"name": "fake", "version": "0", "arch": "fake"}}
+        })
+
+    async def _handle(self, websocket):
+        self.connections += 1
+        self.open_connections += 1
+        request_id = str(uuid.uuid4())
+        pending = 0
+        total = 0
+        finals = 0
+
+        async def send_final():
+            nonlocal pending, finals
+            transcript = self.transcripts[finals % len(self.transcripts)]
+            # 16 kHz 16-bit mono: 32000 bytes per second
+            await websocket.send(self._result(request_id, (total - pending) / 32000, pending / 32000, transcript))
+            pending = 0
+            finals += 1
+
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(websocket.recv(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await websocket.close(1011, "no audio received")
+                    return
+                if isinstance(message, str):
+                    kind = json.loads(message).get("type")
+                    if kind == "Finalize" and pending:
+                        await send_final()
+                    elif kind == "CloseStream":
+                        await websocket.send(json.dumps({
+                            "type": "Metadata", "request_id": request_id,
+                            "duration": total / 32000, "channels": 1
+                        }))
+                        await websocket.close()
+                        return
+                    continue  # KeepAlive
+                pending += len(message)
+                total += len(message)
+                if pending >= self.final_after_bytes:
+                    await send_final()
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.open_connections -= 1
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Run voice_bridge.py for the load generator, with a stand-in for TTS.
+
+The app is served unchanged by uvicorn (with ``--workers`` processes, as
+with WORKERS), except that:
+
+- ElevenLabs is replaced by FakeElevenLabs, which returns MP3-sized
+  payloads after a simulated synthesis latency,
+- the bridge socket or spool directory, the session database, the memory
+  index, the audio cache and the metrics directory live under ``--workdir``,
+- every worker samples its event loop lag into ``--workdir``/lag, and
+  ``GET /loadtest/stats?since=<unix time>`` returns the lag of all workers
+  since then, with the turn latency summary of /metrics.
+
+Deepgram is whatever DEEPGRAM_URL points at (load_test.py starts a
+FakeSTTServer), and the Claude side is the FakeMonitor listening on the
+bridge under ``--workdir``. Everything else is configured from the
+environment as usual. Not meant to be started by hand; see load_test.py.
+
+Usage (from voice_bridge/):
+    python benchmarks/load_server.py --port 8765 --workdir /tmp/load [--workers 2]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fakes import FakeElevenLabs  # noqa: E402
+from benchmarks.loop_lag import LoopLag, collect_lag  # noqa: E402
+
+
+def create_app():
+    """Import voice_bridge with the stand-ins in place (in every worker)."""
+    # voice_bridge.py checks for API keys on import; neither is used
+    os.environ.setdefault("DEEPGRAM_API_KEY", "load-test")
+    os.environ.setdefault("ELEVENLABS_API_KEY", "load-test")
+    workdir = Path(os.environ["LOAD_WORKDIR"])
+    tts_latency = float(os.environ.get("LOAD_TTS_LATENCY", "0.2"))
+    tts_per_word = float(os.environ.get("LOAD_TTS_PER_WORD", "0.015"))
+
+    from config import Config
+
+    Config.BRIDGE_SPOOL_DIR = str(workdir / "spool")
+    Config.BRIDGE_SOCKET_PATH = str(workdir / "nova.sock")
+    Config.SESSION_DB = str(workdir / "sessions.db")
+    Config.MEMORY_INDEX_DB = str(workdir / "memory_index.db")
+    Config.AUDIO_CACHE_DIR = str(workdir / "audio_cache")
+    Config.METRICS_DIR = str(workdir / "metrics")
+
+    import voice_bridge
+
+    # Created at startup, so the stand-in is picked up by every worker
+    voice_bridge.ElevenLabs = lambda **kwargs: FakeElevenLabs(base_latency=tts_latency, per_word=tts_per_word)
+    lag = LoopLag(directory=workdir / "lag")
+
+    @voice_bridge.app.on_event("startup")
+    async def start_loop_lag():
+        lag.start()
+
+    @voice_bridge.app.get("/loadtest/stats")
+    async def loadtest_stats(since: float = 0.0):
+        merged = await asyncio.to_thread(voice_bridge.all_metrics)
+        return {
+            "loop_lag": await asyncio.to_thread(collect_lag, workdir / "lag", since),
+            "latency": merged.summary(),
+        }
+
+    return voice_bridge.app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--workdir", required=True, help="bridge, databases and caches go here")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--tts-latency", type=float, default=0.2, help="simulated synthesis latency (s)")
+    parser.add_argument("--tts-per-word", type=float, default=0.015, help="added latency per word (s)")
+    args = parser.parse_args()
+
+    # Read by create_app, which runs in each worker process
+    os.environ["LOAD_WORKDIR"] = str(Path(args.workdir).resolve())
+    os.environ["LOAD_TTS_LATENCY"] = str(args.tts_latency)
+    os.environ["LOAD_TTS_PER_WORD"] = str(args.tts_per_word)
+    os.environ["WORKERS"] = str(args.workers)
+    # The app serves static/ relative to the working directory
+    os.chdir(Path(__file__).resolve().parent.parent)
+
+    import uvicorn
+
+    uvicorn.run("benchmarks.load_server:app", host="127.0.0.1", port=args.port, workers=args.workers,
+                log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
+else:
+    app = create_app()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""Load-test voice_bridge.py with N concurrent browser sessions.
+
+For each N in ``--sessions`` a fresh voice bridge is started
+(load_server.py, with ``--workers`` uvicorn processes) and N websocket clients connect to /ws. Each says hello
+like static/app.js and then, ``--turns`` times, streams the WAV in
+4096-sample blocks at real-time pace (base64 JSON audio messages, or
+binary frames with ``--binary``), waits until the reply has been spoken
+(``audio_end``) and pauses ``--think`` seconds. Session starts are spread
+over ``--ramp`` seconds.
+
+The other side of every turn is local:
+
+- a FakeSTTServer answers each utterance with the next of ``--transcript``
+  when the bridge's VAD finalizes it (keep VAD on, the default),
+- FakeElevenLabs in the server returns MP3-sized payloads after a
+  simulated synthesis latency,
+- a FakeMonitor answers on the bridge (socket or spool) after
+  ``--monitor-delay`` seconds with ``--reply-words`` words.
+
+Per N it reports, measured by the clients from the end of speech in the
+WAV, the time to the transcript, to the first piece of the reply and to
+the first reply audio (p50/p95/p99); the server's event loop lag (over all
+workers); its CPU use (100% is one core) and peak RSS, summed over the
+server's processes and read from /proc (Linux only); and the
+generator's own loop lag, which should stay small for the numbers to mean
+anything. Without ``--wav`` a synthetic utterance is used.
+
+Usage (from voice_bridge/):
+    python benchmarks/load_test.py [--sessions 1,10,25,50] [--turns 3]
+        [--workers 2] [--wav speech.wav] [--binary] [--json out.json]
+"""
+
+import argparse
+import array
+import asyncio
+import base64
+import contextlib
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import websockets  # noqa: E402
+
+from audio_framing import FRAME_PCM, encode_frame, iter_slices  # noqa: E402
+from benchmarks.bench_uplink import read_pcm  # noqa: E402
+from benchmarks.fakes import FakeMonitor, FakeSTTServer, make_text  # noqa: E402
+from benchmarks.loop_lag import LoopLag, percentile  # noqa: E402
+
+BLOCK_SAMPLES = 4096  # as static/app.js sends them
+BLOCK_BYTES = BLOCK_SAMPLES * 2
+BLOCK_SECONDS = BLOCK_SAMPLES / 16000
+SPEECH_LEVEL = 500  # samples above this count as speech when finding its end
+
+TRANSCRIPTS = [
+    "what's on my calendar tomorrow",
+    "remind me to call the dentist at four",
+    "summarize my unread email",
+    "what did we decide about the launch date",
+]
+
+
+def synthetic_utterance(speech: float = 1.5, silence: float = 1.0) -> bytes:
+    """A syllable-like modulated tone followed by silence, 16 kHz 16-bit mono."""
+    samples = array.array("h")
+    for i in range(int(speech * 16000)):
+        t = i / 16000
+        envelope = 0.5 - 0.5 * math.cos(2 * math.pi * 4 * t)
+        samples.append(int(8000 * envelope * math.sin(2 * math.pi * 180 * t)))
+    samples.extend([0] * int(silence * 16000))
+    return samples.tobytes()
+
+
+def speech_end_block(pcm: bytes) -> int:
+    """Index of the last block that contains speech."""
+    samples = memoryview(pcm).cast("h")
+    last = max((i for i in range(len(samples)) if abs(samples[i]) > SPEECH_LEVEL), default=0)
+    return last // BLOCK_SAMPLES
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def proc_stat(pid) -> list:
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().rsplit(")", 1)[1].split()
+
+
+class ProcessStats:
+    """CPU time and peak RSS of a process and its descendants (the uvicorn
+    workers), from /proc."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK")
+
+    def pids(self) -> list:
+        parents = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    parents[int(entry)] = int(proc_stat(entry)[1])
+                except (OSError, IndexError):
+                    continue
+        tree = [self.pid]
+        for pid in tree:
+            tree += [child for child, parent in parents.items() if parent == pid]
+        return tree
+
+    def cpu_seconds(self) -> float:
+        total = 0
+        for pid in self.pids():
+            try:
+                fields = proc_stat(pid)
+            except OSError:
+                continue
+            total += int(fields[11]) + int(fields[12])  # utime + stime
+        return total / self.ticks
+
+    def peak_rss_mb(self) -> float:
+        total = 0
+        for pid in self.pids():
+            try:
+                with open(f"/proc/{pid}/status") as f:
+                    total += next((int(line.split()[1]) for line in f if line.startswith("VmHWM:")), 0)
+            except OSError:
+                continue
+        return total / 1024
+
+
+class Turn:
+    __slots__ = ("speech_end", "transcript", "response_first", "audio_first", "audio_end")
+
+    def __init__(self):
+        self.speech_end = None
+        self.transcript = None
+        self.response_first = None
+        self.audio_first = None
+        self.audio_end = None
+
+
+async def client_session(url: str, pcm: bytes, end_block: int, turns: int, think: float, binary: bool,
+                         delay: float, results: list, errors: list):
+    await asyncio.sleep(delay)
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            await ws.send(json.dumps({"type": "control", "action": "hello", "binary": binary, "uplink": "pcm"}))
+            while json.loads(await ws.recv()).get("type") != "hello":
+                pass
+            for _ in range(turns):
+                turn = Turn()
+                receiver = asyncio.create_task(receive_turn(ws, turn))
+                start = time.perf_counter()
+                for i, block in enumerate(iter_slices(pcm, BLOCK_BYTES)):
+                    # Real-time pace: block i is sent once it would have been recorded
+                    await asyncio.sleep(max(0.0, start + (i + 1) * BLOCK_SECONDS - time.perf_counter()))
+                    if binary:
+                        await ws.send(encode_frame(FRAME_PCM, i, block))
+                    else:
+                        await ws.send(json.dumps({"type": "audio", "data": base64.b64encode(block).decode()}))
+                    if i == end_block:
+                        turn.speech_end = time.perf_counter()
+                await asyncio.wait_for(receiver, 30)
+                results.append(turn)
+                await asyncio.sleep(think)
+    except Exception as e:
+        errors.append(f"{type(e).__name__}: {e}")
+
+
+async def receive_turn(ws, turn: Turn):
+    async for message in ws:
+        now = time.perf_counter()
+        if isinstance(message, bytes):
+            kind = "audio"
+        else:
+            kind = json.loads(message).get("type")
+        if kind == "transcription" and turn.transcript is None:
+            turn.transcript = now
+        elif kind in ("response_partial", "response") and turn.response_first is None:
+            turn.response_first = now
+        elif kind == "audio" and turn.audio_first is None:
+            turn.audio_first = now
+        elif kind == "audio_end":
+            turn.audio_end = now
+            return
+        elif kind == "error":
+            raise RuntimeError(json.loads(message).get("message"))
+
+
+def latency(turns, stage: str) -> dict:
+    samples = [(getattr(t, stage) - t.speech_end) * 1000 for t in turns
+               if getattr(t, stage) is not None and t.speech_end is not None]
+    if not samples:
+        return {}
+    return {f"p{p}_ms": round(percentile(samples, p), 1) for p in (50, 95, 99)}
+
+
+def fetch_json(url: str):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.loads(response.read())
+
+
+async def wait_until_up(url: str, server: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"load_server.py exited with {server.returncode}")
+        try:
+            return await asyncio.to_thread(fetch_json, url)
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("load_server.py did not start")
+
+
+async def run_step(sessions: int, args, pcm: bytes, stt: FakeSTTServer, workdir: Path) -> dict:
+    port = free_port()
+    env = dict(os.environ, DEEPGRAM_URL=stt.url, NOVA_BRIDGE_MODE=args.bridge_mode)
+    log_path = Path(args.server_log) if args.server_log else workdir / "server.log"
+    with open(log_path, "a") as log:
+        server = subprocess.Popen(
+            [sys.executable, str(Path(__file__).with_name("load_server.py")), "--port", str(port),
+             "--workdir", str(workdir), "--workers", str(args.workers), "--tts-latency", str(args.tts_latency)],
+            env=env, stdout=log, stderr=log
+        )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        await wait_until_up(f"{base}/loadtest/stats", server)
+        stats = ProcessStats(server.pid)
+        client_lag = LoopLag().start()
+        turns, errors = [], []
+        end_block = speech_end_block(pcm)
+        cpu_start, start, started_at = stats.cpu_seconds(), time.perf_counter(), time.time()
+        await asyncio.gather(*(
+            client_session(f"ws://127.0.0.1:{port}/ws", pcm, end_block, args.turns, args.think, args.binary,
+                           args.ramp * i / sessions, turns, errors)
+            for i in range(sessions)
+        ))
+        elapsed = time.perf_counter() - start
+        cpu = stats.cpu_seconds() - cpu_start
+        # Workers publish their loop lag every second
+        await asyncio.sleep(1.5)
+        server_stats = await asyncio.to_thread(fetch_json, f"{base}/loadtest/stats?since={started_at}")
+        client_lag.task.cancel()
+        return {
+            "sessions": sessions,
+            "workers": args.workers,
+            "turns": len(turns),
+            "errors": len(errors),
+            "first_errors": errors[:3],
+            "transcript": latency(turns, "transcript"),
+            "response_first": latency(turns, "response_first"),
+            "audio_first": latency(turns, "audio_first"),
+            "audio_end": latency(turns, "audio_end"),
+            "turns_per_s": round(len(turns) / elapsed, 2),
+            "server_loop_lag": server_stats["loop_lag"],
+            "server_cpu_percent": round(cpu / elapsed * 100, 1),
+            "server_peak_rss_mb": round(stats.peak_rss_mb(), 1),
+            "server_latency": server_stats["latency"],
+            "client_loop_lag": client_lag.stats(),
+        }
+    finally:
+        server.terminate()
+        try:
+            await asyncio.to_thread(server.wait, 10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+async def run(args, pcm: bytes, out) -> list:
+    stt = await FakeSTTServer(connect_latency=args.stt_latency, final_after_bytes=1 << 40,
+                              transcript=args.transcript or TRANSCRIPTS).start()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        spool_dir = workdir / "spool" if args.bridge_mode == "spool" else None
+        socket_path = workdir / "nova.sock" if args.bridge_mode == "socket" else None
+        monitor = FakeMonitor(workdir / "nova_input.txt", workdir / "nova_output.txt",
+                              spool_dir=spool_dir, socket_path=socket_path, workers=args.monitor_workers,
+                              delay=args.monitor_delay,
+                              reply_template="About {message}: " + make_text(args.reply_words))
+        # The monitor prints every request from its threads
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            monitor.start()
+            try:
+                for sessions in args.sessions:
+                    result = await run_step(sessions, args, pcm, stt, workdir)
+                    print_row(result, out)
+                    results.append(result)
+            finally:
+                monitor.stop()
+                await stt.stop()
+    return results
+
+
+def print_header():
+    print(f"{'N':>4} {'turns':>6} {'err':>4} {'transcript p50':>15} {'first audio p50/p95/p99 (ms)':>30} "
+          f"{'loop lag p99/max':>17} {'CPU %':>6} {'RSS MB':>7} {'client lag':>10}")
+
+
+def print_row(r: dict, out):
+    audio = r["audio_first"]
+    lag = r["server_loop_lag"]
+    print(f"{r['sessions']:>4} {r['turns']:>6} {r['errors']:>4} {r['transcript'].get('p50_ms', 0):>15.1f} "
+          f"{audio.get('p50_ms', 0):>12.1f} /{audio.get('p95_ms', 0):>7.1f} /{audio.get('p99_ms', 0):>7.1f} "
+          f"{lag.get('p99_ms', 0):>8.1f} /{lag.get('max_ms', 0):>7.1f} {r['server_cpu_percent']:>6.1f} "
+          f"{r['server_peak_rss_mb']:>7.1f} {r['client_loop_lag'].get('max_ms', 0):>10.1f}", file=out, flush=True)
+    for error in r["first_errors"]:
+        print(f"     error: {error}", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="1,10,25,50", help="comma-separated session counts")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (as WORKERS)")
+    parser.add_argument("--turns", type=int, default=3, help="utterances per session")
+    parser.add_argument("--think", type=float, default=1.0, help="pause after each reply (s)")
+    parser.add_argument("--ramp", type=float, default=2.0, help="spread session starts over this many seconds")
+    parser.add_argument("--wav", help="16 kHz mono 16-bit WAV to speak (default: synthetic)")
+    parser.add_argument("--transcript", action="append", help="scripted transcript (repeatable)")
+    parser.add_argument("--binary", action="store_true", help="send binary audio frames instead of JSON")
+    parser.add_argument("--bridge-mode", choices=("socket", "spool"), default="socket")
+    parser.add_argument("--monitor-delay", type=float, default=0.3, help="simulated Claude latency (s)")
+    parser.add_argument("--monitor-workers", type=int, default=64)
+    parser.add_argument("--reply-words", type=int, default=30)
+    parser.add_argument("--tts-latency", type=float, default=0.2, help="simulated synthesis latency (s)")
+    parser.add_argument("--stt-latency", type=float, default=0.1, help="simulated STT handshake latency (s)")
+    parser.add_argument("--server-log", help="append the server's log here (default: discarded)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    args.sessions = [int(n) for n in args.sessions.split(",")]
+
+    pcm = read_pcm(args.wav) if args.wav else synthetic_utterance()
+    print_header()
+    results = asyncio.run(run(args, pcm, sys.stdout))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Event loop lag sampling for the load generator and the server it drives."""
+
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def lag_stats(samples) -> dict:
+    if not samples:
+        return {}
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+    }
+
+
+class LoopLag:
+    """Samples how late the event loop wakes up from ``interval``-second sleeps.
+
+    With ``directory`` the samples of the last ten minutes, as (unix time,
+    lag) pairs, are also written to ``directory/<pid>.json`` every second.
+    """
+
+    def __init__(self, interval: float = 0.05, directory=None):
+        self.interval = interval
+        self.samples = deque(maxlen=int(600 / interval))
+        self.directory = Path(directory) if directory else None
+        self.task = None
+
+    def start(self):
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.task = asyncio.create_task(self._run())
+        return self
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        published = loop.time()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            self.samples.append((time.time(), now - start - self.interval))
+            if self.directory and now - published >= 1:
+                published = now
+                self._publish()
+
+    def _publish(self):
+        tmp_path = self.directory / f".{uuid.uuid4().hex}.tmp"
+        tmp_path.write_text(json.dumps(list(self.samples)))
+        os.replace(tmp_path, self.directory / f"{os.getpid()}.json")
+
+    def stats(self, since: float = 0.0) -> dict:
+        return lag_stats([lag for at, lag in self.samples if at >= since])
+
+
+def collect_lag(directory, since: float) -> dict:
+    """Loop lag of every worker that published to ``directory``, since ``since``."""
+    samples = []
+    for path in Path(directory).glob("*.json"):
+        try:
+            samples += [lag for at, lag in json.loads(path.read_text()) if at >= since]
+        except (OSError, ValueError):
+            continue
+    return lag_stats(samples)
@@ -0,0 +1,81 @@
+"""Response records exchanged over the MCP bridge.
+
+A monitor answers a request with one final record, status "complete" (the
+full reply in ``message``) or "error". Before that it may send any number of
+"partial" records, each carrying the next piece of the reply:
+
+    {"request_id": ..., "status": "partial", "seq": 0, "message": "It's "}
+    {"request_id": ..., "status": "partial", "seq": 1, "message": "sunny."}
+    {"request_id": ..., "status": "complete", "message": "It's sunny."}
+
+The pieces form an append-only sequence per request id. Where a transport
+can only hold the latest record (the single-file bridge), partial records
+also carry the whole sequence so far in ``chunks``. A final record always
+repeats the full reply, so readers that ignore partials keep working.
+"""
+
+from datetime import datetime
+from typing import Iterable, Iterator, List, Union
+
+FINAL_STATUSES = ("complete", "error")
+
+
+def make_record(request_id: str, message: str, status: str = "complete", **fields) -> dict:
+    record = {
+        "request_id": request_id,
+        "timestamp": datetime.now().isoformat(),
+        "message": message,
+        "status": status
+    }
+    record.update(fields)
+    return record
+
+
+def response_records(request_id: str, result: Union[str, Iterable[str]]) -> Iterator[dict]:
+    """Turn a monitor's result into records: a reply string becomes one
+    complete record, an iterable of pieces becomes partials plus a complete."""
+    if isinstance(result, str):
+        yield make_record(request_id, result)
+        return
+    pieces = []
+    for piece in result:
+        yield make_record(request_id, piece, status="partial", seq=len(pieces))
+        pieces.append(piece)
+    yield make_record(request_id, "".join(pieces))
+
+
+class ResponseAssembler:
+    """Rebuilds a reply from records, returning only the text not seen before."""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    def add(self, record: dict) -> List[str]:
+        status = record.get("status")
+        new = []
+        if status == "partial":
+            if "chunks" in record:
+                new = record["chunks"][len(self.chunks):]
+            elif record.get("seq", len(self.chunks)) == len(self.chunks):
+                new = [record.get("message", "")]
+        elif status == "complete":
+            self.done = True
+            text = self.text
+            full = record.get("message")
+            if full is None:
+                full = text or "No response message"
+            if not self.chunks:
+                new = [full]
+            elif full.startswith(text):
+                new = [full[len(text):]]
+        elif status == "error":
+            self.done = True
+            if not self.chunks:
+                new = [f"Error from Claude: {record.get('message', 'Unknown error')}"]
+        self.chunks.extend(new)
+        return [piece for piece in new if piece]
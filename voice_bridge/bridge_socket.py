@@ -0,0 +1,142 @@
+"""Unix-domain-socket transport for the MCP bridge: wire format and monitor side.
+
+Messages are JSON objects framed by a 4-byte big-endian length prefix. The
+monitor listens on the socket (BridgeSocketServer); the voice bridge keeps a
+persistent connection and multiplexes requests over it by request id (see
+UnixSocketTransport in bridge_transport.py). Responses carry ``request_id``
+and may come back in any order, so a slow request does not hold up others on
+the same connection. A ``{"type": "cancel", "id": ...}`` message tells the
+monitor that the voice bridge no longer waits for that request.
+
+No file is written or fsync'd per message, which makes this the lowest
+latency transport when the voice bridge and the monitor share a machine.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Union
+
+FRAME_LENGTH = struct.Struct("!I")
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+
+def encode_message(message: dict) -> bytes:
+    payload = json.dumps(message).encode("utf-8")
+    return FRAME_LENGTH.pack(len(payload)) + payload
+
+
+def decode_length(header: bytes) -> int:
+    (length,) = FRAME_LENGTH.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Bridge frame too large: {length} bytes")
+    return length
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+        buffer += chunk
+    return bytes(buffer)
+
+
+def recv_message(sock: socket.socket) -> Optional[dict]:
+    """Read one message from a blocking socket; None when the peer closes."""
+    header = _recv_exactly(sock, FRAME_LENGTH.size)
+    if header is None:
+        return None
+    payload = _recv_exactly(sock, decode_length(header))
+    if payload is None:
+        return None
+    return json.loads(payload)
+
+
+async def read_message(reader) -> Optional[dict]:
+    """Read one message from an asyncio StreamReader; None when the peer closes."""
+    try:
+        header = await reader.readexactly(FRAME_LENGTH.size)
+        payload = await reader.readexactly(decode_length(header))
+    except EOFError:
+        return None
+    return json.loads(payload)
+
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.write_lock = threading.Lock()
+
+    def send(self, message: dict):
+        data = encode_message(message)
+        with self.write_lock:
+            self.request.sendall(data)
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (OSError, ValueError):
+                return
+            if request is None:
+                return
+            if request.get("type") == "cancel":
+                self.server.cancel(request.get("id"))
+                continue
+            self.server.dispatch(request, self.send)
+
+
+class BridgeSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serve bridge requests on a Unix socket, one thread per connection.
+
+    ``handle_request(request)`` is called for every request and returns the
+    response record to send back, or an iterable of records (partial ones
+    followed by a final one, see bridge_protocol.py) which are sent as they
+    are produced. By default each request runs in its own thread; pass
+    ``dispatch`` to schedule requests differently. It receives the request
+    and a thread-safe ``send(record)`` callback for its connection.
+    ``cancel(request_id)`` is called when the voice bridge gives up on a
+    request; without it cancellations are ignored.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, handle_request: Callable[[dict], Union[dict, Iterable[dict]]],
+                 dispatch: Optional[Callable] = None, cancel: Optional[Callable[[str], None]] = None):
+        self.path = Path(path)
+        self.handle_request = handle_request
+        self._dispatch = dispatch
+        self._cancel = cancel
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # A socket file left behind by a previous run would make bind() fail
+        if self.path.exists():
+            self.path.unlink()
+        super().__init__(str(self.path), _ConnectionHandler)
+        os.chmod(self.path, 0o600)
+
+    def dispatch(self, request: dict, send: Callable[[dict], None]):
+        if self._dispatch is not None:
+            self._dispatch(request, send)
+            return
+        threading.Thread(target=self._serve, args=(request, send), daemon=True).start()
+
+    def cancel(self, request_id: str):
+        if self._cancel is not None:
+            self._cancel(request_id)
+
+    def _serve(self, request: dict, send: Callable[[dict], None]):
+        try:
+            result = self.handle_request(request)
+            for record in ([result] if isinstance(result, dict) else result):
+                send(record)
+        except OSError:
+            pass  # connection closed before the response was ready
+
+    def server_close(self):
+        super().server_close()
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,157 @@
+"""Spool-directory mode for the MCP bridge.
+
+The single-file bridge (nova_input.txt / nova_output.txt) can only hold one
+request at a time, so concurrent voice sessions overwrite each other. In spool
+mode every request and response gets its own file:
+
+    spool/requests/<time_ns>-<id>.json    pending requests, FIFO by name
+    spool/processing/<time_ns>-<id>.json  requests claimed by a monitor
+    spool/responses/<id>.json             responses waiting to be collected
+    spool/responses/<id>.<seq>.json       partial responses, in sequence order
+    spool/requests/<id>.cancel            the voice bridge gave up on a request
+
+Files are written to spool/tmp and renamed into place, so readers never see a
+partial file. A monitor claims a request by renaming it into processing/,
+which is atomic, so two monitors never process the same request. Entries
+older than ``max_age`` seconds are removed by collect_garbage().
+"""
+
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+
+class BridgeSpool:
+    def __init__(self, root="mcp_bridge/spool", max_age: float = 300):
+        self.root = Path(root)
+        self.requests_dir = self.root / "requests"
+        self.processing_dir = self.root / "processing"
+        self.responses_dir = self.root / "responses"
+        self.tmp_dir = self.root / "tmp"
+        self.max_age = max_age
+
+        for directory in (self.requests_dir, self.processing_dir, self.responses_dir, self.tmp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def _write_atomic(self, path: Path, data: dict):
+        tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    # Voice bridge side
+
+    def submit(self, request: dict) -> Path:
+        """Queue a request; returns its path in requests/."""
+        path = self.requests_dir / f"{time.time_ns():020d}-{request['id']}.json"
+        self._write_atomic(path, request)
+        return path
+
+    def withdraw(self, request_path: Path) -> bool:
+        """Remove a request that no monitor has claimed yet."""
+        try:
+            request_path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def cancel(self, request_id: str):
+        """Tell the monitor that a claimed request is no longer wanted."""
+        path = self.requests_dir / f"{request_id}.cancel"
+        tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}.tmp"
+        tmp_path.write_text("")
+        os.replace(tmp_path, path)
+
+    def response_path(self, request_id: str) -> Path:
+        return self.responses_dir / f"{request_id}.json"
+
+    def take_response(self, request_id: str) -> Optional[dict]:
+        """Read and remove the response for request_id, if it has arrived."""
+        path = self.response_path(request_id)
+        try:
+            data = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        path.unlink(missing_ok=True)
+        return data
+
+    def partial_path(self, request_id: str, seq: int) -> Path:
+        return self.responses_dir / f"{request_id}.{seq:06d}.json"
+
+    def take_partial(self, request_id: str, seq: int) -> Optional[dict]:
+        """Read and remove partial response number ``seq``, if it has arrived."""
+        path = self.partial_path(request_id, seq)
+        try:
+            data = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        path.unlink(missing_ok=True)
+        return data
+
+    # Monitor side
+
+    def pending(self) -> List[Path]:
+        """Pending request files, oldest first."""
+        return sorted(self.requests_dir.glob("*.json"))
+
+    def claim_next(self) -> Optional[dict]:
+        """Claim the oldest pending request, or return None if there is none."""
+        for path in self.pending():
+            claimed = self.processing_dir / path.name
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue  # withdrawn, or claimed by another monitor
+            try:
+                request = json.loads(claimed.read_text())
+            except (OSError, json.JSONDecodeError):
+                claimed.unlink(missing_ok=True)
+                continue
+            request["_spool_path"] = str(claimed)
+            return request
+        return None
+
+    def take_cancellations(self) -> List[str]:
+        """Ids of requests the voice bridge has given up on, removing the markers."""
+        cancelled = []
+        for path in self.requests_dir.glob("*.cancel"):
+            path.unlink(missing_ok=True)
+            cancelled.append(path.stem)
+        return cancelled
+
+    def respond(self, request: dict, response: dict):
+        """Publish the response for a claimed request and release the claim."""
+        self._write_atomic(self.response_path(request["id"]), response)
+        claimed = request.get("_spool_path")
+        if claimed:
+            Path(claimed).unlink(missing_ok=True)
+
+    def publish_record(self, request: dict, record: dict):
+        """Publish one partial or final record for a claimed request."""
+        if record.get("status") == "partial":
+            self._write_atomic(self.partial_path(request["id"], record["seq"]), record)
+        else:
+            self.respond(request, record)
+
+    def publish(self, request: dict, records: Iterable[dict]) -> dict:
+        """Publish partial records followed by a final one; returns the final record."""
+        for record in records:
+            self.publish_record(request, record)
+        return record
+
+    def collect_garbage(self) -> int:
+        """Delete requests, claims, responses and temp files older than max_age."""
+        cutoff = time.time() - self.max_age
+        removed = 0
+        for directory in (self.requests_dir, self.processing_dir, self.responses_dir, self.tmp_dir):
+            for entry in os.scandir(directory):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
@@ -0,0 +1,391 @@
+"""Transports for the MCP bridge.
+
+A transport moves a request to the Claude side and yields the response
+records that come back for it. MCPBridgeHandler only talks to this interface,
+so the transport can be swapped without changing ``send_to_claude``:
+
+    FileTransport        single nova_input.txt / nova_output.txt pair
+    SpoolTransport       one file per request and response (bridge_spool.py)
+    UnixSocketTransport  length-prefixed frames on a Unix socket (bridge_socket.py)
+
+``exchange`` yields records whose ``request_id`` matches the request
+(partial ones included, see bridge_protocol.py) and finishes after a record
+with a final status, or silently when the timeout expires. ``on_sent``, if
+given, is called once the request has been handed over. ``cancel`` tells
+the other side that a request is no longer wanted.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Optional
+
+from bridge_protocol import FINAL_STATUSES
+from bridge_socket import encode_message, read_message
+from bridge_spool import BridgeSpool
+from file_watcher import FileWatcher
+
+logger = logging.getLogger(__name__)
+
+
+class BridgeTransport:
+    async def exchange(self, request: dict, timeout: float,
+                       on_sent: Optional[Callable[[], None]] = None) -> AsyncIterator[dict]:
+        """Send ``request`` and yield its response records."""
+        raise NotImplementedError
+        yield
+
+    def cancel(self, request_id: str):
+        """Give up on a request that is in flight."""
+
+    def close(self):
+        """Release resources held for one session."""
+
+
+class _SharedWatch:
+    """One FileWatcher per watched path and process, shared by the transports
+    of every session, so that the number of inotify instances (128 per user
+    by default) does not grow with the number of sessions.
+
+    A single task waits on the watcher and counts changes. An exchange reads
+    ``changes`` before it checks for its response and then waits for the
+    count to move past that, so a change in between is not missed.
+    """
+
+    _shared: Dict[str, "_SharedWatch"] = {}
+
+    def __init__(self, key: str, path):
+        self.key = key
+        self.watcher = FileWatcher(path)
+        self.users = 0
+        self.changes = 0
+        self._changed = None  # resolved at the next change
+        self._task = None
+        self._loop = None
+
+    @classmethod
+    def acquire(cls, path) -> "_SharedWatch":
+        key = str(Path(path).resolve())
+        watch = cls._shared.get(key)
+        if watch is None:
+            watch = cls._shared[key] = cls(key, path)
+        watch.users += 1
+        return watch
+
+    @property
+    def backend(self) -> str:
+        return self.watcher.backend
+
+    async def wait(self, seen: int, timeout: float):
+        """Return once ``changes`` differs from ``seen``, or after ``timeout``."""
+        if self.changes != seen:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            # Also after a previous event loop (asyncio.run) has gone away
+            self._loop = loop
+            self._changed = loop.create_future()
+            self._task = loop.create_task(self._run())
+        try:
+            await asyncio.wait_for(asyncio.shield(self._changed), max(0, timeout))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        while self.users > 0:
+            try:
+                changed = await self.watcher.wait_async(timeout=1.0)
+            except Exception as e:
+                # Every session waits on this task: keep it alive, and wake
+                # them in case the error hid a change
+                logger.error(f"Watching {self.key} failed: {e}")
+                await asyncio.sleep(self.watcher.poll_interval)
+                changed = True
+            if changed:
+                self.changes += 1
+                waiters, self._changed = self._changed, self._loop.create_future()
+                waiters.set_result(None)
+
+    def release(self):
+        self.users -= 1
+        if self.users > 0:
+            return
+        if self._shared.get(self.key) is self:
+            del self._shared[self.key]
+        if self._task is not None and not self._task.done():
+            try:
+                self._task.cancel()
+            except RuntimeError:
+                pass  # its loop is closed
+        self.watcher.close()
+
+
+class _WatchedTransport(BridgeTransport):
+    """Shared wait logic for the file-based transports."""
+
+    poll_interval = 0.1  # seconds between polling attempts when not watching
+
+    def __init__(self, watched_path, use_watcher: bool):
+        # Acquired before any request is written so no response can be missed
+        self.watcher = _SharedWatch.acquire(watched_path) if use_watcher else None
+
+    def _changes(self) -> int:
+        """Read before checking for a response, and passed to ``_wait``."""
+        return self.watcher.changes if self.watcher else 0
+
+    async def _wait(self, seen: int, remaining: float):
+        if not self.watcher:
+            await asyncio.sleep(self.poll_interval)
+            return
+        await self.watcher.wait(seen, remaining)
+
+    def close(self):
+        if self.watcher:
+            self.watcher.release()
+            self.watcher = None
+
+
+class FileTransport(_WatchedTransport):
+    def __init__(self, input_file="mcp_bridge/nova_input.txt", output_file="mcp_bridge/nova_output.txt",
+                 use_watcher: bool = True):
+        self.input_file = Path(input_file)
+        self.output_file = Path(output_file)
+
+        # Ensure directories exist
+        self.input_file.parent.mkdir(parents=True, exist_ok=True)
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Initialize files if they don't exist
+        if not self.input_file.exists():
+            self.input_file.write_text("")
+        if not self.output_file.exists():
+            self.output_file.write_text("")
+
+        super().__init__(self.output_file, use_watcher)
+
+    def _write_locked(self, path: Path, text: str, sync: bool = True):
+        with open(path, 'w') as f:
+            # Acquire exclusive lock
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                f.write(text)
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            finally:
+                # Release lock
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    async def exchange(self, request: dict, timeout: float,
+                       on_sent: Optional[Callable[[], None]] = None) -> AsyncIterator[dict]:
+        request_id = request["id"]
+        self._write_locked(self.input_file, json.dumps(request, indent=2))
+        if on_sent:
+            on_sent()
+        logger.info(f"Sent request {request_id} to Claude")
+
+        start_time = time.time()
+        last_content = None
+
+        while time.time() - start_time < timeout:
+            seen = self._changes()
+            try:
+                # Read output file with shared lock
+                with open(self.output_file, 'r') as f:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+                    try:
+                        content = f.read().strip()
+                    finally:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+                # Check if content changed and is valid JSON
+                if content and content != last_content:
+                    last_content = content
+                    try:
+                        response_data = json.loads(content)
+                    except json.JSONDecodeError:
+                        # Not valid JSON yet, keep waiting
+                        response_data = None
+
+                    # Check if this is our response
+                    if response_data and response_data.get("request_id") == request_id:
+                        yield response_data
+                        if response_data.get("status") in FINAL_STATUSES:
+                            # Clear the output file for next response
+                            self._write_locked(self.output_file, "")
+                            return
+
+            except OSError as e:
+                logger.error(f"Error reading response: {e}")
+
+            # Wait for the output file to change (or poll again)
+            await self._wait(seen, timeout - (time.time() - start_time))
+
+    def clear(self):
+        """Clear both bridge files."""
+        self._write_locked(self.input_file, "", sync=False)
+        self._write_locked(self.output_file, "", sync=False)
+
+
+class SpoolTransport(_WatchedTransport):
+    def __init__(self, spool_dir="mcp_bridge/spool", use_watcher: bool = True):
+        self.spool = BridgeSpool(spool_dir)
+        super().__init__(self.spool.responses_dir, use_watcher)
+
+    async def exchange(self, request: dict, timeout: float,
+                       on_sent: Optional[Callable[[], None]] = None) -> AsyncIterator[dict]:
+        request_id = request["id"]
+        request_path = self.spool.submit(request)
+        if on_sent:
+            on_sent()
+        logger.info(f"Queued request {request_id} in {self.spool.requests_dir}")
+
+        try:
+            start_time = time.time()
+            next_seq = 0
+            while time.time() - start_time < timeout:
+                seen = self._changes()
+                # Partials are published before the final record, so once the
+                # final one is here every partial can be collected first.
+                try:
+                    response_data = self.spool.take_response(request_id)
+                except json.JSONDecodeError:
+                    response_data = None
+
+                partial = self.spool.take_partial(request_id, next_seq)
+                while partial is not None:
+                    next_seq += 1
+                    yield partial
+                    partial = self.spool.take_partial(request_id, next_seq)
+
+                if response_data is not None:
+                    yield response_data
+                    if response_data.get("status") in FINAL_STATUSES:
+                        return
+
+                await self._wait(seen, timeout - (time.time() - start_time))
+        finally:
+            # Don't leave an abandoned request for a monitor to pick up later
+            if self.spool.withdraw(request_path):
+                logger.debug(f"Withdrew unanswered request {request_id}")
+
+    def cancel(self, request_id: str):
+        self.spool.cancel(request_id)
+
+
+class UnixSocketTransport(BridgeTransport):
+    """Multiplexes requests from every session over one persistent connection.
+
+    A background task reads response frames and routes them to the waiting
+    request by ``request_id``. The connection is opened on first use and
+    re-opened after the monitor restarts.
+    """
+
+    _shared: Dict[str, "UnixSocketTransport"] = {}
+
+    def __init__(self, path="mcp_bridge/nova.sock"):
+        self.path = str(path)
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+        self._pending: Dict[str, asyncio.Queue] = {}
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+    @classmethod
+    def shared(cls, path="mcp_bridge/nova.sock") -> "UnixSocketTransport":
+        """Return the process-wide transport for ``path``."""
+        key = str(path)
+        if key not in cls._shared:
+            cls._shared[key] = cls(key)
+        return cls._shared[key]
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def _ensure_connected(self):
+        if self.connected:
+            return
+        async with self._connect_lock:
+            if self.connected:
+                return
+            self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+            self._reader_task = asyncio.create_task(self._read_responses(self._reader, self._writer))
+            logger.info(f"Connected to MCP bridge socket {self.path}")
+
+    async def _read_responses(self, reader, writer):
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                queue = self._pending.get(message.get("request_id"))
+                if queue is not None:
+                    queue.put_nowait(message)
+                else:
+                    logger.debug(f"Dropping response for unknown request {message.get('request_id')}")
+        except (OSError, ValueError) as e:
+            logger.error(f"MCP bridge socket error: {e}")
+        finally:
+            logger.warning("MCP bridge socket closed")
+            writer.close()
+            if self._writer is not writer:
+                return  # already replaced by a newer connection
+            self._writer = None
+            for request_id, queue in self._pending.items():
+                queue.put_nowait({
+                    "request_id": request_id,
+                    "status": "error",
+                    "message": "Bridge connection lost"
+                })
+
+    async def exchange(self, request: dict, timeout: float,
+                       on_sent: Optional[Callable[[], None]] = None) -> AsyncIterator[dict]:
+        request_id = request["id"]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        await self._ensure_connected()
+        queue = asyncio.Queue()
+        self._pending[request_id] = queue
+        try:
+            async with self._write_lock:
+                self._writer.write(encode_message(request))
+                await self._writer.drain()
+            if on_sent:
+                on_sent()
+            logger.info(f"Sent request {request_id} to Claude over {self.path}")
+
+            while True:
+                try:
+                    response_data = await asyncio.wait_for(queue.get(), max(0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    return
+                yield response_data
+                if response_data.get("status") in FINAL_STATUSES:
+                    return
+        finally:
+            self._pending.pop(request_id, None)
+
+    def cancel(self, request_id: str):
+        if self.connected:
+            self._writer.write(encode_message({"type": "cancel", "id": request_id}))
+
+    def close(self):
+        """Sessions share the connection, so there is nothing to release per session."""
+
+    async def aclose(self):
+        """Close the shared connection."""
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
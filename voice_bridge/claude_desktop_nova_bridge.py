@@ -2,24 +2,138 @@
 
 Run this IN Claude Desktop to enable voice control.
 This script processes voice commands and executes MCP tools.
+Set NOVA_BRIDGE_MODE=spool to use the spool-directory bridge, or
+NOVA_BRIDGE_MODE=socket to serve requests on a Unix domain socket.
+Commands run on NOVA_MONITOR_WORKERS worker threads (default 4), each with
+NOVA_REQUEST_TIMEOUT seconds (default 25) to answer. Set NOVA_TRACE_LOG to
+a file to log each request's pickup, queueing, processing and response-write
+times as spans (see tracing.py).
 """
 
 import json
+import os
+import threading
 import time
 from pathlib import Path
 from datetime import datetime
+from file_watcher import FileWatcher
+from bridge_spool import BridgeSpool
+from bridge_socket import BridgeSocketServer
+from monitor_pool import RequestPool
+from tracing import SpanLog
 
 # These would be your actual MCP tools in Claude Desktop
 # For example: calendar, email, file_manager, web_browser, etc.
 
+# Fixed example replies; the voice bridge pre-synthesizes them
+CANNED_REPLIES = {
+    "calendar": "I've checked your calendar. You have 3 meetings today: Team standup at 9 AM, Client call at 2 PM, and Strategy review at 4 PM.",
+    "email": "I'll draft that email for you. The email about the project update has been prepared and is ready for your review.",
+    "tasks": "I've added that to your task list. The task 'Review quarterly report' has been created with a due date of Friday.",
+    "files": "I found 3 documents matching your search. The most recent is 'Q4 Sales Report' modified yesterday.",
+    "search": "I've searched for that information. Here's what I found: [search results would appear here]"
+}
+
+def build_response(request, response):
+    return {
+        "request_id": request['id'],
+        "timestamp": datetime.now().isoformat(),
+        "message": response,
+        "status": "complete"
+    }
+
+def handle_request(request):
+    """Process one voice command on a worker thread"""
+    print(f"\n📥 Voice command: {request['message']}")
+    response = process_voice_command(request['message'])
+    print(f"📤 Response: {response[:100]}...")
+    return build_response(request, response)
+
+def create_pool():
+    trace_log = os.getenv("NOVA_TRACE_LOG")
+    pool = RequestPool(
+        handle_request,
+        workers=int(os.getenv("NOVA_MONITOR_WORKERS", "4")),
+        timeout=float(os.getenv("NOVA_REQUEST_TIMEOUT", "25")),
+        span_log=SpanLog(trace_log, "monitor") if trace_log else None
+    )
+    print(f"Workers: {pool.workers}")
+    if trace_log:
+        print(f"Tracing to: {trace_log}")
+    return pool
+
+def submit(pool, request, send):
+    pool.submit(request, send)
+    print(f"📊 Queue: {pool.format_stats()}")
+
+def write_output(output_file, lock):
+    def send(record):
+        with lock:
+            output_file.write_text(json.dumps(record, indent=2))
+    return send
+
+def monitor_nova_voice_spool(spool_dir="voice_bridge/mcp_bridge/spool"):
+    """Process queued voice commands from the spool directory, oldest first"""
+    spool = BridgeSpool(spool_dir)
+    watcher = FileWatcher(spool.requests_dir)
+    last_gc = 0
+    
+    print("🎙️ Nova Voice Bridge Active (spool mode)")
+    print("Listening for voice commands...")
+    pool = create_pool()
+    
+    while True:
+        try:
+            request = spool.claim_next()
+            while request is not None:
+                submit(pool, request, lambda record, request=request: spool.respond(request, record))
+                request = spool.claim_next()
+            
+            for request_id in spool.take_cancellations():
+                pool.cancel(request_id)
+            
+            if time.time() - last_gc > 60:
+                last_gc = time.time()
+                spool.collect_garbage()
+            
+            # Sleep until a new request is queued
+            watcher.wait(timeout=1.0)
+            
+        except KeyboardInterrupt:
+            print("\n👋 Nova Voice Bridge stopped")
+            break
+        except Exception as e:
+            print(f"Error: {e}")
+            time.sleep(1)
+    
+    pool.shutdown()
+
+def monitor_nova_voice_socket(socket_path="voice_bridge/mcp_bridge/nova.sock"):
+    """Serve voice commands sent by the voice bridge over a Unix domain socket"""
+    print("🎙️ Nova Voice Bridge Active (socket mode)")
+    print("Listening for voice commands...")
+    pool = create_pool()
+    server = BridgeSocketServer(socket_path, handle_request, dispatch=lambda request, send: submit(pool, request, send),
+                                cancel=pool.cancel)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Nova Voice Bridge stopped")
+    finally:
+        server.server_close()
+        pool.shutdown()
+
 def monitor_nova_voice():
     """Monitor for voice commands and process them with MCP tools"""
     input_file = Path("voice_bridge/mcp_bridge/nova_input.txt")
     output_file = Path("voice_bridge/mcp_bridge/nova_output.txt")
     last_request_id = None
+    watcher = FileWatcher(input_file)
+    write_lock = threading.Lock()
     
     print("🎙️ Nova Voice Bridge Active")
     print("Listening for voice commands...")
+    pool = create_pool()
     
     while True:
         try:
@@ -33,29 +147,16 @@ def monitor_nova_voice():
                         # Process new requests only
                         if request.get('id') != last_request_id:
                             last_request_id = request['id']
-                            message = request['message']
                             
-                            print(f"\n📥 Voice command: {message}")
-                            
-                            # Process the command
+                            # Process the command on a worker and write the response
                             # In Claude Desktop, you would use actual MCP tools here
-                            response = process_voice_command(message)
-                            
-                            # Write response
-                            response_data = {
-                                "request_id": request['id'],
-                                "timestamp": datetime.now().isoformat(),
-                                "message": response,
-                                "status": "complete"
-                            }
-                            
-                            output_file.write_text(json.dumps(response_data, indent=2))
-                            print(f"📤 Response: {response[:100]}...")
+                            submit(pool, request, write_output(output_file, write_lock))
                             
                     except json.JSONDecodeError:
                         pass
             
-            time.sleep(0.5)
+            # Sleep until nova_input.txt is written again
+            watcher.wait(timeout=1.0)
             
         except KeyboardInterrupt:
             print("\n👋 Nova Voice Bridge stopped")
@@ -63,6 +164,8 @@ def monitor_nova_voice():
         except Exception as e:
             print(f"Error: {e}")
             time.sleep(1)
+    
+    pool.shutdown()
 
 def process_voice_command(command):
     """Process voice commands using Claude's capabilities and MCP tools
@@ -75,31 +178,31 @@ def process_voice_command(command):
     if any(word in command_lower for word in ['calendar', 'schedule', 'meeting', 'appointment']):
         # Example: Use MCP calendar tool
         # result = mcp_calendar.get_events(date="today")
-        return "I've checked your calendar. You have 3 meetings today: Team standup at 9 AM, Client call at 2 PM, and Strategy review at 4 PM."
+        return CANNED_REPLIES["calendar"]
     
     # Email commands
     elif any(word in command_lower for word in ['email', 'mail', 'send message']):
         # Example: Use MCP email tool
         # result = mcp_email.send(to="...", subject="...", body="...")
-        return "I'll draft that email for you. The email about the project update has been prepared and is ready for your review."
+        return CANNED_REPLIES["email"]
     
     # Task management
     elif any(word in command_lower for word in ['task', 'todo', 'reminder']):
         # Example: Use MCP task tool
         # result = mcp_tasks.create(title="...", due_date="...")
-        return "I've added that to your task list. The task 'Review quarterly report' has been created with a due date of Friday."
+        return CANNED_REPLIES["tasks"]
     
     # File operations
     elif any(word in command_lower for word in ['file', 'document', 'open', 'find']):
         # Example: Use MCP file tool
         # result = mcp_files.search(query="...")
-        return "I found 3 documents matching your search. The most recent is 'Q4 Sales Report' modified yesterday."
+        return CANNED_REPLIES["files"]
     
     # Web search
     elif any(word in command_lower for word in ['search', 'look up', 'find online']):
         # Example: Use MCP web browser
         # result = mcp_browser.search(query="...")
-        return "I've searched for that information. Here's what I found: [search results would appear here]"
+        return CANNED_REPLIES["search"]
     
     # Default - use Claude's general capabilities
     else:
@@ -113,4 +216,9 @@ if __name__ == "__main__":
         output_file.write_text("")
     
     # Start monitoring
-    monitor_nova_voice()
\ No newline at end of file
+    if os.getenv("NOVA_BRIDGE_MODE") == "spool":
+        monitor_nova_voice_spool()
+    elif os.getenv("NOVA_BRIDGE_MODE") == "socket":
+        monitor_nova_voice_socket()
+    else:
+        monitor_nova_voice()
\ No newline at end of file
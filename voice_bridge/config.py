@@ -8,13 +8,137 @@ class Config:
     ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
     
     DEEPGRAM_MODEL = "nova-2"
+    # Point at another Deepgram-compatible endpoint, e.g. the stand-in STT
+    # server in benchmarks/fakes.py
+    DEEPGRAM_URL = os.getenv("DEEPGRAM_URL", "")
     ELEVENLABS_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"  # Rachel voice
+    ELEVENLABS_MODEL_ID = "eleven_monolingual_v1"
+    
+    # Send TTS audio to the browser as ElevenLabs produces it instead of
+    # waiting for the whole response to be synthesized
+    TTS_STREAMING = os.getenv("TTS_STREAMING", "true").lower() == "true"
+    
+    # Split long responses at sentence boundaries and synthesize up to
+    # TTS_WORKERS chunks concurrently, delivering them in order
+    TTS_SENTENCE_CHUNKING = os.getenv("TTS_SENTENCE_CHUNKING", "true").lower() == "true"
+    TTS_WORKERS = int(os.getenv("TTS_WORKERS", "3"))
+    TTS_MIN_CHUNK_CHARS = 40
+    
+    # Allow clients to negotiate raw binary audio frames instead of
+    # base64-encoded JSON messages (see audio_framing.py)
+    BINARY_AUDIO = os.getenv("BINARY_AUDIO", "true").lower() == "true"
+    
+    # MCP bridge transport: "file" (single nova_input.txt / nova_output.txt),
+    # "spool" (one file per request; see bridge_spool.py) or "socket" (Unix
+    # domain socket; see bridge_socket.py). Monitors read the same
+    # NOVA_BRIDGE_MODE variable.
+    BRIDGE_MODE = os.getenv("NOVA_BRIDGE_MODE", "file")
+    BRIDGE_SPOOL_DIR = "mcp_bridge/spool"
+    BRIDGE_SOCKET_PATH = "mcp_bridge/nova.sock"
+    
+    # Show and speak replies while the monitor is still producing them
+    # (partial responses; see bridge_protocol.py). Requires TTS_STREAMING.
+    BRIDGE_STREAMING = os.getenv("BRIDGE_STREAMING", "true").lower() == "true"
+    
+    # Answer repeated questions (calendar, inbox, tasks) from a cache instead
+    # of another bridge round trip; see response_cache.py for the rules
+    RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "false").lower() == "true"
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(1024 * 1024)))
+    
+    # Keep synthesized audio (memory LRU + memory-mapped files on disk, see
+    # audio_cache.py) and pre-synthesize stock phrases at startup
+    AUDIO_CACHE = os.getenv("AUDIO_CACHE", "true").lower() == "true"
+    AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "audio_cache")
+    AUDIO_CACHE_MEMORY_BYTES = int(os.getenv("AUDIO_CACHE_MEMORY_BYTES", str(16 * 1024 * 1024)))
+    AUDIO_CACHE_DISK_BYTES = int(os.getenv("AUDIO_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+    AUDIO_CACHE_PREWARM = os.getenv("AUDIO_CACHE_PREWARM", "true").lower() == "true"
+    
+    # Barge-in: when the user starts speaking (Deepgram VAD or interim
+    # results) the response in progress is cancelled and playback flushed
+    BARGE_IN = os.getenv("BARGE_IN", "true").lower() == "true"
+    
+    # Finals that arrive while a turn is running are queued (see
+    # utterance_queue.py). Finals less than UTTERANCE_WINDOW_MS apart are
+    # merged into one request; UTTERANCE_QUEUE_POLICY ("merge",
+    # "drop_oldest" or "drop_newest") applies once UTTERANCE_QUEUE_SIZE wait
+    UTTERANCE_WINDOW_MS = int(os.getenv("UTTERANCE_WINDOW_MS", "1000"))
+    UTTERANCE_QUEUE_SIZE = int(os.getenv("UTTERANCE_QUEUE_SIZE", "3"))
+    UTTERANCE_QUEUE_POLICY = os.getenv("UTTERANCE_QUEUE_POLICY", "merge")
+    
+    # Let clients that ask for it send Opus from MediaRecorder instead of
+    # linear PCM (binary framing only). Deepgram decodes the container
+    # itself; the VAD gate only applies to PCM.
+    OPUS_UPLINK = os.getenv("OPUS_UPLINK", "true").lower() == "true"
+    
+    # Keep STT_POOL_SIZE live transcription connections open so a new
+    # session doesn't wait for the handshake (see stt_pool.py). Idle ones get
+    # a KeepAlive every STT_POOL_CHECK_INTERVAL seconds; 0 disables the pool.
+    STT_POOL_SIZE = int(os.getenv("STT_POOL_SIZE", "2"))
+    STT_POOL_CHECK_INTERVAL = float(os.getenv("STT_POOL_CHECK_INTERVAL", "5"))
+    STT_POOL_MAX_IDLE = float(os.getenv("STT_POOL_MAX_IDLE", "300"))
+    STT_POOL_OPUS_SIZE = int(os.getenv("STT_POOL_OPUS_SIZE", "1"))
+    
+    # Only forward speech to Deepgram (see vad.py): frames below
+    # VAD_THRESHOLD_DB (or close to the noise floor) are held back, apart
+    # from VAD_PRE_ROLL_MS before and VAD_HANG_OVER_MS after speech
+    VAD = os.getenv("VAD", "true").lower() == "true"
+    VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-45"))
+    VAD_PRE_ROLL_MS = int(os.getenv("VAD_PRE_ROLL_MS", "300"))
+    VAD_HANG_OVER_MS = int(os.getenv("VAD_HANG_OVER_MS", "600"))
+    
+    # Keep conversations in SQLite (see session_store.py) so a reload or
+    # reconnect resumes with the last SESSION_RESUME_MESSAGES messages.
+    # Sessions idle for SESSION_TTL_HOURS are deleted.
+    SESSION_STORE = os.getenv("SESSION_STORE", "true").lower() == "true"
+    SESSION_DB = os.getenv("SESSION_DB", "sessions.db")
+    SESSION_RESUME_MESSAGES = int(os.getenv("SESSION_RESUME_MESSAGES", "20"))
+    SESSION_TTL_HOURS = float(os.getenv("SESSION_TTL_HOURS", "24"))
+    
+    # Attach the MEMORY_INDEX_K chunks of the memory documents, checkpoints
+    # and earlier turns that best match each request (BM25, see
+    # memory_index.py). Files under MEMORY_INDEX_PATHS are re-indexed when
+    # they change, checked every MEMORY_INDEX_REFRESH seconds.
+    MEMORY_INDEX = os.getenv("MEMORY_INDEX", "false").lower() == "true"
+    MEMORY_INDEX_DB = os.getenv("MEMORY_INDEX_DB", "memory_index.db")
+    MEMORY_INDEX_PATHS = os.getenv("MEMORY_INDEX_PATHS", "../memory,../docs").split(",")
+    MEMORY_INDEX_K = int(os.getenv("MEMORY_INDEX_K", "3"))
+    MEMORY_INDEX_REFRESH = float(os.getenv("MEMORY_INDEX_REFRESH", "30"))
+    # Reads checkpoints with their journal; without it only snapshots are indexed
+    MEMORY_CHECKPOINT_JOURNAL = os.getenv("MEMORY_CHECKPOINT_JOURNAL", "../memory/checkpoint_journal.py")
+    
+    # Append the spans of every turn to this file (JSON lines; see
+    # tracing.py). Monitors log their side with NOVA_TRACE_LOG, and
+    # trace_waterfall.py merges both. Empty disables the log.
+    TRACE_LOG = os.getenv("TRACE_LOG", "")
+    
+    # Log level of the bridge's own modules; third-party libraries log at
+    # LIBRARY_LOG_LEVEL. With LOG_BACKGROUND a separate thread formats and
+    # writes the records, and the per-audio-chunk debug lines are logged at
+    # most once every LOG_SAMPLE_INTERVAL seconds per session (0 logs every
+    # one; see log_setup.py)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+    LIBRARY_LOG_LEVEL = os.getenv("LIBRARY_LOG_LEVEL", "INFO").upper()
+    LOG_BACKGROUND = os.getenv("LOG_BACKGROUND", "true").lower() == "true"
+    LOG_SAMPLE_INTERVAL = float(os.getenv("LOG_SAMPLE_INTERVAL", "1.0"))
+    
+    # Serve with WORKERS uvicorn processes. A session stays on the worker
+    # that accepted its websocket, and bridge responses return to the
+    # worker that sent the request, so this needs NOVA_BRIDGE_MODE=spool or
+    # socket. Each worker has its own STT pool, TTS client and caches, and
+    # publishes its latency metrics to METRICS_DIR for /metrics to merge.
+    WORKERS = int(os.getenv("WORKERS", "1"))
+    METRICS_DIR = os.getenv("METRICS_DIR", "metrics")
     
     HOST = "0.0.0.0"
     PORT = 8000
     
     MAX_CONTEXT_MESSAGES = 20
     MAX_MESSAGE_LENGTH = 1000
+    # Keep context under this many (estimated) tokens, folding older turns
+    # into a summary of at most CONTEXT_SUMMARY_TOKENS; 0 keeps the newest
+    # MAX_CONTEXT_MESSAGES and drops the rest
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "0"))
+    CONTEXT_SUMMARY_TOKENS = int(os.getenv("CONTEXT_SUMMARY_TOKENS", "300"))
     
     AUDIO_SAMPLE_RATE = 16000
     AUDIO_CHANNELS = 1
@@ -25,4 +149,7 @@ class Config:
             raise ValueError("DEEPGRAM_API_KEY not found in environment")
         if not cls.ELEVENLABS_API_KEY:
             raise ValueError("ELEVENLABS_API_KEY not found in environment")
+        if cls.WORKERS > 1 and cls.BRIDGE_MODE == "file":
+            raise ValueError("WORKERS > 1 needs NOVA_BRIDGE_MODE=spool or socket: "
+                             "the bridge files hold one request at a time")
         return True
\ No newline at end of file
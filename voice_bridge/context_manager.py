@@ -1,26 +1,184 @@
 from collections import deque
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
+import os
+import re
+import uuid
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: about four characters per token, plus framing."""
+    return (len(text) + 3) // 4 + 4
+
+
+def extractive_summary(summary: str, evicted: List[Dict[str, str]], max_chars: int = 120) -> str:
+    """Append one line per evicted message: its first sentence, clipped."""
+    lines = [summary] if summary else []
+    for msg in evicted:
+        first = _SENTENCE_END.split(msg["content"].strip(), 1)[0]
+        if len(first) > max_chars:
+            first = first[:max_chars].rsplit(" ", 1)[0] + "..."
+        speaker = "User" if msg["role"] == "user" else "Assistant"
+        lines.append(f"{speaker}: {first}")
+    return "\n".join(lines)
+
+
+def format_snippets(snippets: List[dict]) -> str:
+    lines = ["Relevant notes from memory:"]
+    for snippet in snippets:
+        source = snippet["source"]
+        origin = "earlier conversation" if source.startswith("turn:") else os.path.basename(source)
+        lines.append(f"- ({origin}) {snippet['text']}")
+    return "\n".join(lines)
+
 
 class ContextManager:
-    def __init__(self, max_messages: int = 20, max_length: int = 1000):
+    """Conversation history sent along with each request.
+    
+    By default the newest ``max_messages`` messages are kept and older ones
+    dropped. With ``token_budget`` set, messages are kept while their
+    estimated token count fits the budget. Older ones are folded into a
+    rolling summary by ``summarizer(summary, evicted)``, capped at
+    ``summary_tokens``, and sent as a leading system message.
+    
+    ``get_context`` returns a cached list that is rebuilt only when the
+    messages change. Callers must not modify it.
+    
+    After ``attach(store, token)`` every change is also written to a
+    SessionStore, so the conversation can be resumed after a reconnect.
+    
+    With a MemoryIndex every turn is also indexed (in the index's writer
+    thread), and ``relevant_snippets(query)`` finds the ``memory_snippets``
+    best matching chunks of memory documents and earlier turns, to be passed
+    to ``get_context``.
+    """
+    
+    def __init__(self, max_messages: int = 20, max_length: int = 1000, token_budget: Optional[int] = None,
+                 summary_tokens: int = 300, summarizer: Callable[[str, List[Dict[str, str]]], str] = extractive_summary,
+                 memory_index=None, memory_snippets: int = 3):
         self.max_messages = max_messages
         self.max_length = max_length
-        self.messages: deque = deque(maxlen=max_messages)
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        self.messages: deque = deque(maxlen=None if token_budget else max_messages)
+        self.message_tokens = 0
+        self.summary = ""
+        self.summarized_messages = 0
+        self._context = None
+        self.store = None
+        self.session_token = None
+        self.memory_index = memory_index
+        self.memory_snippets = memory_snippets
+        self.turn_prefix = f"turn:{uuid.uuid4().hex}:"
         self.session_start = datetime.now()
     
-    def add_message(self, role: str, content: str) -> None:
+    def attach(self, store, token: str, messages: List[Dict[str, str]] = (), summary: str = "") -> None:
+        """Persist to ``store`` under ``token``, continuing from ``messages`` and ``summary``."""
+        self.store = None  # restoring is not a change to write back
+        self.clear()
+        self.summary = summary
+        for msg in messages:
+            tokens = estimate_tokens(msg["content"])
+            self.messages.append({**msg, "tokens": tokens})
+            self.message_tokens += tokens
+        self.store = store
+        self.session_token = token
+        self.turn_prefix = f"turn:{token}:"
+        if self.token_budget:
+            self._fold_old_messages()
+        elif len(messages) > self.max_messages:
+            # The deque dropped the oldest; recount what is left
+            self.message_tokens = sum(msg["tokens"] for msg in self.messages)
+    
+    def _truncate(self, content: str) -> str:
         if len(content) > self.max_length:
             content = content[:self.max_length] + "..."
-        
+        return content
+    
+    def add_message(self, role: str, content: str) -> None:
+        content = self._truncate(content)
+    
+        if not self.token_budget and len(self.messages) == self.max_messages:
+            self.message_tokens -= self.messages[0]["tokens"]
+        tokens = estimate_tokens(content)
+        timestamp = datetime.now().isoformat()
         self.messages.append({
             "role": role,
             "content": content,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp,
+            "tokens": tokens
         })
+        self.message_tokens += tokens
+        if self.store:
+            self.store.append(self.session_token, role, content, timestamp)
+        if self.memory_index:
+            self.memory_index.queue_add(self.turn_prefix + timestamp, [content])
+        if self.token_budget:
+            self._fold_old_messages()
+        self._context = None
+    
+    def _fold_old_messages(self):
+        evicted = []
+        # The newest message always stays, even if it alone exceeds the budget
+        while len(self.messages) > 1 and (
+                len(self.messages) > self.max_messages or self.token_count > self.token_budget):
+            msg = self.messages.popleft()
+            self.message_tokens -= msg["tokens"]
+            evicted.append(msg)
+        if evicted:
+            self.summary = self._cap_summary(self.summarizer(self.summary, evicted))
+            self.summarized_messages += len(evicted)
+            if self.store:
+                self.store.set_summary(self.session_token, self.summary)
+    
+    def _cap_summary(self, summary: str) -> str:
+        # Oldest lines go first once the summary outgrows its share
+        max_chars = (self.summary_tokens - 4) * 4
+        while len(summary) > max_chars and "\n" in summary:
+            summary = summary.split("\n", 1)[1]
+        return summary[-max_chars:] if len(summary) > max_chars else summary
+    
+    @property
+    def token_count(self) -> int:
+        return self.message_tokens + (estimate_tokens(self.summary) if self.summary else 0)
+    
+    def remove_last(self, role: str, content: str) -> bool:
+        """Remove the newest message if it is ``content`` from ``role``."""
+        content = self._truncate(content)
+        if self.messages and self.messages[-1]["role"] == role and self.messages[-1]["content"] == content:
+            msg = self.messages.pop()
+            self.message_tokens -= msg["tokens"]
+            self._context = None
+            if self.store:
+                self.store.remove_last(self.session_token)
+            if self.memory_index:
+                self.memory_index.queue_remove(self.turn_prefix + msg["timestamp"])
+            return True
+        return False
+    
+    def relevant_snippets(self, query: str) -> List[dict]:
+        """Memory chunks matching ``query``, leaving out messages already in the context.
+        Blocks on the index; call it off the event loop."""
+        if not self.memory_index or not self.memory_snippets:
+            return []
+        exclude = [msg["content"] for msg in self.messages]
+        return self.memory_index.search(query, self.memory_snippets, exclude)
     
-    def get_context(self) -> List[Dict[str, str]]:
-        return [{"role": msg["role"], "content": msg["content"]} for msg in self.messages]
+    def get_context(self, snippets: Optional[List[dict]] = None) -> List[Dict[str, str]]:
+        if self._context is None:
+            context = []
+            if self.summary:
+                context.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+            context.extend({"role": msg["role"], "content": msg["content"]} for msg in self.messages)
+            self._context = context
+        if snippets:
+            # Per request, so not part of the cached list
+            at = 1 if self.summary else 0
+            return self._context[:at] + [{"role": "system", "content": format_snippets(snippets)}] + self._context[at:]
+        return self._context
     
     def get_recent_context(self, n: int = 5) -> List[Dict[str, str]]:
         recent = list(self.messages)[-n:]
@@ -28,7 +186,15 @@ class ContextManager:
     
     def clear(self) -> None:
         self.messages.clear()
+        self.message_tokens = 0
+        self.summary = ""
+        self.summarized_messages = 0
+        self._context = None
         self.session_start = datetime.now()
+        if self.store:
+            self.store.clear(self.session_token)
+        if self.memory_index:
+            self.memory_index.queue_remove(self.turn_prefix, prefix=True)
     
     def get_session_duration(self) -> float:
         return (datetime.now() - self.session_start).total_seconds()
@@ -38,5 +204,8 @@ class ContextManager:
             "message_count": len(self.messages),
             "session_duration": self.get_session_duration(),
             "oldest_message": self.messages[0]["timestamp"] if self.messages else None,
-            "newest_message": self.messages[-1]["timestamp"] if self.messages else None
+            "newest_message": self.messages[-1]["timestamp"] if self.messages else None,
+            "tokens": self.token_count,
+            "token_budget": self.token_budget,
+            "summarized_messages": self.summarized_messages
         }
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""Change notification for the MCP bridge files.
+
+FileWatcher wakes a waiting coroutine or thread as soon as a watched file (or
+any entry of a watched directory) is written, instead of re-reading it on a
+fixed poll interval. On Linux it uses inotify through ctypes; elsewhere, or
+if inotify is unavailable, it falls back to comparing os.stat() signatures
+(mtime, size, inode) every ``poll_interval`` seconds.
+
+Usage follows a check-then-wait pattern. The watcher is created before the
+first check, so a write that lands between the check and the wait is not
+missed:
+
+    watcher = FileWatcher(path)
+    while not done():
+        watcher.wait(timeout=1.0)
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None and sys.platform.startswith("linux"):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            _libc = libc
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+
+class FileWatcher:
+    def __init__(self, path, poll_interval: float = 0.05, use_inotify: bool = True):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self.is_directory = self.path.is_dir()
+        self._fd = None
+        self._name = None if self.is_directory else os.fsencode(self.path.name)
+        self._signature = self._stat_signature()
+
+        libc = _load_libc() if use_inotify else None
+        if libc is not None:
+            self._fd = self._open_inotify(libc)
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._fd is not None else "stat"
+
+    def _open_inotify(self, libc) -> Optional[int]:
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        # Watch the directory rather than the file itself so that files which
+        # are replaced by rename (or created later) are still seen.
+        directory = self.path if self.is_directory else self.path.parent
+        if libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _stat_signature(self) -> Optional[Tuple]:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        if self.is_directory:
+            # Directory mtime changes when entries are created or renamed in;
+            # in-place rewrites of entries are caught by the newest entry mtime.
+            newest = 0
+            for entry in os.scandir(self.path):
+                try:
+                    if entry.is_file():
+                        newest = max(newest, entry.stat().st_mtime_ns)
+                except OSError:
+                    continue  # consumed (taken, withdrawn, claimed) since the scan
+            return st.st_mtime_ns, newest
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _drain(self) -> bool:
+        """Read queued inotify events; True if any concerned the watched path."""
+        relevant = False
+        while True:
+            try:
+                data = os.read(self._fd, 4096)
+            except BlockingIOError:
+                return relevant
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            offset = 0
+            while offset < len(data):
+                _, _, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b"\0")
+                offset += name_len
+                if self._name is None or name == self._name:
+                    relevant = True
+
+    def _poll_changed(self) -> bool:
+        signature = self._stat_signature()
+        if signature != self._signature:
+            self._signature = signature
+            return True
+        return False
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the watched path changes. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._fd is not None:
+                readable, _, _ = select.select([self._fd], [], [], remaining)
+                if readable and self._drain():
+                    return True
+            else:
+                if self._poll_changed():
+                    return True
+                time.sleep(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    async def wait_async(self, timeout: Optional[float] = None) -> bool:
+        """Wait on the event loop until the watched path changes. False on timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        if self._fd is None:
+            while True:
+                if self._poll_changed():
+                    return True
+                if deadline is not None and loop.time() >= deadline:
+                    return False
+                delay = self.poll_interval if deadline is None else min(self.poll_interval, deadline - loop.time())
+                await asyncio.sleep(max(0.0, delay))
+
+        while True:
+            changed = loop.create_future()
+            loop.add_reader(self._fd, lambda: changed.done() or changed.set_result(None))
+            try:
+                remaining = None if deadline is None else max(0.0, deadline - loop.time())
+                await asyncio.wait_for(changed, remaining)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                if self._fd is not None:  # close() already removed it
+                    loop.remove_reader(self._fd)
+            if self._fd is None:
+                return False  # closed while waiting
+            if self._drain():
+                return True
+
+    def close(self):
+        if self._fd is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self._fd)
+            except RuntimeError:
+                pass  # not closed from the event loop
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
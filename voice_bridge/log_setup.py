@@ -0,0 +1,80 @@
+"""Logging for the voice bridge.
+
+``configure_logging`` replaces ``logging.basicConfig``. With ``background``
+set, records are handed to a QueueListener thread, which formats and writes
+them, so the event loop only pays for a queue put. Records are queued
+unformatted (the whole process shares the queue, nothing is pickled), so
+arguments are formatted later, in that thread: pass values, not objects
+that change afterwards.
+
+Third-party libraries (the websockets client under the Deepgram SDK logs
+every frame at DEBUG) get ``library_level`` instead of ``level``.
+
+``SampledLog`` is for the per-chunk debug lines of the audio path: each
+message is logged at most once every ``interval`` seconds per session, the
+next one saying how many were skipped, and nothing at all is formatted
+while its level is disabled.
+"""
+
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LIBRARY_LOGGERS = ("asyncio", "websockets", "deepgram", "httpx", "httpcore", "elevenlabs", "watchdog")
+
+
+class _DeferredQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # QueueHandler formats the message here, in the calling thread; leave
+        # that to the listener
+        return record
+
+
+def configure_logging(level="DEBUG", library_level="INFO", background: bool = True,
+                      stream=None) -> Optional[QueueListener]:
+    """Set up the root logger to write to ``stream`` (stderr by default).
+    Returns the listener to stop at shutdown, if any."""
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    root = logging.getLogger()
+    root.setLevel(level)
+    for name in LIBRARY_LOGGERS:
+        logging.getLogger(name).setLevel(library_level)
+
+    if not background:
+        root.addHandler(handler)
+        return None
+    records = queue.SimpleQueue()
+    root.addHandler(_DeferredQueueHandler(records))
+    listener = QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+class SampledLog:
+    """Rate-limited logging of recurring messages, keyed by the message template."""
+
+    def __init__(self, logger: logging.Logger, interval: float = 1.0, level: int = logging.DEBUG):
+        self.logger = logger
+        self.interval = interval
+        self.level = level
+        self.last = {}
+        self.skipped = {}
+
+    def log(self, msg: str, *args):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        if self.interval:
+            now = time.monotonic()
+            last = self.last.get(msg)
+            if last is not None and now - last < self.interval:
+                self.skipped[msg] = self.skipped.get(msg, 0) + 1
+                return
+            self.last[msg] = now
+        skipped = self.skipped.pop(msg, 0)
+        if skipped:
+            msg += " (%d more since the last one)"
+            args += (skipped,)
+        self.logger.log(self.level, msg, *args)
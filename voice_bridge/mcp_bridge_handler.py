@@ -1,147 +1,142 @@
 """MCP Bridge Handler for Nova Voice Interface
 
-This module handles communication between the voice interface and Claude Desktop
-using text files as a bridge. It implements a request-response pattern with
-proper timing, file locking, and error handling.
+This module handles communication between the voice interface and Claude Desktop.
+It implements a request-response pattern with proper timing and error handling
+on top of a pluggable transport (see bridge_transport.py):
+
+- "file": text files as a bridge, with file locking. Responses are picked up
+  as soon as the output file is written (see file_watcher.py).
+- "spool": one file per request and per response (see bridge_spool.py), so
+  concurrent sessions can have requests in flight at the same time.
+- "socket": length-prefixed JSON frames over a Unix domain socket with a
+  persistent, multiplexed connection (see bridge_socket.py).
+
+Monitors may stream a reply as partial records (see bridge_protocol.py);
+``stream_from_claude`` yields the text as it arrives, while ``send_to_claude``
+waits for the whole reply.
+
+With a ResponseCache (see response_cache.py) cacheable questions are answered
+from the cache without a round trip. A monitor can invalidate cached intents
+by listing them in the ``invalidate`` field of its final record.
 """
 
-import json
-import time
-import os
 import asyncio
-from pathlib import Path
 import logging
+import time
 from datetime import datetime
-import fcntl
+from typing import AsyncIterator, Callable, Optional
 import uuid
+from bridge_protocol import FINAL_STATUSES, ResponseAssembler
+from bridge_transport import BridgeTransport, FileTransport, SpoolTransport, UnixSocketTransport
+from response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
+TIMEOUT_REPLY = "I'm taking too long to think. Please try again."
+
+def create_transport(mode: str = "file", input_file="mcp_bridge/nova_input.txt",
+                     output_file="mcp_bridge/nova_output.txt", spool_dir="mcp_bridge/spool",
+                     socket_path="mcp_bridge/nova.sock", use_watcher=True) -> BridgeTransport:
+    """Create the transport for one session."""
+    if mode == "file":
+        return FileTransport(input_file, output_file, use_watcher=use_watcher)
+    elif mode == "spool":
+        return SpoolTransport(spool_dir, use_watcher=use_watcher)
+    elif mode == "socket":
+        return UnixSocketTransport.shared(socket_path)
+    raise ValueError(f"Unknown MCP bridge mode: {mode}")
+
 class MCPBridgeHandler:
-    def __init__(self, input_file="mcp_bridge/nova_input.txt", output_file="mcp_bridge/nova_output.txt"):
-        self.input_file = Path(input_file)
-        self.output_file = Path(output_file)
+    def __init__(self, input_file="mcp_bridge/nova_input.txt", output_file="mcp_bridge/nova_output.txt",
+                 use_watcher=True, spool_dir=None, transport: BridgeTransport = None,
+                 session_id: str = None, cache: ResponseCache = None):
         self.timeout = 30  # seconds to wait for response
-        self.poll_interval = 0.1  # seconds between polling attempts
+        # Lets the monitor answer one session's requests in order
+        self.session_id = session_id or str(uuid.uuid4())
+        self.cache = cache
         
-        # Ensure directories exist
-        self.input_file.parent.mkdir(parents=True, exist_ok=True)
-        self.output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Initialize files if they don't exist
-        if not self.input_file.exists():
-            self.input_file.write_text("")
-        if not self.output_file.exists():
-            self.output_file.write_text("")
+        if transport is None:
+            if spool_dir:
+                transport = SpoolTransport(spool_dir, use_watcher=use_watcher)
+            else:
+                transport = FileTransport(input_file, output_file, use_watcher=use_watcher)
+        self.transport = transport
     
-    async def send_to_claude(self, message: str, context: list = None) -> str:
+    async def send_to_claude(self, message: str, context: list = None,
+                             on_sent: Optional[Callable[[], None]] = None, trace: Optional[dict] = None) -> str:
         """Send a message to Claude via the MCP bridge and wait for response."""
+        pieces = []
+        async for piece in self.stream_from_claude(message, context, on_sent, trace):
+            pieces.append(piece)
+        return "".join(pieces)
+    
+    async def stream_from_claude(self, message: str, context: list = None,
+                                 on_sent: Optional[Callable[[], None]] = None,
+                                 trace: Optional[dict] = None) -> AsyncIterator[str]:
+        """Send a message to Claude and yield the reply text as it arrives.
+        ``on_sent`` is called once the request has been written; ``trace``
+        (trace and span id, see tracing.py) is passed on to the monitor."""
+        if self.cache:
+            cached = self.cache.get(message, context)
+            if cached is not None:
+                logger.info(f"Answered from response cache: {message[:50]}")
+                yield cached
+                return
+        
         request_id = str(uuid.uuid4())
         
         # Prepare the request
         request = {
             "id": request_id,
+            "session_id": self.session_id,
             "timestamp": datetime.now().isoformat(),
             "message": message,
             "context": context or [],
             "status": "pending"
         }
+        if trace:
+            request["trace"] = dict(trace, sent_at=time.time())
         
-        # Write to input file with file locking
+        assembler = ResponseAssembler()
+        final = None
         try:
-            with open(self.input_file, 'w') as f:
-                # Acquire exclusive lock
-                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                try:
-                    json.dump(request, f, indent=2)
-                    f.flush()
-                    os.fsync(f.fileno())
-                finally:
-                    # Release lock
-                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                    
-            logger.info(f"Sent request {request_id} to Claude")
-            
-            # Wait for response
-            response = await self._wait_for_response(request_id)
-            return response
-            
+            async for response_data in self.transport.exchange(request, self.timeout, on_sent):
+                if response_data.get("status") in FINAL_STATUSES:
+                    final = response_data
+                for piece in assembler.add(response_data):
+                    yield piece
+        except asyncio.CancelledError:
+            # Interrupted by the user: the monitor can stop working on it
+            if not assembler.done:
+                self.transport.cancel(request_id)
+            raise
         except Exception as e:
             logger.error(f"Error sending to Claude: {e}")
-            return f"I'm having trouble connecting to my brain. Please try again. (Error: {str(e)})"
-    
-    async def _wait_for_response(self, request_id: str) -> str:
-        """Poll the output file for a response with the matching request ID."""
-        start_time = time.time()
-        last_content = None
-        
-        while time.time() - start_time < self.timeout:
-            try:
-                # Read output file with shared lock
-                with open(self.output_file, 'r') as f:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_SH)
-                    try:
-                        content = f.read().strip()
-                    finally:
-                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                
-                # Check if content changed and is valid JSON
-                if content and content != last_content:
-                    try:
-                        response_data = json.loads(content)
-                        
-                        # Check if this is our response
-                        if response_data.get("request_id") == request_id:
-                            if response_data.get("status") == "complete":
-                                logger.info(f"Received response for {request_id}")
-                                
-                                # Clear the output file for next response
-                                with open(self.output_file, 'w') as f:
-                                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                                    try:
-                                        f.write("")
-                                        f.flush()
-                                        os.fsync(f.fileno())
-                                    finally:
-                                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                                
-                                return response_data.get("message", "No response message")
-                            elif response_data.get("status") == "error":
-                                return f"Error from Claude: {response_data.get('message', 'Unknown error')}"
-                    
-                    except json.JSONDecodeError:
-                        # Not valid JSON yet, keep waiting
-                        pass
-                    
-                    last_content = content
-                
-            except Exception as e:
-                logger.error(f"Error reading response: {e}")
-            
-            # Wait before polling again
-            await asyncio.sleep(self.poll_interval)
+            if not assembler.chunks:
+                yield f"I'm having trouble connecting to my brain. Please try again. (Error: {str(e)})"
+            return
         
-        # Timeout reached
-        logger.warning(f"Timeout waiting for response to {request_id}")
-        return "I'm taking too long to think. Please try again."
+        if assembler.done:
+            logger.info(f"Received response for {request_id}")
+            if self.cache:
+                self.cache.invalidate(*final.get("invalidate", ()))
+                if final.get("status") == "complete":
+                    self.cache.put(message, context, assembler.text)
+        else:
+            logger.warning(f"Timeout waiting for response to {request_id}")
+            if not assembler.chunks:
+                yield TIMEOUT_REPLY
     
     def clear_bridge_files(self):
         """Clear both bridge files - useful for initialization."""
+        if not isinstance(self.transport, FileTransport):
+            return
         try:
-            with open(self.input_file, 'w') as f:
-                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                try:
-                    f.write("")
-                finally:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                    
-            with open(self.output_file, 'w') as f:
-                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                try:
-                    f.write("")
-                finally:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                    
+            self.transport.clear()
             logger.info("Cleared bridge files")
         except Exception as e:
-            logger.error(f"Error clearing bridge files: {e}")
\ No newline at end of file
+            logger.error(f"Error clearing bridge files: {e}")
+    
+    def close(self):
+        """Release the transport's per-session resources."""
+        self.transport.close()
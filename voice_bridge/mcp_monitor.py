@@ -6,6 +6,7 @@ Watches for messages from voice bridge and simulates Nova responses
 import time
 import os
 from pathlib import Path
+from file_watcher import FileWatcher
 
 INPUT_FILE = Path("mcp_bridge/nova_input.txt")
 OUTPUT_FILE = Path("mcp_bridge/nova_output.txt")
@@ -15,6 +16,7 @@ print("Waiting for voice messages...")
 print("-" * 40)
 
 last_input = ""
+watcher = FileWatcher(INPUT_FILE)
 
 while True:
     try:
@@ -36,4 +38,5 @@ while True:
     except Exception as e:
         print(f"Error: {e}")
     
-    time.sleep(0.5)
\ No newline at end of file
+    # Wake as soon as the voice bridge writes a new message
+    watcher.wait(timeout=1.0)
\ No newline at end of file
@@ -0,0 +1,383 @@
+"""On-disk BM25 index over Nova's memory: documents, checkpoints and past turns.
+
+Instead of loading whole Memory Bank documents into the context, each
+request carries the few chunks that match what was just said:
+
+- Documents are split into chunks of at most ``chunk_chars`` characters at
+  paragraph boundaries. Checkpoints (``*.json``, read with their journal by
+  memory/checkpoint_journal.py, loaded from ``checkpoint_journal``) become
+  one line per task, step and decision.
+- Chunks and postings live in SQLite. Each posting stores the chunk's BM25
+  term weight (tf and length normalization, computed against the average
+  chunk length at the time it was indexed), and postings are keyed on
+  (term, weight, doc), with an index on doc for removal. A search reads only
+  the ``depth`` highest-weighted postings of each query term, newest IDF
+  applied, so its cost does not grow with the size of the index even for
+  terms that are in most chunks.
+  Document frequencies are mirrored in memory.
+- ``refresh`` re-indexes files whose mtime or size changed and drops deleted
+  ones, so keeping the index current costs a ``stat`` per file.
+- ``add``/``remove`` index single texts, such as conversation turns.
+- With ``shared`` set, other processes (the voice bridge's workers) write
+  to the same database. SQLite's ``data_version`` tells when one did; the
+  chunk count and file signatures are then re-read, and document
+  frequencies are looked up per query term until the next change.
+
+All methods are thread-safe. ``queue_add``/``queue_remove`` hand the write
+to the index's own writer thread and return at once, so they can be called
+from the event loop; ``search`` and ``refresh`` block and belong in a
+worker thread.
+"""
+
+import functools
+import heapq
+import importlib.util
+import json
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+# The checkpoint format (snapshot plus journal) is defined next to the checkpoints
+DEFAULT_CHECKPOINT_JOURNAL = Path(__file__).resolve().parent.parent / "memory" / "checkpoint_journal.py"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    text TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    norm REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS docs_source ON docs (source);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    weight REAL NOT NULL,
+    doc INTEGER NOT NULL,
+    PRIMARY KEY (term, weight, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    signature TEXT NOT NULL
+);
+"""
+
+DOCUMENT_SUFFIXES = (".md", ".txt", ".json")
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset("""
+a about after again all also am an and any are as at be because been before being but by can
+could did do does doing don't for from had has have having he her here hers him his how i i'm
+if in into is it it's its just let's me more most my no nor not now of off on once only or
+other our ours out over own please same she should so some such than that that's the their
+them then there these they this those through to too under until up very was we were what
+when where which while who whom why will with would you your yours
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def chunk_text(text: str, chunk_chars: int = 600) -> List[str]:
+    """Split at blank lines and headings, merging paragraphs up to ``chunk_chars``."""
+    chunks = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n|\n(?=#)", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        while len(paragraph) > chunk_chars:
+            cut = paragraph.rfind(" ", 0, chunk_chars)
+            cut = cut if cut > 0 else chunk_chars
+            chunks.append(paragraph[:cut])
+            paragraph = paragraph[cut:].strip()
+        if current and len(current) + len(paragraph) + 2 > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def checkpoint_chunks(state: dict) -> List[str]:
+    """One chunk per checkpoint entry, labelled with the field it came from."""
+    chunks = []
+    for key, value in state.items():
+        label = key.replace("_", " ")
+        if isinstance(value, list):
+            chunks.extend(f"{label}: {item}" for item in value if item)
+        elif isinstance(value, dict):
+            chunks.append(f"{label}: {json.dumps(value)}")
+        elif value not in (None, "") and key != "timestamp":
+            chunks.append(f"{label}: {value}")
+    return chunks
+
+
+class _SnapshotOnly:
+    """Stands in for checkpoint_journal when it can't be loaded: reads the
+    snapshot, without the changes journaled since."""
+
+    JOURNAL_SUFFIX = ".journal"
+
+    @staticmethod
+    def read_checkpoint(snapshot_file):
+        try:
+            with open(snapshot_file, "r") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None, 0
+        if isinstance(state, dict):
+            state.pop("journal_seq", None)
+        return state, 0
+
+
+@functools.lru_cache(maxsize=None)
+def load_checkpoint_journal(path: str):
+    """memory/checkpoint_journal.py, loaded from ``path`` without adding its
+    directory to sys.path."""
+    try:
+        spec = importlib.util.spec_from_file_location("checkpoint_journal", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except (OSError, ImportError) as e:
+        logger.warning(f"Memory index: no checkpoint journal at {path} ({e}); reading snapshots only")
+        return _SnapshotOnly
+    return module
+
+
+class MemoryIndex:
+    def __init__(self, path="memory_index.db", roots: Iterable[str] = (), chunk_chars: int = 600,
+                 depth: int = 500, k1: float = 1.2, b: float = 0.75, shared: bool = False,
+                 checkpoint_journal=DEFAULT_CHECKPOINT_JOURNAL):
+        self.path = str(path)
+        self.checkpoints = load_checkpoint_journal(str(checkpoint_journal))
+        self.roots = [Path(root) for root in roots]
+        self.chunk_chars = chunk_chars
+        self.depth = depth
+        self.k1 = k1
+        self.b = b
+        self.shared = shared
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.chunks, self.total_length = self.db.execute("SELECT COUNT(*), TOTAL(length) FROM docs").fetchone()
+        self.df: Dict[str, int] = dict(self.db.execute("SELECT term, df FROM terms"))
+        self.files: Dict[str, str] = dict(self.db.execute("SELECT path, signature FROM files"))
+        self.data_version = self.db.execute("PRAGMA data_version").fetchone()[0]
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-index")
+        self.searches = 0
+        self.search_ms = 0.0
+
+    # Writing
+
+    def add(self, source: str, texts: Iterable[str]) -> int:
+        """Index ``texts`` as chunks of ``source``, replacing what it had before."""
+        with self.lock, self.db:
+            self._sync()
+            self._remove(source)
+            return self._insert(source, texts)
+
+    def remove(self, source: str, prefix: bool = False) -> int:
+        """Drop the chunks of ``source`` (or of every source starting with it)."""
+        with self.lock, self.db:
+            self._sync()
+            return self._remove(source, prefix)
+
+    def queue_add(self, source: str, texts: Iterable[str]) -> Future:
+        return self.writer.submit(self.add, source, list(texts))
+
+    def queue_remove(self, source: str, prefix: bool = False) -> Future:
+        return self.writer.submit(self.remove, source, prefix)
+
+    def queue_refresh(self) -> Future:
+        return self.writer.submit(self.refresh)
+
+    def _sync(self):
+        """Catch up with writes by other processes (only with ``shared``)."""
+        if not self.shared:
+            return
+        version = self.db.execute("PRAGMA data_version").fetchone()[0]
+        if version == self.data_version:
+            return
+        self.data_version = version
+        self.chunks, self.total_length = self.db.execute("SELECT COUNT(*), TOTAL(length) FROM docs").fetchone()
+        self.df.clear()  # looked up again as terms are searched
+        self.files = dict(self.db.execute("SELECT path, signature FROM files"))
+
+    def _df(self, term: str) -> int:
+        df = self.df.get(term)
+        if df is None and self.shared:
+            row = self.db.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+            df = self.df[term] = row[0] if row else 0
+        return df
+
+    def _weight(self, tf: int, norm: float) -> float:
+        return tf * (self.k1 + 1) / (tf + norm)
+
+    def _insert(self, source: str, texts: Iterable[str]) -> int:
+        added = 0
+        for text in texts:
+            terms = Counter(tokenize(text))
+            if not terms:
+                continue
+            length = sum(terms.values())
+            self.chunks += 1
+            self.total_length += length
+            norm = self.k1 * (1 - self.b + self.b * length * self.chunks / self.total_length)
+            doc = self.db.execute("INSERT INTO docs (source, text, length, norm) VALUES (?, ?, ?, ?)",
+                                  (source, text, length, norm)).lastrowid
+            self.db.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                                ((term, self._weight(tf, norm), doc) for term, tf in terms.items()))
+            self._count_terms(terms, 1)
+            added += 1
+        return added
+
+    def _count_terms(self, terms: Iterable[str], delta: int):
+        for term in terms:
+            if self.shared:
+                # Only the cached ones; the rest are read when needed
+                if term in self.df:
+                    self.df[term] += delta
+                continue
+            self.df[term] = self.df.get(term, 0) + delta
+            if not self.df[term]:
+                del self.df[term]
+        self.db.executemany("INSERT INTO terms VALUES (?, ?) ON CONFLICT (term) DO UPDATE SET df = df + ?",
+                            ((term, delta, delta) for term in terms))
+        if delta < 0:
+            self.db.execute("DELETE FROM terms WHERE df <= 0")
+
+    def _remove(self, source: str, prefix: bool = False) -> int:
+        columns = "SELECT id, text, length FROM docs WHERE "
+        if prefix:
+            rows = self.db.execute(columns + "source >= ? AND source < ?", (source, source + "\uffff")).fetchall()
+        else:
+            rows = self.db.execute(columns + "source = ?", (source,)).fetchall()
+        for doc, text, length in rows:
+            # By doc id: weights recomputed now may not match the stored ones
+            self.db.execute("DELETE FROM postings WHERE doc = ?", (doc,))
+            self._count_terms(Counter(tokenize(text)), -1)
+            self.chunks -= 1
+            self.total_length -= length
+        self.db.executemany("DELETE FROM docs WHERE id = ?", ((row[0],) for row in rows))
+        return len(rows)
+
+    def refresh(self) -> int:
+        """Re-index changed files under the roots and drop deleted ones.
+        Returns the number of files (re)indexed or removed."""
+        with self.lock:
+            self._sync()
+        seen = {}
+        for root in self.roots:
+            paths = [root] if root.is_file() else sorted(root.rglob("*")) if root.is_dir() else []
+            for path in paths:
+                if path.suffix in DOCUMENT_SUFFIXES and path.is_file():
+                    seen[str(path)] = self._signature(path)
+
+        changed = 0
+        for path, signature in seen.items():
+            if self.files.get(path) == signature:
+                continue
+            try:
+                chunks = self._read(Path(path))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Memory index: could not read {path}: {e}")
+                continue
+            with self.lock, self.db:
+                self._remove(path)
+                self._insert(path, chunks)
+                self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?)", (path, signature))
+            self.files[path] = signature
+            changed += 1
+
+        for path in [p for p in self.files if p not in seen]:
+            with self.lock, self.db:
+                self._remove(path)
+                self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+            del self.files[path]
+            changed += 1
+        if changed:
+            logger.info(f"Memory index: updated {changed} files, {self.chunks} chunks")
+        return changed
+
+    def _signature(self, path: Path) -> str:
+        stat = path.stat()
+        signature = f"{stat.st_mtime_ns}:{stat.st_size}"
+        if path.suffix == ".json":
+            # A checkpoint also changes when only its journal grows
+            journal = Path(str(path) + self.checkpoints.JOURNAL_SUFFIX)
+            if journal.exists():
+                stat = journal.stat()
+                signature += f":{stat.st_mtime_ns}:{stat.st_size}"
+        return signature
+
+    def _read(self, path: Path) -> List[str]:
+        if path.suffix == ".json":
+            state, _ = self.checkpoints.read_checkpoint(str(path))
+            return checkpoint_chunks(state) if isinstance(state, dict) else []
+        return chunk_text(path.read_text(encoding="utf-8", errors="replace"), self.chunk_chars)
+
+    # Reading
+
+    def search(self, query: str, k: int = 3, exclude: Iterable[str] = ()) -> List[dict]:
+        """The ``k`` best-scoring chunks for ``query`` as dicts with source, text and score.
+        Chunks whose text is in ``exclude`` are skipped."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        start = time.perf_counter()
+        with self.lock:
+            self._sync()
+            scores: Dict[int, float] = defaultdict(float)
+            for term in terms:
+                df = self._df(term)
+                if not df:
+                    continue
+                idf = math.log(1 + (self.chunks - df + 0.5) / (df + 0.5))
+                for doc, weight in self.db.execute("SELECT doc, weight FROM postings WHERE term = ? "
+                                                   "ORDER BY weight DESC LIMIT ?", (term, self.depth)):
+                    scores[doc] += idf * weight
+
+            exclude = set(exclude)
+            results = []
+            # A few spare candidates in case some are excluded
+            for doc, score in heapq.nlargest(k + len(exclude), scores.items(), key=lambda item: item[1]):
+                source, text = self.db.execute("SELECT source, text FROM docs WHERE id = ?", (doc,)).fetchone()
+                if text in exclude:
+                    continue
+                results.append({"source": source, "text": text, "score": round(score, 3)})
+                if len(results) == k:
+                    break
+        self.searches += 1
+        self.search_ms += (time.perf_counter() - start) * 1000
+        return results
+
+    def close(self):
+        self.writer.shutdown()  # finishes the queued writes
+        with self.lock:
+            self.db.close()
+
+    def stats(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "files": len(self.files),
+            "searches": self.searches,
+            "avg_search_ms": round(self.search_ms / self.searches, 2) if self.searches else None
+        }
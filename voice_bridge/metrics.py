@@ -0,0 +1,202 @@
+"""Per-turn latency metrics for the voice pipeline.
+
+Every turn gets a TurnTimer that marks when each stage was reached, in
+seconds after the final transcript the turn answers (the latest one, for
+merged utterances):
+
+    turn_start      the turn left the utterance queue
+    request_sent    the bridge request was written
+    response_first  the first piece of the reply arrived
+    response        the whole reply had arrived
+    tts_first_byte  the first synthesized audio was ready
+    tts_complete    the last synthesized audio was ready
+    audio_sent      the last audio chunk was sent to the browser
+
+Stages a turn never reaches (a cached reply sends no request, a barge-in
+stops the rest) are left out. When the turn ends, each mark goes into that
+stage's Histogram. Marking is a clock read and a dict store, and observing
+is a bisect over fixed buckets, so nothing is sorted or allocated per turn.
+
+``render`` produces the Prometheus text format for the ``/metrics`` route;
+``summary`` estimates p50/p95/p99 per stage from the buckets.
+
+A TurnTimer also holds the turn's trace context (see tracing.py).
+
+With several worker processes (WORKERS > 1) each one records its own turns.
+SharedMetrics publishes a worker's snapshot to a directory that all of them
+share, and merges the other workers' snapshots into what /metrics serves.
+"""
+
+import json
+import os
+import time
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from tracing import new_span_id, new_trace_id
+
+TURN_STAGES = ("turn_start", "request_sent", "response_first", "response",
+               "tts_first_byte", "tts_complete", "audio_sent")
+
+TURN_OUTCOMES = ("complete", "interrupted", "error")
+
+# Seconds; fine enough around typical turn latencies to interpolate percentiles
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75,
+                   1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate, interpolating linearly inside the bucket that holds it."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i else 0.0
+                if i == len(self.bounds):
+                    return lower  # beyond the largest bound
+                return lower + (self.bounds[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+class TurnTimer:
+    __slots__ = ("start", "wall_start", "marks", "outcome", "trace_id", "span_id", "request_span_id")
+
+    def __init__(self, start: Optional[float] = None):
+        now = time.monotonic()
+        self.start = now if start is None else start
+        self.wall_start = time.time() - (now - self.start)
+        self.marks: Dict[str, float] = {}
+        self.outcome = "complete"
+        self.trace_id = new_trace_id()
+        self.span_id = new_span_id()
+        self.request_span_id = new_span_id()
+
+    def trace_context(self) -> dict:
+        """What the bridge request carries, see tracing.py."""
+        return {"trace_id": self.trace_id, "span_id": self.request_span_id}
+
+    def mark(self, stage: str, at: Optional[float] = None):
+        """Record the first time ``stage`` is reached (``at`` is a time.monotonic() value)."""
+        if stage not in self.marks:
+            self.marks[stage] = (time.monotonic() if at is None else at) - self.start
+
+
+class PipelineMetrics:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.stages = {stage: Histogram(buckets) for stage in TURN_STAGES}
+        self.turns = dict.fromkeys(TURN_OUTCOMES, 0)
+
+    def record(self, timer: TurnTimer):
+        for stage, seconds in timer.marks.items():
+            self.stages[stage].observe(seconds)
+        self.turns[timer.outcome] += 1
+
+    def summary(self) -> dict:
+        result = {"turns": dict(self.turns)}
+        for stage, histogram in self.stages.items():
+            if histogram.count:
+                result[stage] = {
+                    "count": histogram.count,
+                    **{f"p{int(q * 100)}_ms": round(histogram.quantile(q) * 1000, 1) for q in (0.5, 0.95, 0.99)}
+                }
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "stages": {stage: [h.counts, h.sum, h.count] for stage, h in self.stages.items()},
+            "turns": dict(self.turns)
+        }
+
+    def merge(self, snapshot: dict):
+        """Add the turns of another PipelineMetrics' ``snapshot`` (same buckets)."""
+        for stage, (counts, total, count) in snapshot["stages"].items():
+            histogram = self.stages[stage]
+            histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+            histogram.sum += total
+            histogram.count += count
+        for outcome, n in snapshot["turns"].items():
+            self.turns[outcome] += n
+
+    def render(self) -> str:
+        lines = [
+            "# HELP voice_turn_stage_seconds Seconds from the final transcript to each stage of a turn",
+            "# TYPE voice_turn_stage_seconds histogram",
+        ]
+        for stage, histogram in self.stages.items():
+            cumulative = 0
+            for bound, n in zip(histogram.bounds + (float("inf"),), histogram.counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'voice_turn_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'voice_turn_stage_seconds_sum{{stage="{stage}"}} {histogram.sum!r}')
+            lines.append(f'voice_turn_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        lines += [
+            "# HELP voice_turns_total Turns by how they ended",
+            "# TYPE voice_turns_total counter",
+        ]
+        lines += [f'voice_turns_total{{outcome="{outcome}"}} {n}' for outcome, n in self.turns.items()]
+        return "\n".join(lines) + "\n"
+
+
+class SharedMetrics:
+    """This worker's PipelineMetrics, published as ``directory/<pid>.json``."""
+
+    def __init__(self, directory, metrics: PipelineMetrics):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.metrics = metrics
+        self.path = self.directory / f"{os.getpid()}.json"
+
+    def publish(self):
+        tmp_path = self.directory / f".{uuid.uuid4().hex}.tmp"
+        tmp_path.write_text(json.dumps(self.metrics.snapshot()))
+        os.replace(tmp_path, self.path)
+
+    def collect(self) -> PipelineMetrics:
+        """This worker's metrics merged with the latest snapshots of the others.
+        Snapshots of processes that are gone are removed."""
+        merged = PipelineMetrics(self.metrics.stages["turn_start"].bounds)
+        merged.merge(self.metrics.snapshot())
+        for path in self.directory.glob("*.json"):
+            if path == self.path or not path.stem.isdigit():
+                continue
+            if not _alive(int(path.stem)):
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                merged.merge(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # removed meanwhile
+        return merged
+
+    def close(self):
+        self.path.unlink(missing_ok=True)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
@@ -0,0 +1,254 @@
+"""Worker pool for the monitor side of the MCP bridge.
+
+Monitors used to handle one request at a time, so a slow MCP tool call held
+up every other voice command. RequestPool runs requests on a fixed number of
+worker threads instead:
+
+- Requests from different sessions are processed and answered concurrently.
+- Requests from the same session (``session_id``, falling back to the request
+  id) are also processed concurrently, but their response records are sent
+  in submission order. A later reply waits for the earlier ones.
+- A request that hasn't been answered ``timeout`` seconds after it was
+  submitted, queued or running, is answered with an "error" record. One that
+  times out in the queue is never started. Python threads can't be
+  interrupted, so a worker running one stays busy until the handler returns,
+  and its late records are dropped.
+- ``cancel(request_id)`` abandons a request the voice bridge no longer waits
+  for (the user interrupted it). It is skipped if it hasn't started, sends
+  nothing more, and no longer holds up later replies of its session.
+
+``stats()`` reports queue depth and counters for the monitor's console output,
+with each request counted once, under how it ended: completed (answered by
+the handler), failed, timed out or cancelled.
+
+Requests that carry trace context (see tracing.py) get their pickup, queue,
+processing and response-write times back in the final record's ``trace``
+field, and logged as spans when the pool has a ``span_log``.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Union
+
+from bridge_protocol import FINAL_STATUSES, make_record
+from tracing import SpanLog
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Union[dict, Iterable[dict]]]
+Sender = Callable[[dict], None]
+
+
+class _Ticket:
+    def __init__(self, request: dict, send: Sender, session: "_Session"):
+        self.request = request
+        self.send = send
+        self.session = session
+        self.records = []       # produced but not yet sent
+        self.finished = False   # final record produced (or timed out)
+        self.submitted = time.monotonic()
+        self.timer: Optional[threading.Timer] = None
+        self.trace = request.get("trace") if isinstance(request.get("trace"), dict) else None
+        self.received_at = time.time()  # wall clock, comparable with the bridge's sent_at
+        self.started_at = None
+        self.finished_at = None
+
+
+class _Session:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tickets = deque()  # in submission order
+
+
+class RequestPool:
+    """Run ``handle_request`` for submitted requests on ``workers`` threads.
+
+    ``handle_request(request)`` returns a response record or an iterable of
+    records (see bridge_protocol.py). ``submit(request, send)`` queues a
+    request; ``send(record)`` is called with each of its records, in order,
+    from whichever thread releases it.
+    """
+
+    def __init__(self, handle_request: Handler, workers: int = 4, timeout: float = 25.0,
+                 span_log: Optional[SpanLog] = None):
+        self.handle_request = handle_request
+        self.workers = workers
+        self.timeout = timeout
+        self.span_log = span_log
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nova-worker")
+        self.lock = threading.Lock()
+        self.sessions: Dict[str, _Session] = {}
+        self.tickets: Dict[str, _Ticket] = {}
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.max_queued = 0
+
+    def submit(self, request: dict, send: Sender):
+        key = request.get("session_id") or request.get("id")
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = self.sessions[key] = _Session()
+            ticket = _Ticket(request, send, session)
+            session.tickets.append(ticket)
+            self.tickets[request.get("id")] = ticket
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        # The deadline covers the time spent waiting for a worker
+        ticket.timer = threading.Timer(self.timeout, self._expire, args=(ticket,))
+        ticket.timer.daemon = True
+        ticket.timer.start()
+        self.executor.submit(self._run, ticket, key)
+
+    def _run(self, ticket: _Ticket, key: str):
+        with self.lock:
+            self.queued -= 1
+            self.active += 1
+        request_id = ticket.request.get("id")
+        if time.monotonic() - ticket.submitted >= self.timeout:
+            self._expire(ticket)  # in case the timer hasn't fired yet
+        if ticket.finished:
+            self._release(ticket, key)  # cancelled or timed out while queued
+            return
+        ticket.started_at = time.time()
+        try:
+            result = self.handle_request(ticket.request)
+            for record in ([result] if isinstance(result, dict) else result):
+                still_open = self._emit(ticket, record)
+                if still_open is None:
+                    break  # timed out or cancelled, stop producing
+                if not still_open:
+                    with self.lock:
+                        self.completed += 1
+                    break
+            if not ticket.finished:
+                raise RuntimeError("handler returned without a final response")
+        except Exception as e:
+            logger.error(f"Request {request_id} failed: {e}")
+            if self._emit(ticket, make_record(request_id, str(e), status="error")) is not None:
+                with self.lock:
+                    self.failed += 1
+        finally:
+            self._release(ticket, key)
+
+    def _release(self, ticket: _Ticket, key: str):
+        ticket.timer.cancel()
+        with self.lock:
+            self.active -= 1
+            self.tickets.pop(ticket.request.get("id"), None)
+            if not ticket.session.tickets and self.sessions.get(key) is ticket.session:
+                del self.sessions[key]
+
+    def cancel(self, request_id: str) -> bool:
+        """Abandon a request; returns False if it was unknown or already answered."""
+        with self.lock:
+            ticket = self.tickets.get(request_id)
+        if ticket is None:
+            return False
+        with ticket.session.lock:
+            if ticket.finished:
+                return False
+            ticket.finished = True
+            ticket.records.clear()
+            self._flush(ticket.session)
+        logger.info(f"Request {request_id} cancelled")
+        with self.lock:
+            self.cancelled += 1
+        return True
+
+    def _expire(self, ticket: _Ticket):
+        request_id = ticket.request.get("id")
+        record = make_record(request_id, f"Request timed out after {self.timeout:g}s", status="error")
+        if self._emit(ticket, record) is not None:
+            logger.warning(f"Request {request_id} timed out after {self.timeout:g}s")
+            with self.lock:
+                self.timed_out += 1
+
+    def _emit(self, ticket: _Ticket, record: dict):
+        """Queue a record for sending. Returns whether the request is still
+        open, or None if it had already finished and the record was dropped."""
+        session = ticket.session
+        with session.lock:
+            if ticket.finished:
+                return None
+            if record.get("status") in FINAL_STATUSES:
+                ticket.finished = True
+                ticket.finished_at = time.time()
+                if ticket.trace:
+                    record = dict(record, trace=self._trace_fields(ticket))
+            ticket.records.append(record)
+            self._flush(session)
+            return not ticket.finished
+
+    def _flush(self, session: _Session):
+        # Only the oldest unfinished request of a session may send; the
+        # records of later ones wait here until it completes.
+        while session.tickets:
+            head = session.tickets[0]
+            for record in head.records:
+                write_start = time.time()
+                try:
+                    head.send(record)
+                except OSError as e:
+                    logger.warning(f"Could not send response for {head.request.get('id')}: {e}")
+                if head.trace and self.span_log and record.get("status") in FINAL_STATUSES:
+                    self._log_spans(head, record, write_start, time.time())
+            head.records.clear()
+            if not head.finished:
+                return
+            session.tickets.popleft()
+
+    def _trace_fields(self, ticket: _Ticket) -> dict:
+        return {
+            "trace_id": ticket.trace.get("trace_id"),
+            "parent_id": ticket.trace.get("span_id"),
+            "received_at": ticket.received_at,
+            "started_at": ticket.started_at,
+            "finished_at": ticket.finished_at
+        }
+
+    def _log_spans(self, ticket: _Ticket, record: dict, write_start: float, write_end: float):
+        trace_id = ticket.trace.get("trace_id")
+        parent_id = ticket.trace.get("span_id")
+        request_id = ticket.request.get("id")
+        log = self.span_log
+        sent_at = ticket.trace.get("sent_at")
+        if isinstance(sent_at, (int, float)):
+            log.record(trace_id, "monitor.pickup", sent_at, ticket.received_at, parent_id, request_id=request_id)
+        # A request that timed out while queued never started
+        started_at = ticket.started_at or ticket.finished_at
+        log.record(trace_id, "monitor.queue", ticket.received_at, started_at, parent_id)
+        log.record(trace_id, "monitor.process", started_at, ticket.finished_at, parent_id,
+                   status=record.get("status"))
+        log.record(trace_id, "monitor.write", write_start, write_end, parent_id)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "active": self.active,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timed_out": self.timed_out,
+                "cancelled": self.cancelled
+            }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (f"{s['queued']} queued (max {s['max_queued']}), {s['active']}/{s['workers']} busy, "
+                f"{s['completed']} done, {s['timed_out']} timed out, {s['cancelled']} cancelled, "
+                f"{s['failed']} failed")
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+        if self.span_log:
+            self.span_log.close()
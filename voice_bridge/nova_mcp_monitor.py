@@ -7,51 +7,166 @@ Usage:
 1. Copy this entire script
 2. Paste and run in Claude Desktop
 3. Keep it running while using voice interface
+
+Set NOVA_BRIDGE_MODE=spool (for both this monitor and the voice bridge) to use
+the spool-directory bridge, which queues concurrent requests instead of
+keeping only the latest one, or NOVA_BRIDGE_MODE=socket to serve requests on
+a Unix domain socket.
+
+Requests are processed by a pool of worker threads (monitor_pool.py), so a
+slow MCP tool call doesn't hold up other voice commands. NOVA_MONITOR_WORKERS
+sets the number of workers and NOVA_REQUEST_TIMEOUT the seconds a request may
+take before it is answered with an error. With NOVA_TRACE_LOG set, the
+pickup, queueing, processing and response-write times of each request are
+appended to that file as spans (see tracing.py and trace_waterfall.py).
 """
 
 import json
 import time
 import os
+import threading
 from pathlib import Path
 from datetime import datetime
+from file_watcher import FileWatcher
+from bridge_spool import BridgeSpool
+from bridge_socket import BridgeSocketServer
+from bridge_protocol import response_records
+from monitor_pool import RequestPool
+from tracing import SpanLog
+
+# Fixed replies of the template below; the voice bridge pre-synthesizes them
+CANNED_REPLIES = {
+    "calendar": "I'll check your calendar using MCP tools. [Calendar operations would happen here]",
+    "email": "I'll handle your email using MCP tools. [Email operations would happen here]",
+    "files": "I'll work with files using MCP tools. [File operations would happen here]",
+    "tasks": "I'll manage your tasks using MCP tools. [Task operations would happen here]"
+}
 
 class NovaMCPMonitor:
-    def __init__(self):
-        self.input_file = Path("voice_bridge/mcp_bridge/nova_input.txt")
-        self.output_file = Path("voice_bridge/mcp_bridge/nova_output.txt")
-        self.poll_interval = 0.5  # seconds
+    def __init__(self, input_file="voice_bridge/mcp_bridge/nova_input.txt",
+                 output_file="voice_bridge/mcp_bridge/nova_output.txt", use_watcher=True,
+                 spool_dir=None, socket_path=None, workers=4, request_timeout=25.0, trace_log=None):
+        self.input_file = Path(input_file)
+        self.output_file = Path(output_file)
+        self.poll_interval = 0.5  # seconds, when not watching
+        self.gc_interval = 60  # seconds between spool clean-ups
         self.last_request_id = None
+        self.last_gc = 0
+        self.running = False
+        self.spool = BridgeSpool(spool_dir) if spool_dir else None
+        self.socket_path = Path(socket_path) if socket_path else None
+        self.server = None
+        span_log = SpanLog(trace_log, "monitor") if trace_log else None
+        self.pool = RequestPool(self.handle_request, workers=workers, timeout=request_timeout, span_log=span_log)
+        self.write_lock = threading.Lock()
+        # Wakes the loop as soon as a request is written
+        watched = self.spool.requests_dir if self.spool else self.input_file
+        self.watcher = FileWatcher(watched) if use_watcher else None
         
     def run(self):
         """Main monitoring loop"""
+        if self.socket_path:
+            self.serve_socket()
+            return
+        
         print("🎙️ Nova MCP Monitor Started")
-        print(f"Watching: {self.input_file}")
+        print(f"Watching: {self.spool.requests_dir if self.spool else self.input_file}")
         print("Say 'Nova' followed by your command through the voice interface")
+        print(f"Workers: {self.pool.workers}")
         print("-" * 50)
         
-        while True:
+        self.running = True
+        while self.running:
             try:
+                if self.spool:
+                    self.process_spool()
+                    continue
+                
                 # Check for new requests
                 request = self.check_for_request()
                 
                 if request and request.get('id') != self.last_request_id:
                     self.last_request_id = request.get('id')
-                    print(f"\n📥 New request: {request.get('message')}")
-                    
-                    # Process the request
-                    response = self.process_request(request)
                     
-                    # Write response
-                    self.write_response(request.get('id'), response)
-                    print(f"📤 Response sent: {response[:100]}...")
+                    # Process the request on a worker and write its response
+                    self.pool.submit(request, self.file_sender())
                     
             except KeyboardInterrupt:
                 print("\n\n👋 Nova MCP Monitor stopped")
-                break
+                self.running = False
             except Exception as e:
                 print(f"❌ Error: {e}")
-            
-            time.sleep(self.poll_interval)
+            finally:
+                self.wait_for_change()
+        
+        self.pool.shutdown()
+    
+    def wait_for_change(self):
+        """Sleep until the bridge is written to (or the poll interval passes)"""
+        if self.running:
+            try:
+                if self.watcher:
+                    self.watcher.wait(timeout=1.0)
+                else:
+                    time.sleep(self.poll_interval)
+            except KeyboardInterrupt:
+                print("\n\n👋 Nova MCP Monitor stopped")
+                self.running = False
+            except OSError as e:
+                # Don't let a watcher error end the loop (and skip pool shutdown)
+                print(f"❌ Watch error: {e}")
+                time.sleep(self.poll_interval)
+    
+    def process_spool(self):
+        """Hand every queued spool request to the workers, oldest first"""
+        while self.running:
+            request = self.spool.claim_next()
+            if request is None:
+                break
+            self.pool.submit(request, lambda record, request=request: self.spool.publish_record(request, record))
+        
+        for request_id in self.spool.take_cancellations():
+            self.pool.cancel(request_id)
+        
+        if time.time() - self.last_gc > self.gc_interval:
+            self.last_gc = time.time()
+            removed = self.spool.collect_garbage()
+            if removed:
+                print(f"🧹 Removed {removed} stale spool entries")
+    
+    def serve_socket(self):
+        """Serve requests from the voice bridge on a Unix domain socket"""
+        print("🎙️ Nova MCP Monitor Started")
+        print(f"Listening on: {self.socket_path}")
+        print(f"Workers: {self.pool.workers}")
+        print("-" * 50)
+        
+        self.server = BridgeSocketServer(self.socket_path, self.handle_request, dispatch=self.pool.submit,
+                                         cancel=self.pool.cancel)
+        self.running = True
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n\n👋 Nova MCP Monitor stopped")
+        finally:
+            self.running = False
+            self.server.server_close()
+            self.pool.shutdown()
+    
+    def handle_request(self, request):
+        """Process one request on a worker, yielding its response records"""
+        print(f"\n📥 New request: {request.get('message')}")
+        response = self.process_request(request)
+        for record in response_records(request.get('id'), response):
+            yield record
+        print(f"📤 Response sent: {record['message'][:100]}...")
+        print(f"📊 Queue: {self.pool.format_stats()}")
+    
+    def stop(self):
+        """Stop the monitoring loop after the current iteration"""
+        self.running = False
+        if self.server:
+            self.server.shutdown()
     
     def check_for_request(self):
         """Check if there's a new request in the input file"""
@@ -69,40 +184,54 @@ class NovaMCPMonitor:
         
         This is where you would use MCP tools to handle the request.
         For now, this is a template that you'll fill in based on the command.
+        
+        Return the reply as a string, or yield it in pieces to stream it:
+        the voice interface shows and speaks each piece as it arrives.
         """
         message = request.get('message', '').lower()
         
         # Example command patterns
         if 'calendar' in message or 'schedule' in message or 'meeting' in message:
             # Use MCP calendar tools
-            return "I'll check your calendar using MCP tools. [Calendar operations would happen here]"
+            return CANNED_REPLIES["calendar"]
             
         elif 'email' in message:
             # Use MCP email tools
-            return "I'll handle your email using MCP tools. [Email operations would happen here]"
+            return CANNED_REPLIES["email"]
             
         elif 'file' in message or 'document' in message:
             # Use MCP file tools
-            return "I'll work with files using MCP tools. [File operations would happen here]"
+            return CANNED_REPLIES["files"]
             
         elif 'task' in message or 'todo' in message:
             # Use MCP task management tools
-            return "I'll manage your tasks using MCP tools. [Task operations would happen here]"
+            return CANNED_REPLIES["tasks"]
             
         else:
             # General response - you would process this with Claude's capabilities
             return f"I understand you want to: {request.get('message')}. Let me help with that using MCP tools."
     
-    def write_response(self, request_id, message):
-        """Write response to output file"""
-        response = {
-            "request_id": request_id,
-            "timestamp": datetime.now().isoformat(),
-            "message": message,
-            "status": "complete"
-        }
+    def file_sender(self):
+        """Return a function that writes one request's records to the output file
         
-        self.output_file.write_text(json.dumps(response, indent=2))
+        The output file only holds the latest record, so partial records list
+        every piece so far.
+        """
+        chunks = []
+        def send(record):
+            if record["status"] == "partial":
+                chunks.append(record["message"])
+                record = dict(record, chunks=list(chunks))
+            with self.write_lock:
+                self.output_file.write_text(json.dumps(record, indent=2))
+        return send
+    
+    def write_response(self, request_id, message):
+        """Write response to output file; returns the full reply text"""
+        send = self.file_sender()
+        for record in response_records(request_id, message):
+            send(record)
+        return record["message"]
 
 # Instructions for Claude Desktop:
 instructions = """
@@ -130,5 +259,12 @@ if __name__ == "__main__":
     print(instructions)
     print("\nStarting monitor...\n")
     
-    monitor = NovaMCPMonitor()
+    mode = os.getenv("NOVA_BRIDGE_MODE", "file")
+    monitor = NovaMCPMonitor(
+        spool_dir="voice_bridge/mcp_bridge/spool" if mode == "spool" else None,
+        socket_path="voice_bridge/mcp_bridge/nova.sock" if mode == "socket" else None,
+        workers=int(os.getenv("NOVA_MONITOR_WORKERS", "4")),
+        request_timeout=float(os.getenv("NOVA_REQUEST_TIMEOUT", "25")),
+        trace_log=os.getenv("NOVA_TRACE_LOG")
+    )
     monitor.run()
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""Cache for replies from the MCP bridge.
+
+Repeated questions ("what's on my calendar today") otherwise pay a full
+bridge round trip every time. Entries are keyed on the normalized message
+plus a hash of the context turns that the question's intent depends on, and
+expire after the intent's TTL. The least recently used entries are evicted
+once the cache holds more than ``max_bytes`` of text.
+
+Whether a message is cached is decided by the first matching CacheRule.
+Messages that change something ("schedule a meeting with Sam") are never
+cached. Instead they invalidate the intents they affect, both when they are
+sent and when their reply arrives. Messages that match no rule are not cached.
+
+Besides the rules, entries can be dropped explicitly with ``invalidate``
+(one or more intents) or ``clear``. A monitor can do the same by listing the
+intents in an ``invalidate`` field of its final response record, see
+MCPBridgeHandler.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class CacheRule:
+    def __init__(self, intent: str, pattern: str, ttl: float = 0.0, context_turns: int = 0,
+                 invalidates: Tuple[str, ...] = ()):
+        self.intent = intent
+        self.regex = re.compile(pattern, re.IGNORECASE)
+        self.ttl = ttl                        # seconds; 0 means the reply is never cached
+        self.context_turns = context_turns    # earlier turns that are part of the key
+        self.invalidates = invalidates        # intents dropped when this one is sent
+
+
+# Write intents come first so that "schedule a meeting" is not treated as a
+# calendar lookup.
+DEFAULT_RULES = [
+    CacheRule("calendar_write", r"\b(schedule|book|cancel|reschedule|move|set up|add)\b.*\b(meeting|call|appointment|event|calendar)s?\b",
+              invalidates=("calendar",)),
+    CacheRule("email_write", r"\b(send|reply|forward|draft|delete|archive)\b.*\b(e-?mail|mail|message)s?\b",
+              invalidates=("email",)),
+    CacheRule("task_write", r"\b(add|create|complete|finish|delete|remove)\b.*\b(task|todo|to-do|reminder)s?\b|\bremind me\b",
+              invalidates=("tasks",)),
+    CacheRule("clock", r"\b(what time is it|time is it|today's date|what day is it)\b"),
+    CacheRule("calendar", r"\b(calendar|schedule|meeting|appointment|agenda)s?\b", ttl=300),
+    CacheRule("email", r"\b(inbox|e-?mails?|unread)\b", ttl=60),
+    CacheRule("tasks", r"\b(tasks?|todos?|to-dos?)\b", ttl=120),
+]
+
+_WAKE_WORD = re.compile(r"^(hey\s+)?nova\b[\s,.!?]*")
+_NON_WORD = re.compile(r"[^\w\s']+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Lower-case, drop the wake word and punctuation, collapse whitespace."""
+    text = message.lower().strip()
+    text = _WAKE_WORD.sub("", text)
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def context_fingerprint(message: str, context: Optional[List[Dict[str, str]]], turns: int) -> str:
+    """Hash of the ``turns`` context messages before the current message."""
+    if not turns or not context:
+        return ""
+    history = list(context)
+    # The session adds the user's message to its context before sending it
+    if history and history[-1].get("role") == "user" and history[-1].get("content") == message:
+        history.pop()
+    relevant = [(m.get("role"), m.get("content")) for m in history[-turns:]]
+    return hashlib.sha1(json.dumps(relevant).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, rules: Iterable[CacheRule] = None, max_bytes: int = 1024 * 1024):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.max_bytes = max_bytes
+        self.size = 0
+        # key -> (intent, expires_at, response, size)
+        self.entries: "OrderedDict[Tuple[str, str], Tuple[str, float, str, int]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def match(self, message: str) -> Optional[CacheRule]:
+        normalized = normalize_message(message)
+        for rule in self.rules:
+            if rule.regex.search(normalized):
+                return rule
+        return None
+
+    def _key(self, rule: CacheRule, message: str, context) -> Tuple[str, str]:
+        return normalize_message(message), context_fingerprint(message, context, rule.context_turns)
+
+    def get(self, message: str, context: list = None) -> Optional[str]:
+        """Return the cached reply, or None. Write intents invalidate here."""
+        rule = self.match(message)
+        if rule is None or not rule.ttl:
+            if rule is not None and rule.invalidates:
+                self.invalidate(*rule.invalidates)
+            with self.lock:
+                self.uncacheable += 1
+            return None
+
+        key = self._key(rule, message, context)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, message: str, context: list, response: str):
+        """Store a complete reply if its intent is cacheable."""
+        rule = self.match(message)
+        if rule is None:
+            return
+        if rule.invalidates:
+            self.invalidate(*rule.invalidates)
+        if not rule.ttl:
+            return
+
+        key = self._key(rule, message, context)
+        size = len(key[0]) + len(key[1]) + len(response)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (rule.intent, time.monotonic() + rule.ttl, response, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, _, _, size = self.entries.pop(key)
+        self.size -= size
+
+    def invalidate(self, *intents: str) -> int:
+        """Drop every entry for the given intents; returns how many were removed."""
+        with self.lock:
+            keys = [key for key, entry in self.entries.items() if entry[0] in intents]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self.lock:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "uncacheable": self.uncacheable,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
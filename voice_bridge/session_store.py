@@ -0,0 +1,225 @@
+"""SQLite-backed store for conversations, so a reload doesn't lose context.
+
+Each conversation has a random session token that the browser keeps and
+sends in its ``hello``. The store holds the turns and rolling summary for
+each token:
+
+- Writes are write-behind. ``append``/``remove_last``/``set_summary``/``clear``
+  only queue an operation, and a single writer thread applies everything
+  queued so far in one transaction, each operation in its own savepoint so
+  that one failing write loses only itself. The event loop never waits on
+  disk.
+- ``load`` goes through the same queue, so it sees every earlier write, and
+  is answered whether or not those writes succeeded. It reads the newest
+  ``limit`` turns through the (token, seq) primary key, so the cost depends
+  on ``limit`` and not on the length of the conversation.
+- Sessions not seen for ``ttl`` seconds are deleted by the writer thread.
+- Several processes (WORKERS > 1) can share the database, even for one
+  session: nothing about a session is cached, and each turn's seq is taken
+  inside the insert, under the write lock.
+"""
+
+import logging
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    token TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    summary TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS turns (
+    token TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    PRIMARY KEY (token, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen);
+"""
+
+_STOP = object()
+
+
+class SessionStore:
+    def __init__(self, path="sessions.db", ttl: float = 24 * 3600, expire_interval: float = 60.0):
+        self.path = str(path)
+        self.ttl = ttl
+        self.expire_interval = expire_interval
+        self.ops: "queue.Queue" = queue.Queue()
+        self.batches = 0
+        self.writes = 0
+        self.expired = 0
+        self.thread = threading.Thread(target=self._run, name="session-store", daemon=True)
+        self.ready = Future()
+        self.thread.start()
+        self.ready.result()  # surface a bad path here rather than on the first write
+
+    # Event loop side: these only queue work
+
+    def create(self) -> str:
+        token = secrets.token_urlsafe(24)
+        self.ops.put(("create", token, time.time()))
+        return token
+
+    def append(self, token: str, role: str, content: str, timestamp: str):
+        self.ops.put(("append", token, role, content, timestamp, time.time()))
+
+    def remove_last(self, token: str):
+        self.ops.put(("remove_last", token))
+
+    def set_summary(self, token: str, summary: str):
+        self.ops.put(("summary", token, summary))
+
+    def clear(self, token: str):
+        self.ops.put(("clear", token))
+
+    def load(self, token: str, limit: int) -> Future:
+        """Future for (turns, summary) of a live session, or None if unknown or expired."""
+        future = Future()
+        self.ops.put(("load", token, limit, future))
+        return future
+
+    def close(self):
+        self.ops.put(_STOP)
+        self.thread.join()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.ops.qsize(),
+            "batches": self.batches,
+            "writes": self.writes,
+            "expired": self.expired
+        }
+
+    # Writer thread
+
+    def _run(self):
+        try:
+            db = sqlite3.connect(self.path)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            self.ready.set_exception(e)
+            return
+        self.ready.set_result(True)
+
+        next_expiry = time.monotonic()
+        while True:
+            try:
+                batch = [self.ops.get(timeout=self.expire_interval)]
+            except queue.Empty:
+                batch = []
+            # Everything queued meanwhile goes into the same transaction
+            while True:
+                try:
+                    batch.append(self.ops.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = _STOP in batch
+            ops = [op for op in batch if op is not _STOP]
+            if ops:
+                self._apply(db, ops)
+            if time.monotonic() >= next_expiry:
+                self._expire(db)
+                next_expiry = time.monotonic() + self.expire_interval
+            if stop:
+                db.close()
+                return
+
+    def _apply(self, db: sqlite3.Connection, ops: list):
+        # Answered after the commit, from the same snapshot, even if writes fail
+        loads = [op for op in ops if op[0] == "load"]
+        try:
+            # Take the write lock up front, so every statement sees the other
+            # workers' latest commits
+            db.execute("BEGIN IMMEDIATE")
+            lost = 0
+            for op in ops:
+                if op[0] == "load":
+                    continue
+                self.writes += 1
+                # One savepoint per operation, so a failing one doesn't take the
+                # other sessions' writes in the batch with it
+                db.execute("SAVEPOINT op")
+                try:
+                    self._write(db, op)
+                except sqlite3.Error as e:
+                    db.execute("ROLLBACK TO op")
+                    lost += 1
+                    logger.error(f"Session store {op[0]} failed: {e}")
+                db.execute("RELEASE op")
+            db.commit()
+            self.batches += 1
+            if lost:
+                logger.error(f"Session store: {lost} of {len(ops) - len(loads)} operations lost")
+        except sqlite3.Error as e:
+            if db.in_transaction:
+                db.rollback()
+            logger.error(f"Session store write failed ({len(ops) - len(loads)} operations lost): {e}")
+        finally:
+            for _, token, limit, future in loads:
+                try:
+                    future.set_result(self._load(db, token, limit))
+                except Exception as e:
+                    future.set_exception(e)
+
+    def _write(self, db: sqlite3.Connection, op: tuple):
+        kind, token = op[0], op[1]
+        if kind == "create":
+            db.execute("INSERT OR IGNORE INTO sessions (token, created, last_seen) VALUES (?, ?, ?)",
+                       (token, op[2], op[2]))
+        elif kind == "append":
+            _, _, role, content, timestamp, now = op
+            # The next seq is read in the insert itself: with WORKERS > 1 other
+            # processes append to the same session
+            db.execute("INSERT INTO turns SELECT ?, COALESCE(MAX(seq), -1) + 1, ?, ?, ? "
+                       "FROM turns WHERE token = ?", (token, role, content, timestamp, token))
+            db.execute("UPDATE sessions SET last_seen = ? WHERE token = ?", (now, token))
+        elif kind == "remove_last":
+            db.execute("DELETE FROM turns WHERE token = ? AND seq = "
+                       "(SELECT MAX(seq) FROM turns WHERE token = ?)", (token, token))
+        elif kind == "summary":
+            db.execute("UPDATE sessions SET summary = ? WHERE token = ?", (op[2], token))
+        elif kind == "clear":
+            db.execute("DELETE FROM turns WHERE token = ?", (token,))
+            db.execute("UPDATE sessions SET summary = '' WHERE token = ?", (token,))
+
+    def _load(self, db: sqlite3.Connection, token: str, limit: int) -> Optional[Tuple[List[dict], str]]:
+        row = db.execute("SELECT last_seen, summary FROM sessions WHERE token = ?", (token,)).fetchone()
+        if row is None or row[0] < time.time() - self.ttl:
+            return None
+        db.execute("UPDATE sessions SET last_seen = ? WHERE token = ?", (time.time(), token))
+        db.commit()
+        rows = db.execute("SELECT role, content, timestamp FROM turns WHERE token = ? "
+                          "ORDER BY seq DESC LIMIT ?", (token, limit)).fetchall()
+        turns = [{"role": role, "content": content, "timestamp": timestamp}
+                 for role, content, timestamp in reversed(rows)]
+        return turns, row[1]
+
+    def _expire(self, db: sqlite3.Connection):
+        cutoff = time.time() - self.ttl
+        try:
+            with db:
+                tokens = [t for (t,) in db.execute("SELECT token FROM sessions WHERE last_seen < ?", (cutoff,))]
+                for token in tokens:
+                    db.execute("DELETE FROM turns WHERE token = ?", (token,))
+                    db.execute("DELETE FROM sessions WHERE token = ?", (token,))
+        except sqlite3.Error as e:
+            logger.error(f"Session store expiry failed: {e}")
+            return
+        if tokens:
+            self.expired += len(tokens)
+            logger.info(f"Session store: expired {len(tokens)} idle sessions")
@@ -1,3 +1,19 @@
+// Binary audio frame layout, mirrored from audio_framing.py:
+// uint8 type, uint32 big-endian sequence number, then the raw payload.
+const FRAME_HEADER_SIZE = 5;
+const FRAME_PCM = 0x01;
+const FRAME_MP3 = 0x02;
+const FRAME_OPUS = 0x03;
+
+// Compressed uplink, opted into with ?uplink=opus: MediaRecorder output is
+// sent as is and decoded by Deepgram
+const OPUS_MIME_TYPES = ['audio/webm;codecs=opus', 'audio/ogg;codecs=opus'];
+const OPUS_BITRATE = 24000;
+const OPUS_TIMESLICE_MS = 100;
+
+// The server's session token, kept so a reload resumes the conversation
+const SESSION_TOKEN_KEY = 'voiceBridgeSession';
+
 class VoiceBridge {
     constructor() {
         this.ws = null;
@@ -6,6 +22,25 @@ class VoiceBridge {
         this.audioChunks = [];
         this.isRecording = false;
         this.isConnected = false;
+        this.playback = null;
+        this.playingAudio = new Set();
+        this.partialResponseEl = null;
+        this.lastUserEl = null;
+        // A response is being prepared or played (barge-in target)
+        this.responseActive = false;
+        // Audio and text of an interrupted response still in flight are dropped
+        this.suppressAudio = false;
+        // Binary audio frames are used once the server acknowledges them;
+        // until then (or against an older server) audio goes as base64 JSON.
+        this.binaryAudio = false;
+        this.uplinkSeq = 0;
+        // Audio format sent to the server: 'pcm', or 'opus' if requested
+        // and accepted in the hello exchange
+        this.opusMimeType = this.pickOpusMimeType();
+        this.uplink = 'pcm';
+        this.micStream = null;
+        this.recorder = null;
+        this.recorderQueue = Promise.resolve();
         
         this.initializeElements();
         this.connectWebSocket();
@@ -27,15 +62,27 @@ class VoiceBridge {
         const wsUrl = `${protocol}//${window.location.host}/ws`;
         
         this.ws = new WebSocket(wsUrl);
+        this.ws.binaryType = 'arraybuffer';
         
         this.ws.onopen = () => {
             this.isConnected = true;
+            this.ws.send(JSON.stringify({
+                type: 'control',
+                action: 'hello',
+                binary: true,
+                uplink: this.opusMimeType ? 'opus' : 'pcm',
+                session_token: localStorage.getItem(SESSION_TOKEN_KEY)
+            }));
             this.updateStatus('Connected', true);
             this.talkButton.disabled = false;
             this.addMessage('Connected to voice bridge', 'system');
         };
         
         this.ws.onmessage = async (event) => {
+            if (event.data instanceof ArrayBuffer) {
+                await this.handleFrame(event.data);
+                return;
+            }
             const message = JSON.parse(event.data);
             await this.handleMessage(message);
         };
@@ -77,38 +124,35 @@ class VoiceBridge {
     async startRecording() {
         if (!this.isConnected || this.isRecording) return;
         
+        if (this.responseActive) {
+            // Barge-in: stop talking right away and let the server cancel
+            // the rest of the response
+            this.flushPlayback();
+            this.suppressAudio = true;
+            this.ws.send(JSON.stringify({
+                type: 'control',
+                action: 'interrupt'
+            }));
+        }
+        
         try {
-            const stream = await navigator.mediaDevices.getUserMedia({ 
-                audio: {
-                    channelCount: 1,
-                    sampleRate: 16000,
-                    echoCancellation: true,
-                    noiseSuppression: true
-                } 
-            });
+            if (!this.micStream) {
+                this.micStream = await navigator.mediaDevices.getUserMedia({ 
+                    audio: {
+                        channelCount: 1,
+                        sampleRate: 16000,
+                        echoCancellation: true,
+                        noiseSuppression: true
+                    } 
+                });
+            }
             
             this.audioContext = new AudioContext({ sampleRate: 16000 });
-            const source = this.audioContext.createMediaStreamSource(stream);
-            const processor = this.audioContext.createScriptProcessor(4096, 1, 1);
-            
-            processor.onaudioprocess = (e) => {
-                if (!this.isRecording) return;
-                
-                const inputData = e.inputBuffer.getChannelData(0);
-                const pcmData = this.float32ToPCM16(inputData);
-                
-                if (this.ws.readyState === WebSocket.OPEN) {
-                    this.ws.send(JSON.stringify({
-                        type: 'audio',
-                        data: this.arrayBufferToBase64(pcmData.buffer)
-                    }));
-                }
-                
-                this.updateVisualizer(inputData);
-            };
-            
-            source.connect(processor);
-            processor.connect(this.audioContext.destination);
+            const source = this.audioContext.createMediaStreamSource(this.micStream);
+            await this.connectCapture(source);
+            if (this.uplink === 'opus') {
+                this.resumeRecorder();
+            }
             
             this.isRecording = true;
             this.talkButton.classList.add('recording');
@@ -127,12 +171,74 @@ class VoiceBridge {
         this.talkButton.classList.remove('recording');
         this.visualizerEl.style.display = 'none';
         
+        if (this.recorder && this.recorder.state === 'recording') {
+            // Send what has been recorded so far instead of holding the end
+            // of the utterance until the next press
+            this.recorder.requestData();
+            this.recorder.pause();
+        }
+        
         if (this.audioContext) {
             this.audioContext.close();
             this.audioContext = null;
         }
     }
     
+    async connectCapture(source) {
+        const onBlock = (samples) => {
+            if (!this.isRecording) return;
+            if (this.uplink === 'pcm' && this.ws.readyState === WebSocket.OPEN) {
+                this.sendAudio(this.float32ToPCM16(samples).buffer, FRAME_PCM);
+            }
+            this.updateVisualizer(samples);
+        };
+        
+        if (this.audioContext.audioWorklet) {
+            await this.audioContext.audioWorklet.addModule('/static/capture-worklet.js');
+            const node = new AudioWorkletNode(this.audioContext, 'capture-processor');
+            node.port.onmessage = (e) => onBlock(e.data);
+            source.connect(node);
+            node.connect(this.audioContext.destination);
+            return;
+        }
+        
+        // Browsers without AudioWorklet
+        const processor = this.audioContext.createScriptProcessor(4096, 1, 1);
+        processor.onaudioprocess = (e) => onBlock(e.inputBuffer.getChannelData(0));
+        source.connect(processor);
+        processor.connect(this.audioContext.destination);
+    }
+    
+    pickOpusMimeType() {
+        if (new URLSearchParams(window.location.search).get('uplink') !== 'opus') return null;
+        if (!window.MediaRecorder) return null;
+        return OPUS_MIME_TYPES.find((type) => MediaRecorder.isTypeSupported(type)) || null;
+    }
+    
+    resumeRecorder() {
+        if (this.recorder) {
+            if (this.recorder.state === 'paused') this.recorder.resume();
+            return;
+        }
+        // One recording for the whole session, paused between presses:
+        // Deepgram reads the uplink as a single WebM/Ogg stream
+        this.recorder = new MediaRecorder(this.micStream, {
+            mimeType: this.opusMimeType,
+            audioBitsPerSecond: OPUS_BITRATE
+        });
+        this.recorder.ondataavailable = (e) => {
+            if (e.data.size === 0) return;
+            // Keep blobs in order while their bytes are read
+            this.recorderQueue = this.recorderQueue.then(async () => {
+                const buffer = await e.data.arrayBuffer();
+                if (this.ws.readyState === WebSocket.OPEN) {
+                    this.sendAudio(buffer, FRAME_OPUS);
+                }
+            });
+        };
+        this.recorder.start(OPUS_TIMESLICE_MS);
+    }
+    
     float32ToPCM16(float32Array) {
         const pcm16 = new Int16Array(float32Array.length);
         for (let i = 0; i < float32Array.length; i++) {
@@ -142,6 +248,24 @@ class VoiceBridge {
         return pcm16;
     }
     
+    sendAudio(buffer, frameType) {
+        if (!this.binaryAudio) {
+            this.ws.send(JSON.stringify({
+                type: 'audio',
+                data: this.arrayBufferToBase64(buffer)
+            }));
+            return;
+        }
+        
+        const frame = new Uint8Array(FRAME_HEADER_SIZE + buffer.byteLength);
+        const header = new DataView(frame.buffer);
+        header.setUint8(0, frameType);
+        header.setUint32(1, this.uplinkSeq);
+        frame.set(new Uint8Array(buffer), FRAME_HEADER_SIZE);
+        this.uplinkSeq = (this.uplinkSeq + 1) >>> 0;
+        this.ws.send(frame);
+    }
+    
     arrayBufferToBase64(buffer) {
         const bytes = new Uint8Array(buffer);
         let binary = '';
@@ -161,18 +285,91 @@ class VoiceBridge {
         });
     }
     
+    async handleFrame(data) {
+        const header = new DataView(data);
+        const frameType = header.getUint8(0);
+        const audio = new Uint8Array(data, FRAME_HEADER_SIZE);
+        
+        if (frameType !== FRAME_MP3) {
+            console.warn('Ignoring unexpected audio frame type', frameType);
+            return;
+        }
+        if (this.suppressAudio) return;
+        
+        if (this.playback) {
+            this.enqueueAudio(audio);
+        } else {
+            await this.playAudioBytes(audio);
+        }
+    }
+    
     async handleMessage(message) {
         switch (message.type) {
+            case 'hello':
+                this.binaryAudio = message.binary === true;
+                this.uplink = message.uplink === 'opus' && this.opusMimeType ? 'opus' : 'pcm';
+                if (message.session_token) {
+                    localStorage.setItem(SESSION_TOKEN_KEY, message.session_token);
+                }
+                if (message.history && message.history.length > 0) {
+                    for (const msg of message.history) {
+                        this.addMessage(msg.content, msg.role === 'user' ? 'user' : 'assistant');
+                    }
+                    this.addMessage(`Resumed conversation (${message.history.length} messages)`, 'system');
+                }
+                break;
+                
             case 'transcription':
-                this.addMessage(message.text, 'user');
+                if (message.merged && this.lastUserEl) {
+                    // The user kept talking; this replaces the earlier fragment
+                    this.lastUserEl.textContent = message.text;
+                } else {
+                    this.lastUserEl = this.addMessage(message.text, 'user');
+                }
+                this.responseActive = true;
+                break;
+                
+            case 'interrupt':
+                this.flushPlayback();
+                this.suppressAudio = false;
+                break;
+                
+            case 'response_partial':
+                if (this.suppressAudio) break;
+                if (!this.partialResponseEl) {
+                    this.partialResponseEl = this.addMessage('', 'assistant');
+                }
+                this.partialResponseEl.textContent += message.text;
+                this.conversationEl.scrollTop = this.conversationEl.scrollHeight;
                 break;
                 
             case 'response':
-                this.addMessage(message.text, 'assistant');
+                if (this.partialResponseEl) {
+                    this.partialResponseEl.textContent = message.text;
+                    this.partialResponseEl = null;
+                } else {
+                    this.addMessage(message.text, 'assistant');
+                }
+                break;
+                
+            case 'audio_start':
+                this.suppressAudio = false;
+                this.startPlayback();
                 break;
                 
             case 'audio':
-                await this.playAudio(message.data);
+                if (this.suppressAudio) break;
+                if (this.playback) {
+                    this.enqueueAudio(this.base64ToBytes(message.data));
+                } else {
+                    await this.playAudio(message.data);
+                }
+                break;
+                
+            case 'audio_end':
+                this.responseActive = false;
+                this.endPlayback();
+                console.debug(`TTS first byte ${message.tts_first_byte_ms} ms, total ${message.tts_total_ms} ms`);
                 break;
                 
             case 'status':
@@ -184,36 +381,118 @@ class VoiceBridge {
                 break;
                 
             case 'error':
+                this.responseActive = false;
                 this.addMessage(`Error: ${message.message}`, 'system');
                 break;
         }
     }
     
+    base64ToBytes(base64Audio) {
+        const audioData = atob(base64Audio);
+        const bytes = new Uint8Array(audioData.length);
+        for (let i = 0; i < audioData.length; i++) {
+            bytes[i] = audioData.charCodeAt(i);
+        }
+        return bytes;
+    }
+    
     async playAudio(base64Audio) {
+        await this.playAudioBytes(this.base64ToBytes(base64Audio));
+    }
+    
+    async playAudioBytes(bytes) {
         try {
-            const audioData = atob(base64Audio);
-            const arrayBuffer = new ArrayBuffer(audioData.length);
-            const view = new Uint8Array(arrayBuffer);
-            
-            for (let i = 0; i < audioData.length; i++) {
-                view[i] = audioData.charCodeAt(i);
-            }
-            
-            const audioBlob = new Blob([arrayBuffer], { type: 'audio/mpeg' });
+            const audioBlob = new Blob([bytes], { type: 'audio/mpeg' });
             const audioUrl = URL.createObjectURL(audioBlob);
             const audio = new Audio(audioUrl);
+            this.trackAudio(audio, audioUrl);
             
             await audio.play();
             
-            audio.onended = () => {
-                URL.revokeObjectURL(audioUrl);
-            };
-            
         } catch (error) {
             console.error('Error playing audio:', error);
         }
     }
     
+    startPlayback() {
+        // Streamed responses arrive as MP3 fragments between audio_start and
+        // audio_end. Where MediaSource can take MP3 the fragments are played
+        // as they arrive; otherwise they are buffered and played at the end.
+        const playback = { chunks: [], ended: false, sourceBuffer: null, audio: null };
+        this.playback = playback;
+        
+        if (!(window.MediaSource && MediaSource.isTypeSupported('audio/mpeg'))) return;
+        
+        const mediaSource = new MediaSource();
+        playback.mediaSource = mediaSource;
+        playback.url = URL.createObjectURL(mediaSource);
+        playback.audio = new Audio(playback.url);
+        this.trackAudio(playback.audio, playback.url);
+        
+        mediaSource.addEventListener('sourceopen', () => {
+            playback.sourceBuffer = mediaSource.addSourceBuffer('audio/mpeg');
+            playback.sourceBuffer.addEventListener('updateend', () => this.appendPending(playback));
+            this.appendPending(playback);
+        }, { once: true });
+        
+        playback.audio.play().catch((error) => console.error('Error playing audio:', error));
+    }
+    
+    enqueueAudio(bytes) {
+        this.playback.chunks.push(bytes);
+        this.appendPending(this.playback);
+    }
+    
+    appendPending(playback) {
+        const sourceBuffer = playback.sourceBuffer;
+        if (!sourceBuffer || sourceBuffer.updating) return;
+        
+        if (playback.chunks.length > 0) {
+            sourceBuffer.appendBuffer(playback.chunks.shift());
+        } else if (playback.ended && playback.mediaSource.readyState === 'open') {
+            playback.mediaSource.endOfStream();
+        }
+    }
+    
+    endPlayback() {
+        const playback = this.playback;
+        if (!playback) return;
+        this.playback = null;
+        playback.ended = true;
+        
+        if (playback.mediaSource) {
+            this.appendPending(playback);
+            return;
+        }
+        
+        const audioUrl = URL.createObjectURL(new Blob(playback.chunks, { type: 'audio/mpeg' }));
+        const audio = new Audio(audioUrl);
+        this.trackAudio(audio, audioUrl);
+        audio.play().catch((error) => console.error('Error playing audio:', error));
+    }
+    
+    trackAudio(audio, url) {
+        this.playingAudio.add(audio);
+        audio.onended = () => {
+            this.playingAudio.delete(audio);
+            URL.revokeObjectURL(url);
+        };
+    }
+    
+    flushPlayback() {
+        // Stop everything that is playing or queued for the current response
+        this.playback = null;
+        this.responseActive = false;
+        for (const audio of this.playingAudio) {
+            audio.pause();
+            audio.onended();
+        }
+        if (this.partialResponseEl) {
+            this.partialResponseEl.textContent += ' …';
+            this.partialResponseEl = null;
+        }
+    }
+    
     addMessage(text, type) {
         const messageEl = document.createElement('div');
         messageEl.className = `message ${type}`;
@@ -221,6 +500,7 @@ class VoiceBridge {
         
         this.conversationEl.appendChild(messageEl);
         this.conversationEl.scrollTop = this.conversationEl.scrollHeight;
+        return messageEl;
     }
     
     updateStatus(text, connected) {
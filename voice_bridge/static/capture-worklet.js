@@ -0,0 +1,34 @@
+// Collects microphone samples on the audio thread and hands them to the
+// page in blocks of 4096 (256 ms at 16 kHz), the size the ScriptProcessor
+// path used. The page converts them to PCM (or only uses them for the
+// level meter when Opus is sent).
+const BLOCK_SIZE = 4096;
+
+class CaptureProcessor extends AudioWorkletProcessor {
+    constructor() {
+        super();
+        this.block = new Float32Array(BLOCK_SIZE);
+        this.filled = 0;
+    }
+
+    process(inputs) {
+        const input = inputs[0][0];
+        if (!input) return true;
+
+        let offset = 0;
+        while (offset < input.length) {
+            const count = Math.min(input.length - offset, BLOCK_SIZE - this.filled);
+            this.block.set(input.subarray(offset, offset + count), this.filled);
+            this.filled += count;
+            offset += count;
+            if (this.filled === BLOCK_SIZE) {
+                this.port.postMessage(this.block, [this.block.buffer]);
+                this.block = new Float32Array(BLOCK_SIZE);
+                this.filled = 0;
+            }
+        }
+        return true;
+    }
+}
+
+registerProcessor('capture-processor', CaptureProcessor);
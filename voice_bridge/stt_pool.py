@@ -0,0 +1,228 @@
+"""Pool of pre-opened live transcription connections.
+
+Opening a Deepgram live websocket takes a TCP/TLS handshake plus the
+upgrade request, and nothing the user says is transcribed until it is done.
+STTConnectionPool keeps ``size`` connections open ahead of time:
+
+- ``acquire()`` hands out an idle connection and opens a replacement in the
+  background. If none is idle it opens one directly (a "cold" start).
+- Every ``check_interval`` seconds idle connections are sent a KeepAlive,
+  which also serves as the health check. Connections that fail it, report
+  that they are disconnected, or have been idle for ``max_idle`` seconds are
+  closed and replaced.
+- A connection is used by one session only and closed when it ends;
+  transcription state is never carried over to another session.
+
+Deepgram delivers events to the handlers registered before ``start()``, so
+each connection is opened with handlers that forward to whichever session
+``attach``es to it later.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from deepgram import LiveOptions, LiveTranscriptionEvents
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+FORWARDED_EVENTS = (
+    LiveTranscriptionEvents.Transcript,
+    LiveTranscriptionEvents.SpeechStarted,
+    LiveTranscriptionEvents.UtteranceEnd,
+    LiveTranscriptionEvents.Metadata,
+    LiveTranscriptionEvents.Error,
+    LiveTranscriptionEvents.Close,
+)
+
+
+class PooledConnection:
+    """A started live connection plus the session handlers it forwards to."""
+
+    def __init__(self):
+        self.connection = None
+        self.handlers: Dict[str, Callable[..., Awaitable]] = {}
+        self.opened = time.monotonic()
+        self.checked = self.opened
+        self.remote_closed = False
+
+    def forward(self, event):
+        async def handler(client, *args, **kwargs):
+            if event == LiveTranscriptionEvents.Close:
+                self.remote_closed = True
+            target = self.handlers.get(event)
+            if target:
+                await target(*args, **kwargs)
+        return handler
+
+    def attach(self, handlers: Dict[str, Callable[..., Awaitable]]):
+        self.handlers = dict(handlers)
+
+    async def close(self):
+        self.handlers = {}
+        if self.connection:
+            try:
+                await self.connection.finish()
+            except Exception as e:
+                logger.debug(f"Error closing STT connection: {e}")
+            self.connection = None
+
+
+def live_options(uplink: str = "pcm") -> LiveOptions:
+    """Options for a live connection that receives ``uplink`` audio."""
+    options = dict(
+        model=Config.DEEPGRAM_MODEL,
+        language="en-US",
+        smart_format=True,
+        interim_results=True,
+        utterance_end_ms=1000,
+        vad_events=True
+    )
+    if uplink == "pcm":
+        options.update(encoding="linear16", channels=Config.AUDIO_CHANNELS, sample_rate=Config.AUDIO_SAMPLE_RATE)
+    # Containerized audio (Opus in WebM/Ogg) must not set an encoding;
+    # Deepgram reads it from the stream
+    return LiveOptions(**options)
+
+
+def deepgram_connector(client, options) -> Callable[[PooledConnection], Awaitable]:
+    """Return a coroutine function that opens and starts a live connection."""
+    async def connect(pooled: PooledConnection):
+        connection = client.listen.asyncwebsocket.v("1")
+        for event in FORWARDED_EVENTS:
+            connection.on(event, pooled.forward(event))
+        if await connection.start(options) is False:
+            raise ConnectionError("Deepgram connection could not be started")
+        return connection
+    return connect
+
+
+class STTConnectionPool:
+    def __init__(self, connect: Callable[[PooledConnection], Awaitable], size: int = 2,
+                 check_interval: float = 5.0, max_idle: float = 300.0):
+        self.connect = connect
+        self.size = size
+        self.check_interval = check_interval
+        self.max_idle = max_idle
+        self.idle = []
+        self.fill_lock = asyncio.Lock()
+        self.check_task: Optional[asyncio.Task] = None
+        self.fill_task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.opened = 0
+        self.prewarmed_hits = 0
+        self.cold_starts = 0
+        self.discarded = 0
+        self.failures = 0
+        self.total_connect = 0.0
+
+    async def open(self) -> PooledConnection:
+        pooled = PooledConnection()
+        start = time.perf_counter()
+        try:
+            pooled.connection = await self.connect(pooled)
+        except Exception:
+            self.failures += 1
+            raise
+        self.opened += 1
+        self.total_connect += time.perf_counter() - start
+        pooled.opened = pooled.checked = time.monotonic()
+        return pooled
+
+    def start(self):
+        """Open the initial connections and start health checks."""
+        if self.size > 0 and self.check_task is None:
+            self.refill()
+            self.check_task = asyncio.create_task(self._check_loop())
+
+    def refill(self):
+        if self.size > 0 and not self.closed and (self.fill_task is None or self.fill_task.done()):
+            self.fill_task = asyncio.create_task(self._fill())
+
+    async def _fill(self):
+        async with self.fill_lock:
+            while not self.closed and len(self.idle) < self.size:
+                try:
+                    pooled = await self.open()
+                except Exception as e:
+                    logger.warning(f"Could not pre-open STT connection: {e}")
+                    return  # retried on the next health check
+                if self.closed:
+                    await pooled.close()
+                    return
+                self.idle.append(pooled)
+                logger.debug(f"STT pool: {len(self.idle)}/{self.size} connections ready")
+
+    async def acquire(self) -> PooledConnection:
+        """Take a ready connection, or open one if the pool is empty."""
+        while self.idle:
+            pooled = self.idle.pop()  # most recently checked first
+            if await self._healthy(pooled):
+                self.prewarmed_hits += 1
+                self.refill()
+                return pooled
+            await self._discard(pooled)
+        self.cold_starts += 1
+        self.refill()
+        return await self.open()
+
+    async def _healthy(self, pooled: PooledConnection) -> bool:
+        if pooled.remote_closed:
+            return False
+        try:
+            return bool(await pooled.connection.is_connected())
+        except Exception:
+            return False
+
+    async def _discard(self, pooled: PooledConnection):
+        self.discarded += 1
+        await pooled.close()
+
+    async def _check_loop(self):
+        while not self.closed:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    async def check(self):
+        """Keep idle connections alive and replace the unhealthy ones."""
+        now = time.monotonic()
+        for pooled in list(self.idle):
+            healthy = now - pooled.opened < self.max_idle and await self._healthy(pooled)
+            if healthy:
+                try:
+                    healthy = await pooled.connection.keep_alive() is not False
+                except Exception:
+                    healthy = False
+            if pooled not in self.idle:
+                continue  # acquired meanwhile
+            if healthy:
+                pooled.checked = now
+            else:
+                logger.info("STT pool: replacing stale connection")
+                self.idle.remove(pooled)
+                await self._discard(pooled)
+        self.refill()
+
+    async def close(self):
+        self.closed = True
+        for task in (self.check_task, self.fill_task):
+            if task:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        idle, self.idle = self.idle, []
+        await asyncio.gather(*(pooled.close() for pooled in idle), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": len(self.idle),
+            "opened": self.opened,
+            "prewarmed_hits": self.prewarmed_hits,
+            "cold_starts": self.cold_starts,
+            "discarded": self.discarded,
+            "failures": self.failures,
+            "avg_connect_ms": self.total_connect / self.opened * 1000 if self.opened else 0.0
+        }
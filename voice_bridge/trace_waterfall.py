@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Merge voice bridge and monitor span logs into one waterfall per turn.
+
+Both sides log spans under the trace id that the bridge request carries (see
+tracing.py): the voice bridge with TRACE_LOG, the monitors with
+NOVA_TRACE_LOG. Spans are nested under their parents and drawn to scale from
+the final transcript, so queueing in the monitor, processing and the time
+spent on either side of the bridge can be told apart:
+
+    Trace 4bf92f35  2025-06-01 12:00:01  1234.5 ms  complete
+      turn                   voice_bridge       0.0   1234.5  ████████████████████████████████████████
+        queue                voice_bridge       0.0      1.2  █
+        bridge               voice_bridge       1.2    802.4  ██████████████████████████
+          monitor.pickup     monitor            3.1      1.0  █
+          monitor.queue      monitor            4.1    310.2  ██████████
+          ...
+
+Usage (from voice_bridge/):
+    python trace_waterfall.py traces/voice_bridge.jsonl traces/monitor.jsonl [--last 5] [--trace ID] [--json]
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import List
+
+from tracing import read_spans
+
+
+def ordered(spans: List[dict]) -> List[tuple]:
+    """(depth, span) pairs, children after their parent, siblings by start time."""
+    ids = {span["span_id"] for span in spans}
+    children = defaultdict(list)
+    roots = []
+    for span in spans:
+        if span.get("parent_id") in ids:
+            children[span["parent_id"]].append(span)
+        else:
+            roots.append(span)
+    result = []
+
+    def visit(span, depth):
+        result.append((depth, span))
+        for child in children[span["span_id"]]:
+            visit(child, depth + 1)
+
+    for root in roots:
+        visit(root, 0)
+    return result
+
+
+def waterfall(trace_id: str, spans: List[dict], width: int = 40) -> str:
+    start = min(span["start"] for span in spans)
+    end = max(span["end"] for span in spans)
+    total = max(end - start, 1e-9)
+    root = next((span for span in spans if span["name"] == "turn"), None)
+    outcome = root["attrs"].get("outcome", "") if root else ""
+    lines = [f"Trace {trace_id[:8]}  {datetime.fromtimestamp(start):%Y-%m-%d %H:%M:%S}  "
+             f"{total * 1000:.1f} ms  {outcome}".rstrip()]
+    for depth, span in ordered(spans):
+        offset = (span["start"] - start) / total
+        length = (span["end"] - span["start"]) / total
+        bar = " " * int(offset * width) + "█" * max(1, round(length * width))
+        name = "  " * depth + span["name"]
+        lines.append(f"  {name:<22} {span['service']:<14} {(span['start'] - start) * 1000:8.1f} "
+                     f"{(span['end'] - span['start']) * 1000:8.1f}  {bar}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="span logs (JSON lines) from both sides")
+    parser.add_argument("--trace", help="only this trace id (a prefix is enough)")
+    parser.add_argument("--last", type=int, default=10, help="show the newest N traces (default 10)")
+    parser.add_argument("--width", type=int, default=40)
+    parser.add_argument("--json", action="store_true", help="print the merged spans as JSON instead")
+    args = parser.parse_args()
+
+    traces = read_spans(args.logs)
+    selected = sorted(traces.items(), key=lambda item: item[1][0]["start"])
+    if args.trace:
+        selected = [(trace_id, spans) for trace_id, spans in selected if trace_id.startswith(args.trace)]
+    else:
+        selected = selected[-args.last:]
+
+    if args.json:
+        print(json.dumps({trace_id: [span for _, span in ordered(spans)] for trace_id, spans in selected}, indent=2))
+        return
+    print("\n\n".join(waterfall(trace_id, spans, args.width) for trace_id, spans in selected))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Trace context across the MCP bridge, and the span logs on both sides of it.
+
+Each turn gets a trace id. The bridge request carries it, together with the
+id of the voice bridge's span for the request and the time it was sent:
+
+    "trace": {"trace_id": "4bf9...", "span_id": "00f0...", "sent_at": 1718000000.123}
+
+The monitor's RequestPool (monitor_pool.py) logs its spans for the request
+under the same trace id, as children of that span:
+
+    monitor.pickup   sent_at -> the monitor submitted the request to its pool
+    monitor.queue    submitted -> a worker started on it
+    monitor.process  worker started -> final record produced
+    monitor.write    writing the final record
+
+and the final response record carries the monitor's timestamps back in its own
+``trace`` field. The voice bridge logs the spans of each turn (see
+``log_turn``). Timestamps are wall-clock seconds so the two processes' logs
+line up; ``trace_waterfall.py`` merges them into one waterfall per turn.
+
+SpanLog writes from a background thread; ``record`` only queues the span.
+Each batch of spans is appended with a single write, so several processes
+(the voice bridge's workers) can share one log.
+"""
+
+import json
+import os
+import queue
+import secrets
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+_STOP = object()
+
+
+def new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+
+def new_span_id() -> str:
+    return secrets.token_hex(8)
+
+
+class SpanLog:
+    """Appends finished spans as JSON lines to ``path``."""
+
+    def __init__(self, path, service: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.service = service
+        self.spans: "queue.SimpleQueue" = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name="span-log", daemon=True)
+        self.thread.start()
+
+    def record(self, trace_id: str, name: str, start: float, end: float, parent_id: Optional[str] = None,
+               span_id: Optional[str] = None, **attrs) -> str:
+        span_id = span_id or new_span_id()
+        self.spans.put({
+            "trace_id": trace_id,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "service": self.service,
+            "name": name,
+            "start": start,
+            "end": end,
+            "attrs": attrs
+        })
+        return span_id
+
+    def _run(self):
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            while True:
+                batch = [self.spans.get()]
+                while True:
+                    try:
+                        batch.append(self.spans.get_nowait())
+                    except queue.Empty:
+                        break
+                lines = "".join(json.dumps(span) + "\n" for span in batch if span is not _STOP)
+                if lines:
+                    os.write(fd, lines.encode("utf-8"))
+                if _STOP in batch:
+                    return
+        finally:
+            os.close(fd)
+
+    def close(self):
+        self.spans.put(_STOP)
+        self.thread.join()
+
+
+# Spans of a voice bridge turn, as (name, from stage, to stage) of its
+# TurnTimer marks; None is the final transcript (see metrics.py)
+TURN_SPANS = (
+    ("queue", None, "turn_start"),
+    ("bridge", "turn_start", "response"),
+    ("speech", "response_first", "audio_sent"),
+)
+
+
+def log_turn(span_log: SpanLog, timer, **attrs):
+    """Log a finished turn: a root span plus one child per TURN_SPANS entry it reached.
+    The bridge span uses ``timer.request_span_id``, the parent of the monitor's spans."""
+    if not timer.marks:
+        return
+    marks = dict(timer.marks)
+    end = max(marks.values())
+    span_log.record(timer.trace_id, "turn", timer.wall_start, timer.wall_start + end,
+                    span_id=timer.span_id, outcome=timer.outcome,
+                    **{f"{stage}_ms": round(seconds * 1000, 1) for stage, seconds in marks.items()}, **attrs)
+    for name, first, last in TURN_SPANS:
+        start = 0.0 if first is None else marks.get(first)
+        if start is None:
+            continue
+        # A span cut short by barge-in ends with the turn
+        span_end = marks.get(last, end)
+        span_log.record(timer.trace_id, name, timer.wall_start + start, timer.wall_start + span_end,
+                        parent_id=timer.span_id,
+                        span_id=timer.request_span_id if name == "bridge" else None)
+
+
+def read_spans(paths: Iterable) -> Dict[str, List[dict]]:
+    """Spans from the given logs, grouped by trace id and sorted by start time."""
+    traces = defaultdict(list)
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    span = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line still being written
+                traces[span["trace_id"]].append(span)
+    for spans in traces.values():
+        spans.sort(key=lambda span: span["start"])
+    return dict(traces)
@@ -0,0 +1,259 @@
+"""Text-to-speech engine for the voice bridge.
+
+The ElevenLabs client is synchronous: ``text_to_speech.convert`` returns a
+blocking iterator of MP3 chunks. TTSEngine drives that iterator from a worker
+thread so synthesis never stalls the event loop shared by every session, and
+exposes both a streaming and a single-shot interface.
+
+Long responses can also be split at sentence boundaries and synthesized
+concurrently by a bounded number of workers (``stream_sentences``); chunks
+are still delivered strictly in sentence order, so the first sentence plays
+while later ones are being synthesized. ``stream_ordered`` does the same for
+text that is still arriving, with SentenceBuffer cutting it into sentences.
+
+With an AudioCache (see audio_cache.py) every synthesized chunk is stored
+under its text and synthesis parameters and replayed from the cache the next
+time. ``prewarm`` fills it with phrases that are known in advance.
+"""
+
+import asyncio
+import logging
+import re
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Optional, Union
+
+from elevenlabs import VoiceSettings
+
+from audio_cache import AudioCache, audio_key
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_EXHAUSTED = object()
+
+
+async def iterate_in_thread(iterable: Iterable) -> AsyncIterator:
+    """Yield items from a blocking iterable, pulling each one in a worker thread."""
+    iterator = iter(iterable)
+    try:
+        while True:
+            item = await asyncio.to_thread(next, iterator, _EXHAUSTED)
+            if item is _EXHAUSTED:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            try:
+                close()
+            except ValueError:
+                # Still executing in the worker thread after a cancellation;
+                # it finishes on its own and the generator is discarded.
+                pass
+
+
+_SENTENCE_BREAK = re.compile(r'(?:(?<=[.!?])|(?<=[.!?]["\')\]]))\s+')
+
+
+def split_sentences(text: str, min_chars: int = Config.TTS_MIN_CHUNK_CHARS) -> List[str]:
+    """Split text at sentence boundaries, merging fragments shorter than min_chars."""
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_BREAK.split(text.strip()):
+        current = f"{current} {sentence}" if current else sentence
+        if len(current) >= min_chars:
+            chunks.append(current)
+            current = ""
+    if current:
+        if chunks and len(current) < min_chars:
+            chunks[-1] = f"{chunks[-1]} {current}"
+        else:
+            chunks.append(current)
+    return chunks
+
+
+class SentenceBuffer:
+    """Collects streamed text and releases sentence chunks as they complete."""
+
+    def __init__(self, min_chars: int = Config.TTS_MIN_CHUNK_CHARS):
+        self.min_chars = min_chars
+        self.tail = ""     # text after the last sentence boundary
+        self.pending = ""  # complete sentences shorter than min_chars
+
+    def feed(self, text: str) -> List[str]:
+        parts = _SENTENCE_BREAK.split(self.tail + text)
+        self.tail = parts.pop()
+        ready = []
+        for sentence in parts:
+            self.pending = f"{self.pending} {sentence}" if self.pending else sentence
+            if len(self.pending) >= self.min_chars:
+                ready.append(self.pending)
+                self.pending = ""
+        return ready
+
+    def flush(self) -> List[str]:
+        rest = " ".join(part for part in (self.pending, self.tail.strip()) if part)
+        self.pending = self.tail = ""
+        return [rest] if rest else []
+
+
+async def iterate_chunks(text: str) -> AsyncIterator[str]:
+    """The chunks SentenceBuffer cuts ``text`` into when it streams in."""
+    buffer = SentenceBuffer()
+    for chunk in buffer.feed(text) + buffer.flush():
+        yield chunk
+
+
+class TTSEngine:
+    def __init__(self, client, voice_id: str = Config.ELEVENLABS_VOICE_ID,
+                 model_id: str = Config.ELEVENLABS_MODEL_ID, cache: AudioCache = None):
+        self.client = client
+        self.cache = cache
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.voice_settings = VoiceSettings(
+            stability=0.5,
+            similarity_boost=0.5
+        )
+
+    def _convert(self, text: str, **kwargs) -> Iterable[bytes]:
+        return self.client.text_to_speech.convert(
+            voice_id=self.voice_id,
+            text=text,
+            model_id=self.model_id,
+            voice_settings=self.voice_settings,
+            **kwargs
+        )
+
+    def cache_key(self, text: str, **kwargs) -> str:
+        return audio_key(text, self.voice_id, self.model_id, self.voice_settings, **kwargs)
+
+    async def stream(self, text: str, **kwargs) -> AsyncIterator[Union[bytes, memoryview]]:
+        """Yield MP3 chunks as the provider produces them, or the cached clip."""
+        key = None
+        if self.cache:
+            key = self.cache_key(text, **kwargs)
+            cached = self.cache.get(key, disk=False)
+            if cached is None and self.cache.directory:
+                cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                logger.debug(f"Audio cache hit: {text[:50]}")
+                yield cached
+                return
+
+        chunks = []
+        response = await asyncio.to_thread(self._convert, text, **kwargs)
+        async for chunk in iterate_in_thread(response):
+            if chunk:
+                if key:
+                    chunks.append(chunk)
+                yield chunk
+        if key:
+            # Only complete clips are stored; an abandoned stream never gets here
+            await asyncio.to_thread(self.cache.put, key, b''.join(chunks))
+
+    async def stream_sentences(self, text: str,
+                               max_workers: int = Config.TTS_WORKERS) -> AsyncIterator[bytes]:
+        """Synthesize sentence chunks concurrently and yield audio in order.
+
+        At most ``max_workers`` chunks are synthesized at once. Chunks of the
+        sentence currently being played are yielded as soon as they arrive;
+        later sentences are buffered until their turn.
+        """
+        sentences = split_sentences(text)
+        if len(sentences) <= 1:
+            async for chunk in self.stream(text):
+                yield chunk
+            return
+
+        async def source():
+            for sentence in sentences:
+                yield sentence
+
+        async for chunk in self.stream_ordered(source(), max_workers):
+            yield chunk
+
+    async def stream_ordered(self, sentences: AsyncIterable[str],
+                             max_workers: int = Config.TTS_WORKERS) -> AsyncIterator[bytes]:
+        """Like stream_sentences, for sentences that are still being produced.
+
+        Synthesis of each sentence starts as soon as it arrives from
+        ``sentences`` (subject to ``max_workers``), so speech can begin before
+        the full text is known.
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+        ordered = asyncio.Queue()  # one chunk queue per sentence, in order
+        tasks = []
+
+        async def synthesize_sentence(sentence: str, previous: Optional[str], queue: asyncio.Queue):
+            # The preceding sentence keeps intonation continuous across chunks
+            neighbours = {"previous_text": previous} if previous else {}
+            async with semaphore:
+                try:
+                    async for chunk in self.stream(sentence, **neighbours):
+                        queue.put_nowait(chunk)
+                    queue.put_nowait(None)
+                except Exception as e:
+                    queue.put_nowait(e)
+
+        async def schedule():
+            previous = None
+            try:
+                async for sentence in sentences:
+                    queue = asyncio.Queue()
+                    tasks.append(asyncio.create_task(synthesize_sentence(sentence, previous, queue)))
+                    ordered.put_nowait(queue)
+                    previous = sentence
+            except Exception as e:
+                failed = asyncio.Queue()
+                failed.put_nowait(e)
+                ordered.put_nowait(failed)
+            finally:
+                ordered.put_nowait(None)
+
+        scheduler = asyncio.create_task(schedule())
+        try:
+            while True:
+                queue = await ordered.get()
+                if queue is None:
+                    break
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+        finally:
+            scheduler.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(scheduler, *tasks, return_exceptions=True)
+
+    async def synthesize(self, text: str) -> bytes:
+        """Synthesize ``text`` completely and return the MP3 bytes."""
+        chunks = []
+        async for chunk in self.stream(text):
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    async def prewarm(self, phrases: Iterable[str], sentence_chunking: bool = True, streamed: bool = False):
+        """Make sure the cache holds ``phrases`` the way they will be spoken.
+
+        With ``sentence_chunking`` the phrases are split like stream_sentences
+        splits them, so the cached chunks are the ones a response will ask for.
+        With ``streamed`` they are also cached as cut by SentenceBuffer, which
+        cannot merge a short last sentence into a chunk it already released.
+        """
+        if not self.cache:
+            return
+        for phrase in phrases:
+            try:
+                audio = self.stream_sentences(phrase) if sentence_chunking else self.stream(phrase)
+                async for _ in audio:
+                    pass
+                if streamed:
+                    async for _ in self.stream_ordered(iterate_chunks(phrase)):
+                        pass
+            except Exception as e:
+                logger.warning(f"Could not pre-warm audio for {phrase[:50]!r}: {e}")
+        logger.info(f"Audio cache pre-warmed: {self.cache.stats()}")
@@ -0,0 +1,141 @@
+"""Per-session queue of user utterances waiting to be answered.
+
+Deepgram can split one spoken request into several final transcripts, and
+sometimes repeats a final. Instead of dropping whatever arrives while a turn
+is running, the session queues it here:
+
+- finals arriving within ``window`` seconds of the previous one are merged
+  into a single utterance (one request to Claude),
+- a repeat of the text received just before is dropped,
+- when ``max_size`` utterances are already waiting, ``policy`` decides:
+  "merge" appends the text to the newest one, "drop_oldest" discards the
+  oldest, "drop_newest" discards the new text.
+
+``stats()`` reports queue depth, wait times and how often each case happened.
+"""
+
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Optional
+
+POLICIES = ("merge", "drop_oldest", "drop_newest")
+
+_WORDS = re.compile(r"[\w']+")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORDS.findall(text.lower()))
+
+
+class Utterance:
+    def __init__(self, text: str, now: float):
+        self.text = text
+        self.received = now  # first final
+        self.updated = now   # latest final merged in
+        self.parts = 1
+
+    def merge(self, text: str, now: float):
+        self.text = f"{self.text} {text}"
+        self.updated = now
+        self.parts += 1
+
+
+class UtteranceQueue:
+    def __init__(self, window: float = 1.0, max_size: int = 3, policy: str = "merge"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown utterance queue policy: {policy}")
+        self.window = window
+        self.max_size = max_size
+        self.policy = policy
+        self.items = deque()
+        self.available = asyncio.Event()
+        self.last_text = None
+        self.last_time = 0.0
+        self.received = 0
+        self.merged = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.dispatched = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def is_duplicate(self, text: str, now: Optional[float] = None) -> bool:
+        """True if ``text`` repeats the final received just before it."""
+        now = time.monotonic() if now is None else now
+        normalized = _normalize(text)
+        duplicate = normalized == self.last_text and now - self.last_time <= self.window
+        if duplicate:
+            self.duplicates += 1
+        self.last_text = normalized
+        self.last_time = now
+        return duplicate
+
+    def continues(self, utterance: Optional[Utterance], now: Optional[float] = None) -> bool:
+        """True if a final arriving now belongs to ``utterance``."""
+        now = time.monotonic() if now is None else now
+        return utterance is not None and now - utterance.updated <= self.window
+
+    def add(self, text: str, now: Optional[float] = None) -> str:
+        """Queue a final transcript; returns "queued", "merged" or "dropped"."""
+        now = time.monotonic() if now is None else now
+        self.received += 1
+        tail = self.items[-1] if self.items else None
+
+        if self.continues(tail, now):
+            tail.merge(text, now)
+            self.merged += 1
+            return "merged"
+
+        if len(self.items) >= self.max_size:
+            if self.policy == "merge":
+                tail.merge(text, now)
+                self.merged += 1
+                return "merged"
+            self.dropped += 1
+            if self.policy == "drop_newest":
+                return "dropped"
+            self.items.popleft()
+
+        self.items.append(Utterance(text, now))
+        self.max_depth = max(self.max_depth, len(self.items))
+        self.available.set()
+        return "queued"
+
+    def requeue(self, utterance: Utterance, text: str, now: Optional[float] = None):
+        """Merge ``text`` into an interrupted utterance and put it back at the head."""
+        now = time.monotonic() if now is None else now
+        self.received += 1
+        self.merged += 1
+        utterance.merge(text, now)
+        self.items.appendleft(utterance)
+        self.max_depth = max(self.max_depth, len(self.items))
+        self.available.set()
+
+    async def get(self) -> Utterance:
+        while not self.items:
+            self.available.clear()
+            await self.available.wait()
+        utterance = self.items.popleft()
+        wait = time.monotonic() - utterance.received
+        self.dispatched += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return utterance
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self.items),
+            "max_depth": self.max_depth,
+            "received": self.received,
+            "merged": self.merged,
+            "duplicates": self.duplicates,
+            "dropped": self.dropped,
+            "avg_wait_ms": self.total_wait / self.dispatched * 1000 if self.dispatched else 0.0,
+            "max_wait_ms": self.max_wait * 1000
+        }
@@ -0,0 +1,112 @@
+"""Voice activity gate for the PCM uplink.
+
+Deepgram bills and transcribes every frame it receives, silence included.
+VoiceActivityGate sits in front of it and only lets speech through:
+
+- Incoming 16-bit PCM is cut into ``frame_ms`` frames. Each frame's level
+  (RMS, in dBFS) and zero-crossing rate are computed for the whole chunk at
+  once with NumPy.
+- A frame is speech if its level is above the threshold. Quiet frames with
+  many zero crossings (unvoiced consonants like "s" or "f") also count when
+  they are within ``unvoiced_margin_db`` of it. The threshold is
+  ``threshold_db`` or ``noise_margin_db`` above the tracked noise floor,
+  whichever is higher.
+- When speech starts, the last ``pre_roll_ms`` of audio is sent first so the
+  onset isn't clipped. After speech stops, audio keeps flowing for
+  ``hang_over_ms`` so the recognizer sees the trailing silence it needs.
+
+The session sends a Finalize when a segment ends and KeepAlives while the
+gate is closed (see VoiceBridgeSession).
+"""
+
+from collections import deque
+from typing import List, Tuple
+
+import numpy as np
+
+
+class VoiceActivityGate:
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 20, threshold_db: float = -45.0,
+                 noise_margin_db: float = 10.0, unvoiced_margin_db: float = 10.0,
+                 unvoiced_zcr: float = 0.25, pre_roll_ms: int = 300, hang_over_ms: int = 600):
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * 2
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.unvoiced_margin_db = unvoiced_margin_db
+        self.unvoiced_zcr = unvoiced_zcr
+        self.hang_over_frames = max(1, hang_over_ms // frame_ms)
+        self.pre_roll = deque(maxlen=max(0, pre_roll_ms // frame_ms))
+        self.noise_floor_db = threshold_db - noise_margin_db
+        self.remainder = b""
+        self.active = False
+        self.hang = 0
+        self.frames = 0
+        self.forwarded = 0
+        self.segments = 0
+
+    def analyze(self, pcm: bytes) -> Tuple[np.ndarray, np.ndarray]:
+        """Level (dBFS) and zero-crossing rate of each whole frame in ``pcm``."""
+        samples = np.frombuffer(pcm, dtype="<i2").reshape(-1, self.frame_samples).astype(np.float32)
+        samples /= 32768.0
+        rms = np.sqrt(np.mean(samples * samples, axis=1))
+        level_db = 20.0 * np.log10(np.maximum(rms, 1e-9))
+        signs = np.signbit(samples)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_samples - 1)
+        return level_db, zcr
+
+    def classify(self, level_db: np.ndarray, zcr: np.ndarray) -> np.ndarray:
+        threshold = max(self.threshold_db, self.noise_floor_db + self.noise_margin_db)
+        speech = (level_db >= threshold) | (
+            (level_db >= threshold - self.unvoiced_margin_db) & (zcr >= self.unvoiced_zcr))
+        quiet = level_db[~speech]
+        if quiet.size:
+            # Follow the noise floor slowly so one loud burst doesn't raise it
+            self.noise_floor_db += 0.05 * (float(np.median(quiet)) - self.noise_floor_db)
+        return speech
+
+    def process(self, pcm: bytes) -> Tuple[bytes, bool]:
+        """Return the audio to forward for ``pcm`` and whether a segment ended."""
+        data = self.remainder + pcm
+        whole = len(data) - len(data) % self.frame_bytes
+        self.remainder = data[whole:]
+        if not whole:
+            return b"", False
+
+        speech = self.classify(*self.analyze(data[:whole]))
+        out: List[bytes] = []
+        ended = False
+        for i, is_speech in enumerate(speech.tolist()):
+            frame = data[i * self.frame_bytes:(i + 1) * self.frame_bytes]
+            if is_speech:
+                if not self.active:
+                    self.active = True
+                    self.segments += 1
+                    out.extend(self.pre_roll)
+                    self.pre_roll.clear()
+                self.hang = self.hang_over_frames
+                out.append(frame)
+            elif self.active:
+                out.append(frame)  # hang-over
+                self.hang -= 1
+                if self.hang <= 0:
+                    self.active = False
+                    ended = True
+            else:
+                self.pre_roll.append(frame)
+
+        self.frames += len(speech)
+        self.forwarded += len(out)
+        return b"".join(out), ended
+
+    def stats(self) -> dict:
+        suppressed = self.frames - self.forwarded
+        return {
+            "frames": self.frames,
+            "forwarded_frames": self.forwarded,
+            "suppressed_frames": suppressed,
+            "suppressed_pct": suppressed / self.frames * 100 if self.frames else 0.0,
+            "segments": self.segments,
+            "active": self.active,
+            "noise_floor_db": round(self.noise_floor_db, 1)
+        }
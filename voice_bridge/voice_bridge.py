@@ -2,55 +2,195 @@ import asyncio
 import json
 import base64
 import time
+import uuid
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from deepgram import DeepgramClient, LiveTranscriptionEvents, LiveOptions
-from elevenlabs import VoiceSettings
+from fastapi.responses import FileResponse, PlainTextResponse
+from deepgram import DeepgramClient, DeepgramClientOptions, LiveTranscriptionEvents
 from elevenlabs.client import ElevenLabs
 import logging
 from config import Config
 from context_manager import ContextManager
-from mcp_bridge_handler import MCPBridgeHandler
+from mcp_bridge_handler import TIMEOUT_REPLY, MCPBridgeHandler, create_transport
+from tts_engine import SentenceBuffer, TTSEngine
+from response_cache import ResponseCache
+from audio_cache import AudioCache
+from utterance_queue import UtteranceQueue
+from stt_pool import STTConnectionPool, deepgram_connector, live_options
+from vad import VoiceActivityGate
+from session_store import SessionStore
+from memory_index import MemoryIndex
+from metrics import PipelineMetrics, SharedMetrics, TurnTimer
+from tracing import SpanLog, log_turn
+from log_setup import SampledLog, configure_logging
+import claude_desktop_nova_bridge
+import nova_mcp_monitor
+from audio_framing import FRAME_MP3, FRAME_OPUS, FRAME_PCM, SEQ_MODULUS, decode_frame, encode_frame, iter_slices
 
-logging.basicConfig(level=logging.DEBUG)
+log_listener = configure_logging(Config.LOG_LEVEL, Config.LIBRARY_LOG_LEVEL, background=Config.LOG_BACKGROUND)
 logger = logging.getLogger(__name__)
 
+PROCESSING_ERROR_REPLY = "I'm having trouble processing that. Please try again."
+
+# Replies that are spoken often enough to keep synthesized ahead of time
+STOCK_PHRASES = [
+    TIMEOUT_REPLY,
+    PROCESSING_ERROR_REPLY,
+    *nova_mcp_monitor.CANNED_REPLIES.values(),
+    *claude_desktop_nova_bridge.CANNED_REPLIES.values()
+]
+
 app = FastAPI()
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 Config.validate()
 
-deepgram = DeepgramClient(Config.DEEPGRAM_API_KEY)
-elevenlabs = ElevenLabs(api_key=Config.ELEVENLABS_API_KEY)
+UPLINK_FRAMES = {"pcm": FRAME_PCM, "opus": FRAME_OPUS}
+pipeline_metrics = PipelineMetrics()
+# Shared by all sessions: the cached answers are about the user, not the tab
+response_cache = ResponseCache(max_bytes=Config.RESPONSE_CACHE_MAX_BYTES) if Config.RESPONSE_CACHE else None
+
+# Created by create_services() when the app starts, so that with WORKERS > 1
+# every worker process opens its own clients, connections and databases
+# (and the parent, which only supervises the workers, opens none)
+deepgram = None
+stt_pools = {}
+elevenlabs = None
+audio_cache = None
+tts = None
+session_store = None
+memory_index = None
+span_log = None
+shared_metrics = None
+
+@app.on_event("startup")
+async def create_services():
+    global deepgram, elevenlabs, audio_cache, tts, session_store, memory_index, span_log, shared_metrics
+    deepgram = DeepgramClient(
+        Config.DEEPGRAM_API_KEY,
+        DeepgramClientOptions(url=Config.DEEPGRAM_URL) if Config.DEEPGRAM_URL else None
+    )
+    
+    # One pool per uplink format, since the audio format is fixed when a
+    # connection is opened
+    stt_pools.update({
+        uplink: STTConnectionPool(
+            deepgram_connector(deepgram, live_options(uplink)),
+            size=size,
+            check_interval=Config.STT_POOL_CHECK_INTERVAL,
+            max_idle=Config.STT_POOL_MAX_IDLE
+        )
+        for uplink, size in (("pcm", Config.STT_POOL_SIZE),
+                             ("opus", Config.STT_POOL_OPUS_SIZE if Config.OPUS_UPLINK else 0))
+    })
+    elevenlabs = ElevenLabs(api_key=Config.ELEVENLABS_API_KEY)
+    audio_cache = AudioCache(
+        Config.AUDIO_CACHE_DIR,
+        max_memory_bytes=Config.AUDIO_CACHE_MEMORY_BYTES,
+        max_disk_bytes=Config.AUDIO_CACHE_DISK_BYTES
+    ) if Config.AUDIO_CACHE else None
+    tts = TTSEngine(elevenlabs, cache=audio_cache)
+    session_store = SessionStore(
+        Config.SESSION_DB,
+        ttl=Config.SESSION_TTL_HOURS * 3600
+    ) if Config.SESSION_STORE else None
+    memory_index = MemoryIndex(
+        Config.MEMORY_INDEX_DB,
+        roots=Config.MEMORY_INDEX_PATHS,
+        shared=Config.WORKERS > 1,
+        checkpoint_journal=Config.MEMORY_CHECKPOINT_JOURNAL
+    ) if Config.MEMORY_INDEX else None
+    span_log = SpanLog(Config.TRACE_LOG, "voice_bridge") if Config.TRACE_LOG else None
+    shared_metrics = SharedMetrics(Config.METRICS_DIR, pipeline_metrics) if Config.WORKERS > 1 else None
+
+async def iterate_queue(queue: asyncio.Queue):
+    """Yield items from a queue until a None sentinel arrives."""
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        yield item
 
 class VoiceBridgeSession:
     def __init__(self, websocket: WebSocket):
         self.websocket = websocket
+        self.session_id = str(uuid.uuid4())
         self.context_manager = ContextManager(
             max_messages=Config.MAX_CONTEXT_MESSAGES,
-            max_length=Config.MAX_MESSAGE_LENGTH
+            max_length=Config.MAX_MESSAGE_LENGTH,
+            token_budget=Config.CONTEXT_TOKEN_BUDGET or None,
+            summary_tokens=Config.CONTEXT_SUMMARY_TOKENS,
+            memory_index=memory_index,
+            memory_snippets=Config.MEMORY_INDEX_K
         )
-        self.mcp_bridge = MCPBridgeHandler()
+        self.mcp_bridge = MCPBridgeHandler(transport=create_transport(
+            Config.BRIDGE_MODE,
+            spool_dir=Config.BRIDGE_SPOOL_DIR,
+            socket_path=Config.BRIDGE_SOCKET_PATH
+        ), session_id=self.session_id, cache=response_cache)
+        self.stt = None
+        self.uplink = None  # "pcm" or "opus" once transcription has started
         self.deepgram_connection = None
         self.is_processing = False
+        self.turn_task = None
+        self.turn_timer = TurnTimer()  # stage marks of the current turn, see metrics.py
+        self.interruptions = 0
+        self.talk_overs = 0  # finals received while a turn was running
+        self.utterances = UtteranceQueue(
+            window=Config.UTTERANCE_WINDOW_MS / 1000,
+            max_size=Config.UTTERANCE_QUEUE_SIZE,
+            policy=Config.UTTERANCE_QUEUE_POLICY
+        )
+        self.last_utterance = None
+        self.last_utterance_answered = False
+        self.turn_loop_task = asyncio.create_task(self.turn_loop())
         self.last_audio_time = time.time()
         self.keep_alive_task = None
+        self.vad = VoiceActivityGate(
+            sample_rate=Config.AUDIO_SAMPLE_RATE,
+            threshold_db=Config.VAD_THRESHOLD_DB,
+            pre_roll_ms=Config.VAD_PRE_ROLL_MS,
+            hang_over_ms=Config.VAD_HANG_OVER_MS
+        ) if Config.VAD else None
+        self.last_tts_first_byte_ms = None
+        self.audio_log = SampledLog(logger, Config.LOG_SAMPLE_INTERVAL)  # per-chunk debug lines
+        self.binary_audio = False
+        self.downlink_seq = 0
+        self.uplink_seq = None
+    
+    async def resume(self, token: str = None) -> list:
+        """Continue the conversation stored under ``token`` or start a new one.
+        Returns the restored messages."""
+        restored = None
+        if token:
+            restored = await asyncio.wrap_future(session_store.load(token, Config.SESSION_RESUME_MESSAGES))
+        if restored is None:
+            token, messages, summary = session_store.create(), [], ""
+        else:
+            messages, summary = restored
+            logger.info(f"Resumed session with {len(messages)} messages")
+        self.context_manager.attach(session_store, token, messages, summary)
+        return messages
     
-    async def start_deepgram(self):
+    async def start_deepgram(self, uplink: str = "pcm"):
+        if self.stt:
+            return
         try:
-            self.deepgram_connection = deepgram.listen.asyncwebsocket.v("1")
-            
             async def on_message(result, **kwargs):
-                logger.debug(f"Deepgram transcription result: {result}")
+                self.audio_log.log("Deepgram transcription result: %s", result)
                 sentence = result.channel.alternatives[0].transcript
                 
                 if result.is_final and len(sentence) > 0:
                     logger.info(f"Final transcription: {sentence}")
                     await self.handle_transcription(sentence)
                 elif not result.is_final and len(sentence) > 0:
-                    logger.debug(f"Interim transcription: {sentence}")
+                    self.audio_log.log("Interim transcription: %s", sentence)
+                    await self.interrupt("interim transcript")
+            
+            async def on_speech_started(speech_started, **kwargs):
+                logger.debug("Deepgram detected speech")
+                await self.interrupt("speech started")
             
             async def on_error(error, **kwargs):
                 logger.error(f"Deepgram error: {error}")
@@ -58,24 +198,18 @@ class VoiceBridgeSession:
             async def on_metadata(metadata, **kwargs):
                 logger.debug(f"Deepgram metadata: {metadata}")
             
-            self.deepgram_connection.on(LiveTranscriptionEvents.Transcript, on_message)
-            self.deepgram_connection.on(LiveTranscriptionEvents.Error, on_error)
-            self.deepgram_connection.on(LiveTranscriptionEvents.Metadata, on_metadata)
-            
-            options = LiveOptions(
-                model=Config.DEEPGRAM_MODEL,
-                language="en-US",
-                smart_format=True,
-                encoding="linear16",
-                channels=Config.AUDIO_CHANNELS,
-                sample_rate=Config.AUDIO_SAMPLE_RATE,
-                interim_results=True,
-                utterance_end_ms=1000,
-                vad_events=True
-            )
-            
-            await self.deepgram_connection.start(options)
-            logger.info("Deepgram connection started")
+            # Usually already open (see stt_pool.py)
+            start = time.perf_counter()
+            self.stt = await stt_pools[uplink].acquire()
+            self.uplink = uplink
+            self.stt.attach({
+                LiveTranscriptionEvents.Transcript: on_message,
+                LiveTranscriptionEvents.SpeechStarted: on_speech_started,
+                LiveTranscriptionEvents.Error: on_error,
+                LiveTranscriptionEvents.Metadata: on_metadata
+            })
+            self.deepgram_connection = self.stt.connection
+            logger.info(f"Deepgram connection ({uplink}) ready after {(time.perf_counter() - start) * 1000:.0f} ms")
             
             # Start keep-alive task
             self.keep_alive_task = asyncio.create_task(self.keep_alive())
@@ -88,102 +222,264 @@ class VoiceBridgeSession:
         """Send keep-alive messages to Deepgram to prevent timeout"""
         while self.deepgram_connection:
             try:
-                # Check if we haven't sent audio in 5 seconds
+                # Check if we haven't sent anything in 5 seconds. With the
+                # VAD gate closed that is most of the time between utterances.
                 if time.time() - self.last_audio_time > 5:
                     logger.debug("Sending keep-alive to Deepgram")
                     await self.deepgram_connection.keep_alive()
-                await asyncio.sleep(5)
+                    self.last_audio_time = time.time()
+                await asyncio.sleep(1)
             except Exception as e:
                 logger.error(f"Keep-alive error: {e}")
                 break
     
     async def handle_transcription(self, text: str):
-        if self.is_processing:
+        now = time.monotonic()
+        if self.utterances.is_duplicate(text, now):
+            logger.debug(f"Dropping repeated final transcript: {text}")
             return
+        if self.is_processing:
+            self.talk_overs += 1
+        
+        if Config.BARGE_IN:
+            # A new utterance replaces whatever is still being answered
+            await self.interrupt("new utterance")
+            last = self.last_utterance
+            if not self.last_utterance_answered and self.utterances.continues(last, now):
+                # The user was still talking: ask again with the whole utterance
+                self.context_manager.remove_last("user", last.text)
+                self.utterances.requeue(last, text, now)
+                return
+        
+        action = self.utterances.add(text, now)
+        if action != "queued":
+            logger.info(f"Utterance {action} (queue depth {len(self.utterances)}): {text}")
+    
+    async def turn_loop(self):
+        """Answer queued utterances one at a time."""
+        while True:
+            utterance = await self.utterances.get()
+            self.last_utterance = utterance
+            self.last_utterance_answered = False
+            self.is_processing = True
+            timer = self.turn_timer = TurnTimer(start=utterance.updated)
+            timer.mark("turn_start")
+            # Each turn runs in its own task so barge-in can cancel it
+            self.turn_task = asyncio.create_task(self.run_turn(utterance.text, merged=utterance.parts > 1))
+            try:
+                result, = await asyncio.gather(self.turn_task, return_exceptions=True)
+            finally:
+                self.is_processing = False
+            self.last_utterance_answered = not isinstance(result, asyncio.CancelledError)
+            if not self.last_utterance_answered:
+                timer.outcome = "interrupted"
+            pipeline_metrics.record(timer)
+            if span_log:
+                log_turn(span_log, timer, session_id=self.session_id, merged=utterance.parts > 1)
+    
+    async def interrupt(self, reason: str) -> bool:
+        """Cancel the turn in progress: the bridge wait, TTS and outgoing audio.
+        
+        Returns True if there was one. The client is told to flush playback.
+        """
+        task = self.turn_task
+        if not Config.BARGE_IN or task is None or task.done():
+            return False
         
-        self.is_processing = True
+        self.turn_task = None  # so concurrent triggers cancel it only once
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        self.interruptions += 1
+        logger.info(f"Barge-in ({reason}): cancelled the current response")
+        await self.websocket.send_json({"type": "interrupt"})
+        return True
+    
+    async def run_turn(self, text: str, merged: bool = False):
         try:
             self.context_manager.add_message("user", text)
             
             await self.websocket.send_json({
                 "type": "transcription",
-                "text": text
-            })
-            
-            response = await self.generate_response(text)
-            
-            self.context_manager.add_message("assistant", response)
-            
-            await self.websocket.send_json({
-                "type": "response",
-                "text": response
+                "text": text,
+                "merged": merged
             })
             
-            audio_stream = await self.generate_audio(response)
-            await self.stream_audio(audio_stream)
+            if Config.BRIDGE_STREAMING and Config.TTS_STREAMING:
+                await self.stream_response(text)
+            else:
+                response = await self.generate_response(text)
+                
+                self.context_manager.add_message("assistant", response)
+                
+                await self.websocket.send_json({
+                    "type": "response",
+                    "text": response
+                })
+                
+                await self.speak(response)
             
         except Exception as e:
+            self.turn_timer.outcome = "error"
             logger.error(f"Error handling transcription: {e}")
             await self.websocket.send_json({
                 "type": "error",
                 "message": str(e)
             })
-        finally:
-            self.is_processing = False
+    
+    async def build_context(self, text: str) -> list:
+        """Conversation context for a request, with the memory snippets relevant to ``text``."""
+        snippets = None
+        if memory_index:
+            snippets = await asyncio.to_thread(self.context_manager.relevant_snippets, text)
+        return self.context_manager.get_context(snippets)
     
     async def generate_response(self, text: str) -> str:
         """Send user message to Claude via MCP bridge and get response."""
         try:
             # Get conversation context for Claude
-            context = self.context_manager.get_context()
+            context = await self.build_context(text)
             
             # Send to Claude via MCP bridge
-            response = await self.mcp_bridge.send_to_claude(text, context)
+            timer = self.turn_timer
+            response = await self.mcp_bridge.send_to_claude(text, context, on_sent=lambda: timer.mark("request_sent"),
+                                                            trace=timer.trace_context())
+            timer.mark("response_first")
+            timer.mark("response")
             
             return response
         except Exception as e:
             logger.error(f"Error getting response from Claude: {e}")
-            return "I'm having trouble processing that. Please try again."
+            return PROCESSING_ERROR_REPLY
     
-    async def generate_audio(self, text: str):
+    async def stream_response(self, text: str) -> str:
+        """Show Claude's reply as it streams in, speaking each sentence once complete."""
+        context = await self.build_context(text)
+        timer = self.turn_timer
+        sentences = asyncio.Queue()
+        speaker = asyncio.create_task(
+            self.send_speech(tts.stream_ordered(iterate_queue(sentences), Config.TTS_WORKERS))
+        )
+        sentence_buffer = SentenceBuffer()
+        pieces = []
+        
         try:
-            response = elevenlabs.text_to_speech.convert(
-                voice_id=Config.ELEVENLABS_VOICE_ID,
-                text=text,
-                model_id="eleven_monolingual_v1",
-                voice_settings=VoiceSettings(
-                    stability=0.5,
-                    similarity_boost=0.5
-                )
-            )
-            
-            audio_chunks = []
-            for chunk in response:
-                audio_chunks.append(chunk)
-            
-            return b''.join(audio_chunks)
-            
+            async for piece in self.mcp_bridge.stream_from_claude(text, context,
+                                                                  on_sent=lambda: timer.mark("request_sent"),
+                                                                  trace=timer.trace_context()):
+                timer.mark("response_first")
+                pieces.append(piece)
+                await self.websocket.send_json({
+                    "type": "response_partial",
+                    "text": piece
+                })
+                for sentence in sentence_buffer.feed(piece):
+                    sentences.put_nowait(sentence)
+            for sentence in sentence_buffer.flush():
+                sentences.put_nowait(sentence)
+            sentences.put_nowait(None)
+            timer.mark("response")
+        except BaseException:
+            speaker.cancel()
+            await asyncio.gather(speaker, return_exceptions=True)
+            raise
+        
+        response = "".join(pieces)
+        self.context_manager.add_message("assistant", response)
+        
+        await self.websocket.send_json({
+            "type": "response",
+            "text": response
+        })
+        
+        await speaker
+        return response
+    
+    async def speak(self, text: str):
+        """Synthesize text and send it to the client."""
+        if Config.TTS_STREAMING:
+            if Config.TTS_SENTENCE_CHUNKING:
+                audio_chunks = tts.stream_sentences(text, Config.TTS_WORKERS)
+            else:
+                audio_chunks = tts.stream(text)
+        else:
+            audio_chunks = self.synthesize_whole(text)
+        await self.send_speech(audio_chunks)
+    
+    async def synthesize_whole(self, text: str):
+        yield await self.generate_audio(text)
+    
+    async def send_speech(self, audio_chunks):
+        """Send synthesized audio to the client, reporting TTS latency."""
+        timer = self.turn_timer
+        start_time = time.perf_counter()
+        first_byte_time = None
+        last_chunk_time = None
+        
+        await self.websocket.send_json({"type": "audio_start"})
+        
+        async for chunk in audio_chunks:
+            last_chunk_time = time.monotonic()
+            timer.mark("tts_first_byte", last_chunk_time)
+            if first_byte_time is None:
+                first_byte_time = time.perf_counter()
+            await self.stream_audio(chunk)
+        
+        if last_chunk_time is not None:
+            timer.mark("tts_complete", last_chunk_time)
+            timer.mark("audio_sent")
+        end_time = time.perf_counter()
+        first_byte_ms = ((first_byte_time or end_time) - start_time) * 1000
+        total_ms = (end_time - start_time) * 1000
+        self.last_tts_first_byte_ms = first_byte_ms
+        logger.info(f"TTS first byte after {first_byte_ms:.0f} ms, complete after {total_ms:.0f} ms")
+        
+        await self.websocket.send_json({
+            "type": "audio_end",
+            "tts_first_byte_ms": round(first_byte_ms, 1),
+            "tts_total_ms": round(total_ms, 1)
+        })
+    
+    async def generate_audio(self, text: str) -> bytes:
+        try:
+            return await tts.synthesize(text)
         except Exception as e:
             logger.error(f"Error generating audio: {e}")
             raise
     
-    async def stream_audio(self, audio_data: bytes):
-        chunk_size = 4096
-        for i in range(0, len(audio_data), chunk_size):
-            chunk = audio_data[i:i + chunk_size]
+    async def send_audio_chunk(self, chunk):
+        if self.binary_audio:
+            await self.websocket.send_bytes(encode_frame(FRAME_MP3, self.downlink_seq, chunk))
+            self.downlink_seq += 1
+        else:
             await self.websocket.send_json({
                 "type": "audio",
                 "data": base64.b64encode(chunk).decode('utf-8')
             })
-            await asyncio.sleep(0.01)
+    
+    async def stream_audio(self, audio_data: bytes):
+        for chunk in iter_slices(audio_data, 4096):
+            await self.send_audio_chunk(chunk)
     
     async def process_audio_chunk(self, audio_data: bytes):
-        if self.deepgram_connection:
+        if not self.deepgram_connection:
+            return
+        segment_ended = False
+        if self.vad and self.uplink == "pcm":
+            audio_data, segment_ended = self.vad.process(audio_data)
+        if audio_data:
             self.last_audio_time = time.time()
-            logger.debug(f"Sending audio chunk of size {len(audio_data)} to Deepgram")
+            self.audio_log.log("Sending audio chunk of size %d to Deepgram", len(audio_data))
             await self.deepgram_connection.send(audio_data)
+        if segment_ended:
+            # No more audio follows the trailing silence, so ask for the
+            # final transcript instead of waiting for Deepgram's endpointing
+            await self.deepgram_connection.finalize()
     
     async def close(self):
+        # Cancelling the loop also cancels the turn it is waiting for
+        self.turn_loop_task.cancel()
+        await asyncio.gather(self.turn_loop_task, return_exceptions=True)
+        
         if self.keep_alive_task:
             self.keep_alive_task.cancel()
             try:
@@ -191,39 +487,196 @@ class VoiceBridgeSession:
             except asyncio.CancelledError:
                 pass
         
-        if self.deepgram_connection:
-            await self.deepgram_connection.finish()
+        if self.stt:
+            # Not returned to the pool: it carries this session's stream
             self.deepgram_connection = None
+            await self.stt.close()
+            self.stt = None
+        
+        self.mcp_bridge.close()
+
+@app.on_event("startup")
+async def start_stt_pools():
+    for pool in stt_pools.values():
+        pool.start()
+
+@app.on_event("shutdown")
+async def close_stt_pools():
+    for pool in stt_pools.values():
+        await pool.close()
+
+@app.on_event("shutdown")
+async def close_session_store():
+    if session_store:
+        # Writes the turns still queued
+        await asyncio.to_thread(session_store.close)
+
+@app.on_event("startup")
+async def start_memory_index():
+    if memory_index:
+        asyncio.create_task(refresh_memory_index())
+
+async def refresh_memory_index():
+    """Keep the memory index in step with the files it covers."""
+    while True:
+        try:
+            await asyncio.wrap_future(memory_index.queue_refresh())
+        except Exception as e:
+            logger.error(f"Memory index refresh failed: {e}")
+        await asyncio.sleep(Config.MEMORY_INDEX_REFRESH)
+
+@app.on_event("shutdown")
+async def close_span_log():
+    if span_log:
+        await asyncio.to_thread(span_log.close)
+
+@app.on_event("shutdown")
+async def close_memory_index():
+    if memory_index:
+        await asyncio.to_thread(memory_index.close)
+
+@app.on_event("startup")
+async def start_metrics_publisher():
+    if shared_metrics:
+        asyncio.create_task(publish_metrics())
+
+async def publish_metrics():
+    """Keep this worker's snapshot in METRICS_DIR current for the others' /metrics."""
+    while True:
+        try:
+            await asyncio.to_thread(shared_metrics.publish)
+        except OSError as e:
+            logger.error(f"Publishing metrics failed: {e}")
+        await asyncio.sleep(1)
+
+def all_metrics() -> PipelineMetrics:
+    """Latency metrics of every worker (only this process's unless WORKERS > 1)."""
+    return shared_metrics.collect() if shared_metrics else pipeline_metrics
+
+@app.on_event("shutdown")
+async def close_shared_metrics():
+    if shared_metrics:
+        await asyncio.to_thread(shared_metrics.close)
+
+@app.on_event("shutdown")
+async def stop_log_listener():
+    # Registered last, so it writes what the other handlers log
+    if log_listener:
+        await asyncio.to_thread(log_listener.stop)
+
+@app.on_event("startup")
+async def prewarm_audio_cache():
+    if audio_cache and Config.AUDIO_CACHE_PREWARM:
+        # In the background, so the server accepts connections right away
+        asyncio.create_task(tts.prewarm(
+            STOCK_PHRASES,
+            sentence_chunking=Config.TTS_STREAMING and Config.TTS_SENTENCE_CHUNKING,
+            streamed=Config.BRIDGE_STREAMING and Config.TTS_STREAMING
+        ))
 
 @app.get("/")
 async def root():
     return FileResponse("static/index.html")
 
+@app.get("/metrics")
+async def metrics():
+    """Turn latency histograms in the Prometheus text format."""
+    merged = await asyncio.to_thread(all_metrics)
+    return PlainTextResponse(merged.render(), media_type="text/plain; version=0.0.4")
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     session = VoiceBridgeSession(websocket)
     
     try:
-        await session.start_deepgram()
-        
+        # Transcription starts once the client's hello says which audio
+        # format it sends (or with PCM, if audio comes first)
         while True:
-            message = await websocket.receive_json()
+            message = await websocket.receive()
+            
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            
+            if message.get("bytes") is not None:
+                try:
+                    frame_type, seq, payload = decode_frame(message["bytes"])
+                except ValueError as e:
+                    logger.warning(f"Dropping malformed audio frame: {e}")
+                    continue
+                if not session.uplink:
+                    await session.start_deepgram()
+                if frame_type == UPLINK_FRAMES[session.uplink]:
+                    if session.uplink_seq is not None and seq != (session.uplink_seq + 1) % SEQ_MODULUS:
+                        logger.warning(f"Uplink audio frames lost: expected {session.uplink_seq + 1}, got {seq}")
+                    session.uplink_seq = seq
+                    await session.process_audio_chunk(payload)
+                else:
+                    logger.warning(f"Ignoring unexpected audio frame type {frame_type}")
+                continue
+            
+            message = json.loads(message["text"])
             
             if message["type"] == "audio":
                 audio_data = base64.b64decode(message["data"])
-                logger.debug(f"Received audio chunk from client: {len(audio_data)} bytes")
+                session.audio_log.log("Received audio chunk from client: %d bytes", len(audio_data))
+                await session.start_deepgram()
                 await session.process_audio_chunk(audio_data)
             
             elif message["type"] == "control":
-                if message["action"] == "clear_context":
+                if message["action"] == "hello":
+                    session.binary_audio = Config.BINARY_AUDIO and bool(message.get("binary"))
+                    opus = Config.OPUS_UPLINK and session.binary_audio and message.get("uplink") == "opus"
+                    await session.start_deepgram("opus" if opus else "pcm")
+                    reply = {
+                        "type": "hello",
+                        "binary": session.binary_audio,
+                        "uplink": session.uplink
+                    }
+                    if session_store and not session.context_manager.session_token:
+                        history = await session.resume(message.get("session_token"))
+                        reply["session_token"] = session.context_manager.session_token
+                        reply["history"] = [{"role": m["role"], "content": m["content"]} for m in history]
+                    await websocket.send_json(reply)
+                elif message["action"] == "interrupt":
+                    # Sent when the user starts talking over playback; the
+                    # client has already stopped playing
+                    await session.interrupt("client")
+                elif message["action"] == "clear_context":
                     session.context_manager.clear()
                     await websocket.send_json({
                         "type": "status",
                         "message": "Context cleared"
                     })
+                elif message["action"] == "invalidate_cache":
+                    if response_cache:
+                        intents = message.get("intents")
+                        if intents:
+                            response_cache.invalidate(*intents)
+                        else:
+                            response_cache.clear()
+                    await websocket.send_json({
+                        "type": "status",
+                        "message": "Response cache cleared"
+                    })
                 elif message["action"] == "get_summary":
                     summary = session.context_manager.get_summary()
+                    summary["interruptions"] = session.interruptions
+                    summary["talk_overs"] = session.talk_overs
+                    summary["utterances"] = session.utterances.stats()
+                    if response_cache:
+                        summary["response_cache"] = response_cache.stats()
+                    if audio_cache:
+                        summary["audio_cache"] = audio_cache.stats()
+                    if session_store:
+                        summary["session_store"] = session_store.stats()
+                    if memory_index:
+                        summary["memory_index"] = memory_index.stats()
+                    summary["latency"] = (await asyncio.to_thread(all_metrics)).summary()
+                    summary["uplink"] = session.uplink
+                    summary["stt_pool"] = stt_pools[session.uplink or "pcm"].stats()
+                    if session.vad:
+                        summary["vad"] = session.vad.stats()
                     await websocket.send_json({
                         "type": "summary",
                         "data": summary
@@ -238,4 +691,9 @@ async def websocket_endpoint(websocket: WebSocket):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=Config.HOST, port=Config.PORT)
\ No newline at end of file
+    if Config.WORKERS > 1:
+        # Each worker imports the app itself and creates its own services at
+        # startup; the kernel hands every new websocket to one of them
+        uvicorn.run("voice_bridge:app", host=Config.HOST, port=Config.PORT, workers=Config.WORKERS)
+    else:
+        uvicorn.run(app, host=Config.HOST, port=Config.PORT)
\ No newline at end of file